@@ -8,6 +8,8 @@ It performs the following key functions:
 - Loads environment variables from the .env file.
 - Creates the core Flask application instance.
 - Configures Cross-Origin Resource Sharing (CORS) to allow the frontend to communicate with it.
+- Installs the response layer (fast JSON serialization and compression).
+- Starts the background refresher of the in-memory universe metrics cache.
 - Imports and registers all the API endpoint blueprints from the 'routes' directory.
 - Defines a simple root route ("/") for basic status checks.
 - Starts the development server when the script is executed directly.
@@ -28,14 +30,21 @@ from routes.onboarding import onboard_bp
 from routes.chat import chat_bp
 from routes.etfs import etfs_bp
 from routes.recommend import recommend_bp
+from response_layer import init_response_layer
+from services.metrics_cache import start_metrics_refresher
 
 # Create the main Flask application instance.
 app = Flask(__name__)
 
 # Enable CORS for the entire application. This is crucial for allowing the
 # React frontend (running on a different domain/port during development)
-# to make API requests to this backend.
-CORS(app)
+# to make API requests to this backend. The caching and pagination headers
+# are exposed so that browser code is allowed to read them.
+CORS(app, expose_headers=["ETag", "Last-Modified", "X-Next-Cursor"])
+
+# Serialize every JSON response with the fast encoder and compress large bodies
+# for clients that accept gzip or brotli.
+init_response_layer(app)
 
 # Register all the imported blueprints with the Flask app.
 # This connects the routes defined in each blueprint (e.g., /health, /chat)
@@ -46,6 +55,10 @@ app.register_blueprint(chat_bp)
 app.register_blueprint(etfs_bp)
 app.register_blueprint(recommend_bp)
 
+# Load the metrics of every ETF in the background and keep them current, so
+# recommendations never wait for the database or for metric calculations.
+start_metrics_refresher()
+
 @app.route("/")
 def home():
     """Defines the root route, which provides a simple status message."""
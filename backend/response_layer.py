@@ -0,0 +1,170 @@
+# backend/response_layer.py
+
+"""
+App-Wide JSON Serialization and Response Compression.
+
+Every route returns through `jsonify`, so the cost of turning results into
+bytes on the wire is shared by the whole API. This module improves it in two
+places, both registered on the app by `init_response_layer`:
+
+1. **Serialization:** `OrjsonProvider` replaces Flask's stdlib-`json` provider
+   with `orjson`, which encodes several times faster and natively understands
+   NumPy arrays and scalars (no `float(...)` conversions needed). If `orjson`
+   is not installed, `StdlibProvider` (Flask's default provider) is used.
+   Both providers serialize objects with a `to_json` method, such as
+   `PriceSeries`, through that method.
+
+2. **Compression:** An `after_request` hook compresses JSON and text responses
+   larger than `COMPRESSION_MIN_BYTES`, using brotli or gzip according to the
+   client's `Accept-Encoding` header. Brotli is only offered when the `brotli`
+   package is installed. Streamed responses, responses without a body (e.g.,
+   304 Not Modified) and responses that are already encoded are left alone.
+"""
+
+import gzip
+import os
+
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the deployment
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the deployment
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed: the saving would not be worth
+# the CPU time and the extra header bytes.
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", 1024))
+
+# Compression levels chosen for speed over the last few percent of size, since
+# responses are compressed on every request.
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# The mimetypes worth compressing. Everything else (e.g., images) is sent as is.
+COMPRESSIBLE_MIMETYPES = ("application/json", "application/x-ndjson", "text/html", "text/plain", "text/csv")
+
+
+def _to_serializable(obj):
+    """Converts the values the JSON encoders cannot serialize by themselves."""
+    if hasattr(obj, "to_json"):
+        return obj.to_json()
+    # NumPy scalars and arrays in non-native layouts fall back to Python objects.
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    return DefaultJSONProvider.default(obj)
+
+
+class StdlibProvider(DefaultJSONProvider):
+    """Flask's default stdlib-`json` provider, extended with `_to_serializable`."""
+
+    default = staticmethod(_to_serializable)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    A Flask JSON provider backed by `orjson`.
+
+    It honours the same `sort_keys` setting as Flask's default provider, so
+    responses keep their key order. Types that `orjson` does not support
+    natively are converted by `_to_serializable`.
+    """
+
+    def dumps(self, obj, **kwargs) -> str:
+        """Serializes an object to a JSON string."""
+        return self._dumps_bytes(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        """Parses a JSON string or bytes."""
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """
+        Builds a JSON response, like `jsonify`.
+
+        Unlike the base implementation, the body is passed to the response as
+        the bytes produced by `orjson`, without a round trip through `str`.
+        """
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._dumps_bytes(obj) + b"\n", mimetype=self.mimetype)
+
+    def _dumps_bytes(self, obj) -> bytes:
+        """Serializes an object to JSON bytes."""
+        options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=_to_serializable, option=options)
+
+
+def init_response_layer(app):
+    """
+    Installs the fast JSON provider and the compression hook on an app.
+
+    Args:
+        app (Flask): The application to configure.
+    """
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
+    else:
+        print("orjson is not installed. Using the default JSON provider.")
+        app.json = StdlibProvider(app)
+    app.after_request(compress_response)
+
+
+def compress_response(response):
+    """
+    Compresses a response body with the best encoding the client accepts.
+
+    Args:
+        response (Response): The response about to be sent.
+
+    Returns:
+        Response: The same response, compressed in place when worthwhile.
+    """
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    # The body depends on Accept-Encoding, so shared caches must key on it.
+    response.vary.add("Accept-Encoding")
+
+    if (
+        response.status_code < 200
+        or response.status_code in (204, 304)
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+    body = response.get_data()
+    if len(body) < COMPRESSION_MIN_BYTES:
+        return response
+
+    if encoding == "br":
+        compressed = brotli.compress(body, quality=BROTLI_QUALITY)
+    else:
+        compressed = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+
+    # A strong ETag identifies the exact bytes, which have just changed. A weak
+    # ETag still lets conditional requests match across encodings.
+    etag, is_weak = response.get_etag()
+    if etag and not is_weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def _choose_encoding():
+    """Returns "br", "gzip" or None, following the client's preferences."""
+    if not request.accept_encodings.provided:
+        return None
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+    return request.accept_encodings.best_match(supported)
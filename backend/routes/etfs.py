@@ -6,34 +6,62 @@ API Endpoint for ETF Market Data.
 This blueprint serves the '/api/etfs/market-data' route, which provides a
 comprehensive, calculated dataset for all ETFs tracked by the Finora application.
 
-It orchestrates calls to the `market_service` to fetch raw data and then
-computes key performance indicators like returns, volatility, and Sharpe ratio
-before returning the enriched data to the client. This endpoint powers the
+It serves key performance indicators like returns, volatility, and Sharpe
+ratio from the precomputed metrics snapshot (see `metrics_snapshot`), which is
+recomputed from the raw data only when it is stale. This endpoint powers the
 "Market Data" page in the frontend application.
 """
 
-from flask import Blueprint, jsonify
-from datetime import datetime
-from services.market_service import (
-    get_etf_metadata_from_db,
-    get_latest_prices_from_db,
-    get_historical_data_for_period,
-    calculate_ytd_return,
-    calculate_historical_return,
-    calculate_volatility,
-    calculate_sharpe_ratio
-)
+import hashlib
+from flask import Blueprint, request, jsonify, make_response
+from datetime import datetime, timedelta, timezone
+from services.market_service import get_data_version, get_window_statistics
+from services.metrics_snapshot import get_metrics_snapshot
+from services.market_query import get_market_data_index, parse_market_query
 
 etfs_bp = Blueprint("etfs", __name__)
 
+# How long browsers and CDNs may reuse a market-data response without asking
+# again. After that, they revalidate with If-None-Match and usually get a 304.
+MARKET_DATA_MAX_AGE_SECONDS = 300
+MARKET_DATA_CACHE_CONTROL = f"public, max-age={MARKET_DATA_MAX_AGE_SECONDS}, stale-while-revalidate=60"
+
 @etfs_bp.route("/api/etfs/market-data", methods=["GET"])
 def get_top_etf_data():
     """
     Fetches and computes market data for all tracked ETFs.
 
-    This endpoint retrieves the master list of ETFs, fetches their latest prices
-    and historical data from the database cache, and then calculates several
-    key performance and risk metrics for each one.
+    This endpoint returns the master list of ETFs with their latest prices and
+    several key performance and risk metrics for each one. The metrics come
+    from the snapshot published by the scraper, and are calculated live from
+    the database cache only if that snapshot is out of date.
+
+    Optional query parameters let the server sort, filter, trim and paginate
+    the table. They are answered from presorted in-memory indexes, so a top-N
+    request only touches about N rows. Without any of them, every field of
+    every ETF is returned, as before.
+
+    Query Parameters:
+        sort (str, optional): The field to sort on (e.g., "sharpe_ratio").
+        order (str, optional): "asc" (default) or "desc".
+        fields (str, optional): A comma-separated list of fields to return.
+        limit (int, optional): The page size (1-500). When more rows remain, the
+                               `X-Next-Cursor` response header holds the cursor
+                               for the next page.
+        cursor (str, optional): The cursor returned with the previous page.
+        min_<field> / max_<field> (float, optional): Numeric filters, e.g.
+                               `min_sharpe_ratio=1` or `max_expense_ratio=0.1`.
+                               `min_sharpe`, `max_expense`, `min_return` and
+                               `min_ytd` are accepted as shorthands.
+
+    The response carries an `ETag` and a `Last-Modified` header derived from
+    the data version (the latest cached price date, the data revision and the
+    metadata hash). `Last-Modified` is the time of the version's most recent
+    change, so it also moves when a backfill is published or the metadata is
+    edited.
+    A request whose `If-None-Match` (or `If-Modified-Since`) header matches
+    the current version receives an empty 304 response, without the payload
+    being rebuilt or the database being queried.
 
     Returns:
         A JSON response containing a list of ETF data objects.
@@ -51,51 +79,43 @@ def get_top_etf_data():
                 },
                 ...
             ]
-        On error (404 or 500):
+        On not modified (304): An empty body.
+        On error (400, 404 or 500):
             { "error": "Error message details..." }
     """
     try:
-        # 1. Fetch static metadata for all ETFs (name, symbol, expense ratio).
-        etf_metadata = get_etf_metadata_from_db()
-        if not etf_metadata:
+        query = parse_market_query(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        # 1. Answer conditional requests straight from the in-memory data version.
+        data_version = get_data_version()
+        etag, last_modified = _get_market_data_validators(data_version)
+        if etag and _is_not_modified(etag, last_modified):
+            return _with_cache_headers(make_response("", 304), etag, last_modified)
+
+        # 2. Get the metrics of every ETF. These are served from the snapshot the
+        # scraper publishes after each run, and only computed live (one bulk
+        # price fetch plus a single vectorized pass) when that snapshot is stale.
+        snapshot = get_metrics_snapshot()
+        if not snapshot['etfs']:
             return jsonify({"error": "No ETFs found in database."}), 404
-        
-        symbols = [etf['symbol'] for etf in etf_metadata]
-        
-        # 2. Fetch the most recent closing price for all symbols. This is more
-        # efficient than querying the price for each ETF inside the loop.
-        latest_prices = get_latest_prices_from_db(symbols)
-        
-        response_data = []
-        # 3. For each ETF, fetch its historical data and compute performance metrics.
-        for etf in etf_metadata:
-            symbol = etf['symbol']
-            current_price = latest_prices.get(symbol)
-            
-            # Fetch the last 365 days of data for 1-year return and volatility calculations.
-            historical_data_1yr = get_historical_data_for_period(symbol, 365)
-            # Use the helper to get data from Jan 1st of this year for YTD calculations.
-            historical_data_ytd = get_yearly_historical_data_from_db(symbol)
-
-            # Perform calculations by delegating to the market_service.
-            one_year_return = calculate_historical_return(historical_data_1yr)
-            ytd_return = calculate_ytd_return(current_price, historical_data_ytd)
-            volatility = calculate_volatility(historical_data_1yr)
-            sharpe_ratio = calculate_sharpe_ratio(historical_data_1yr)
-
-            # 4. Assemble the final data object for this ETF and add it to the list.
-            response_data.append({
-                'symbol': symbol,
-                'name': etf['name'],
-                'price': current_price or 0.0,
-                'ytd_return': ytd_return,
-                'expense_ratio': float(etf['expense_ratio']),
-                'one_year_return': one_year_return,
-                'volatility': volatility,
-                'sharpe_ratio': sharpe_ratio
-            })
-            
-        return jsonify(response_data)
+
+        # 3. The snapshot entries already have the exact shape of the response.
+        if not query:
+            return _with_cache_headers(jsonify(snapshot['etfs']), etag, last_modified)
+
+        # 4. Otherwise, answer the query from the presorted index over this snapshot.
+        index = get_market_data_index(snapshot['etfs'], snapshot['version'])
+        try:
+            response_data, next_cursor = index.query(**query)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        response = jsonify(response_data)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return _with_cache_headers(response, etag, last_modified)
 
     except Exception as e:
         # A general exception handler to catch any errors during the complex
@@ -104,22 +124,107 @@ def get_top_etf_data():
         return jsonify({"error": "An internal server error occurred."}), 500
 
 
-def get_yearly_historical_data_from_db(symbol: str) -> list:
+def _get_market_data_validators(data_version: dict):
     """
-    Helper function to get historical data from the beginning of the current year.
-
-    It calculates the number of days that have passed since January 1st of the
-    current year and then calls the main historical data service function to
-    retrieve the relevant data slice.
+    Derives the HTTP cache validators from the market data version.
 
     Args:
-        symbol (str): The ETF symbol to fetch data for.
+        data_version (dict): The result of `get_data_version`.
 
     Returns:
-        list: A list of historical data points for the year-to-date period.
+        tuple: The quoted ETag string (which also covers the request's query
+               string) and the Last-Modified datetime (the version's
+               'modified_at', rounded up to whole seconds as HTTP dates are),
+               or (None, None) if the version is unknown.
+    """
+    latest_date = data_version.get("latest_date")
+    if not latest_date:
+        return None, None
+    # The query string is part of the tag, since each query returns a different body.
+    validator = (
+        f"{latest_date}:{data_version.get('data_revision')}:{data_version.get('metadata_hash')}:"
+        f"{request.query_string.decode('utf-8')}"
+    )
+    digest = hashlib.sha256(validator.encode("utf-8")).hexdigest()
+    # Unlike the latest date alone, 'modified_at' also moves when a backfill is
+    # published or the metadata is edited, so If-Modified-Since stays correct.
+    last_modified = data_version.get("modified_at") or datetime.strptime(
+        str(latest_date), "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    if last_modified.microsecond:
+        last_modified = last_modified.replace(microsecond=0) + timedelta(seconds=1)
+    return f'"{digest[:32]}"', last_modified
+
+
+def _is_not_modified(etag: str, last_modified: datetime) -> bool:
+    """
+    Checks the request's conditional headers against the current validators.
+
+    As required by HTTP, If-None-Match takes precedence over If-Modified-Since.
+    It uses weak comparison, since compressed responses carry a weak ETag.
     """
-    today = datetime.now().date()
-    start_of_year = datetime(today.year, 1, 1).date()
-    days_since_start_of_year = (today - start_of_year).days
-    # Reuse the existing service function to get data for the calculated number of days.
-    return get_historical_data_for_period(symbol, days_since_start_of_year)
\ No newline at end of file
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag.strip('"'))
+    if request.if_modified_since:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def _with_cache_headers(response, etag: str, last_modified: datetime):
+    """Attaches the ETag, Last-Modified and Cache-Control headers to a response."""
+    if etag:
+        response.set_etag(etag.strip('"'))
+        response.last_modified = last_modified
+    response.headers["Cache-Control"] = MARKET_DATA_CACHE_CONTROL
+    return response
+
+
+@etfs_bp.route("/api/etfs/<symbol>/stats", methods=["GET"])
+def get_etf_window_stats(symbol):
+    """
+    Computes return statistics for one ETF over an arbitrary date range.
+
+    The statistics are answered from a prefix-sum index of the ETF's daily
+    returns, so any window costs the same regardless of its length.
+
+    Query Parameters:
+        start (str, optional): The first date of the window, as 'YYYY-MM-DD'.
+        end (str, optional): The last date of the window, as 'YYYY-MM-DD'.
+
+    Returns:
+        A JSON response with the window's statistics.
+        On success (200):
+            {
+                "symbol": "VOO",
+                "start_date": "2024-01-02",
+                "end_date": "2024-12-31",
+                "count": 252,
+                "mean": 0.00092,
+                "variance": 0.00007,
+                "volatility": 12.61,
+                "sharpe_ratio": 1.6,
+                "total_return": 24.9
+            }
+        On error (400, 404 or 500):
+            { "error": "Error message details..." }
+    """
+    symbol = symbol.upper()
+    start_date = request.args.get("start")
+    end_date = request.args.get("end")
+
+    try:
+        # Validate the optional date parameters before touching the data.
+        for value in (start_date, end_date):
+            if value:
+                datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        return jsonify({"error": "Dates must use the YYYY-MM-DD format."}), 400
+
+    try:
+        stats = get_window_statistics(symbol, start_date, end_date)
+    except Exception as e:
+        print(f"An error occurred in the window statistics endpoint: {e}")
+        return jsonify({"error": "An internal server error occurred."}), 500
+
+    if stats["count"] == 0:
+        return jsonify({"error": f"No price data found for {symbol} in this window."}), 404
+    return jsonify({"symbol": symbol, **stats})
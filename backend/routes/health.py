@@ -11,6 +11,9 @@ requests.
 """
 
 from flask import Blueprint, jsonify
+from services.market_service import get_price_cache_stats
+from services.metrics_cache import metrics_cache
+from services.recommendation_service import get_template_cache_stats
 
 health_bp = Blueprint("health", __name__)
 
@@ -32,4 +35,29 @@ def health():
             }
     """
     # Responds with a 200 OK status and a simple JSON payload.
-    return jsonify(status="ok", service="Finora backend")
\ No newline at end of file
+    return jsonify(status="ok", service="Finora backend")
+
+
+@health_bp.route("/health/cache", methods=["GET"])
+def cache_health():
+    """
+    Reports the state of the process-local price history, metrics and
+    portfolio template caches.
+
+    Each worker process has its own caches, so the counters describe only the
+    worker that handled this request.
+
+    Returns:
+        A JSON response with each cache's hit, miss and refresh counters.
+        Example:
+            {
+                "price_cache": {"hits": 120, "misses": 60, "evictions": 0, ...},
+                "metrics_cache": {"version": "2024-06-28:20240628T2210...:ab12...", "hits": 40, ...},
+                "portfolio_templates": {"versions": ["2024-06-28:20240628T2210...:ab12..."], "templates": 57, ...}
+            }
+    """
+    return jsonify(
+        price_cache=get_price_cache_stats(),
+        metrics_cache=metrics_cache.stats(),
+        portfolio_templates=get_template_cache_stats(),
+    )
@@ -6,15 +6,23 @@ Core API Endpoint for Generating Investment Recommendations.
 This blueprint defines the '/api/recommend' route, which is the central "engine"
 of the Finora application. It takes a user's complete financial profile and
 orchestrates calls to the recommendation and projection services to generate
-a full, personalized investment plan.
+a full, personalized investment plan. The '/api/recommend/batch' route does the
+same for many profiles at once, streaming the results back.
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from services.batch_recommendation import iter_batch_recommendations, parse_batch_options, parse_profile, read_ndjson
+from services.chart_encoding import parse_chart_options
+from services.data_loader import PriceDataLoader
+from services.etf_ranking import parse_alternatives
 from services.recommendation_service import generate_recommendation
 from services.projection_service import run_monte_carlo_simulation
 
 recommend_bp = Blueprint("recommend", __name__)
 
+# The request and response mimetype of newline-delimited JSON.
+NDJSON_MIMETYPE = "application/x-ndjson"
+
 @recommend_bp.route("/api/recommend", methods=["POST"])
 def recommend():
     """
@@ -26,6 +34,8 @@ def recommend():
     2. `run_monte_carlo_simulation`: Projects the long-term growth of that portfolio.
 
     The results are combined into a single, comprehensive response for the client.
+    Both services read price history through one request-scoped `PriceDataLoader`,
+    so each ETF's history is fetched at most once per request.
 
     Request JSON Body (camelCase keys from frontend):
         {
@@ -37,6 +47,14 @@ def recommend():
             "experience": "intermediate"
         }
 
+    Query Parameters:
+        chart_format (str, optional): The encoding of each ETF's `historical_data`:
+                                      "records" (default), "columnar" or "delta".
+        chart_points (int, optional): Downsample each chart to at most this many
+                                       points (LTTB), e.g. `chart_points=60`.
+        alternatives (int, optional): List up to this many runner-up ETFs (0-5)
+                                      under each portfolio entry's `alternatives`.
+
     Returns:
         A JSON object containing the full investment plan, or an error.
         On success (200):
@@ -54,34 +72,30 @@ def recommend():
     if not profile_from_request:
         return jsonify({"error": "Request body must be JSON"}), 400
 
-    # 1. Validate the incoming request to ensure all necessary data is present.
-    required_keys = ["age", "income", "investmentAmount", "timeHorizon", "riskTolerance", "experience"]
-    if not all(key in profile_from_request for key in required_keys):
-        return jsonify({"error": "Request body is missing required profile keys."}), 400
+    try:
+        # 1. Validate the incoming profile and convert it to the service layer's
+        # format, exactly as the batch route does for each of its profiles.
+        service_profile = parse_profile(profile_from_request)
+        chart_options = parse_chart_options(request.args)
+        alternatives = parse_alternatives(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     try:
-        # 2. Sanitize and structure the input data for the service layer.
-        # Note the transformation from the frontend's camelCase (e.g., investmentAmount)
-        # to the snake_case expected by the Python services.
-        service_profile = {
-            "age": int(profile_from_request["age"]),
-            "income": int(profile_from_request["income"]),
-            "investment_amount": float(profile_from_request["investmentAmount"]),
-            "time_horizon": str(profile_from_request["timeHorizon"]),
-            "risk_tolerance": str(profile_from_request["riskTolerance"]),
-            "experience": str(profile_from_request["experience"])
-        }
-        
-        # 3. First, generate the core ETF portfolio recommendation.
-        recommendation = generate_recommendation(service_profile)
+        # 2. First, generate the core ETF portfolio recommendation. The loader
+        # collects the request's price history reads (see `PriceDataLoader`).
+        loader = PriceDataLoader()
+        recommendation = generate_recommendation(service_profile, chart_options, loader, alternatives)
         
-        # 4. Immediately use that new portfolio to run the long-term growth simulation.
+        # 3. Immediately use that new portfolio to run the long-term growth simulation.
         projections = run_monte_carlo_simulation(
             portfolio=recommendation["recommended_portfolio"],
-            initial_investment=service_profile["investment_amount"]
+            initial_investment=service_profile["investment_amount"],
+            loader=loader
         )
+        print(loader.summary())
         
-        # 5. Combine both results into a single response object. This is highly
+        # 4. Combine both results into a single response object. This is highly
         # efficient as it provides all necessary dashboard data in one client network request.
         final_response = {**recommendation, "projections": projections}
         
@@ -91,4 +105,64 @@ def recommend():
         # A broad exception handler is used here because the underlying services
         # (recommendation, projection) can have complex, multi-step failures.
         print(f"An error occurred during recommendation: {e}")
-        return jsonify({"error": "An internal error occurred."}), 500
\ No newline at end of file
+        return jsonify({"error": "An internal error occurred."}), 500
+
+@recommend_bp.route("/api/recommend/batch", methods=["POST"])
+def recommend_batch():
+    """
+    Generates the portfolios of many profiles in one request.
+
+    The profiles are processed in chunks: their risk scores and allocations are
+    computed as arrays, and all of them are matched against one metrics
+    snapshot (see `iter_batch_recommendations`). Each result is written as
+    soon as its chunk is done, as one JSON object per line (NDJSON), so the
+    response starts before the whole batch is processed. Results carry no
+    charts, and projections are only run when asked for.
+
+    Request Body, either:
+        - A JSON array of profiles, each with the same keys as `/api/recommend`.
+        - NDJSON (Content-Type: application/x-ndjson), one profile per line.
+          The body is read incrementally, so very large batches can be streamed.
+
+    Query Parameters:
+        alternatives (int, optional): List up to this many runner-up ETFs (0-5)
+                                      under each portfolio entry's `alternatives`.
+        projections (str, optional): "true" to include each profile's
+                                     `projections`. Defaults to "false".
+
+    Returns:
+        On success (200), an NDJSON stream with one line per profile, in input
+        order. A profile that cannot be processed gets an error line instead,
+        without failing the rest of the batch:
+            {"index": 0, "nuanced_risk_score": 7.5, "recommended_portfolio": [...], ...}
+            {"index": 1, "error": "Profile is missing required keys."}
+        On error (400 or 500):
+            { "error": "Error message details..." }
+    """
+    try:
+        options = parse_batch_options(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # 1. Read the profiles, lazily for NDJSON.
+    if request.mimetype == NDJSON_MIMETYPE:
+        profiles = read_ndjson(request.stream, loads=current_app.json.loads)
+    else:
+        profiles = request.get_json(silent=True)
+        if not isinstance(profiles, list):
+            return jsonify({"error": "Request body must be a JSON array of profiles or NDJSON."}), 400
+
+    try:
+        # 2. Load the shared metrics up front, so a failure is still reported
+        # with a status code rather than in the middle of the stream.
+        chunks = iter_batch_recommendations(profiles, **options)
+    except Exception as e:
+        print(f"An error occurred during batch recommendation: {e}")
+        return jsonify({"error": "An internal error occurred."}), 500
+
+    # 3. Stream the results back, one write per chunk.
+    def generate():
+        for chunk in chunks:
+            yield "".join(current_app.json.dumps(result) + "\n" for result in chunk)
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
@@ -0,0 +1,108 @@
+# backend/scripts/benchmark_responses.py
+
+"""
+Response Serialization and Compression Benchmark for Finora.
+
+This script measures what the response layer (`response_layer.py`) saves on
+the API's real payloads. For each payload it reports the encode time and the
+body size with Flask's default stdlib-`json` provider (before) and with the
+`orjson` provider (after), and the size of the body once compressed with gzip
+and, if installed, brotli.
+
+The payloads are built by the same services the routes use, from whichever
+data backend is configured (set FINORA_DATA_BACKEND=sqlite to run offline):
+- The `/api/etfs/market-data` table.
+- A `/api/recommend` response with full chart records.
+- The same response with delta-encoded, downsampled charts.
+
+Usage Examples:
+  python scripts/benchmark_responses.py
+  python scripts/benchmark_responses.py --repeat 200
+"""
+
+import os
+import sys
+import gzip
+import time
+import argparse
+from dotenv import load_dotenv
+
+# Make the backend's modules importable when this file is run directly as a
+# script (e.g., `python scripts/benchmark_responses.py`).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+load_dotenv()
+
+from flask import Flask
+from response_layer import OrjsonProvider, StdlibProvider, GZIP_LEVEL, BROTLI_QUALITY, brotli, orjson
+from services.metrics_snapshot import get_metrics_snapshot
+from services.recommendation_service import generate_recommendation
+from services.projection_service import run_monte_carlo_simulation
+
+SAMPLE_PROFILE = {
+    "age": 30,
+    "income": 75000,
+    "investment_amount": 10000.0,
+    "time_horizon": "long",
+    "risk_tolerance": "moderate",
+    "experience": "intermediate"
+}
+
+def build_payloads() -> dict:
+    """
+    Builds the response bodies to benchmark.
+
+    Returns:
+        dict: A mapping of payload name to the object a route would `jsonify`.
+    """
+    recommendation = generate_recommendation(SAMPLE_PROFILE)
+    compact = generate_recommendation(SAMPLE_PROFILE, {"chart_format": "delta", "points": 60})
+    projections = run_monte_carlo_simulation(
+        portfolio=recommendation["recommended_portfolio"],
+        initial_investment=SAMPLE_PROFILE["investment_amount"]
+    )
+    return {
+        "market-data": get_metrics_snapshot()["etfs"],
+        "recommend": {**recommendation, "projections": projections},
+        "recommend (delta, 60 pts)": {**compact, "projections": projections},
+    }
+
+def time_encoding(provider, payload, repeat: int) -> tuple:
+    """
+    Encodes a payload repeatedly with a provider's `response` method.
+
+    Returns:
+        tuple: (the encoded body bytes, the average encode time in milliseconds).
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        body = provider.response(payload).get_data()
+    return body, (time.perf_counter() - start) / repeat * 1000
+
+def run_benchmark(repeat: int):
+    """
+    Prints the encode time and size of each payload, before and after.
+
+    Args:
+        repeat (int): The number of encodings averaged per measurement.
+    """
+    app = Flask(__name__)
+    before = StdlibProvider(app)
+    after = OrjsonProvider(app) if orjson is not None else None
+    if after is None:
+        print("orjson is not installed; only the default provider is measured.")
+
+    payloads = build_payloads()
+    print(f"\n{'payload':<28}{'json ms':>9}{'orjson ms':>11}{'raw bytes':>11}{'gzip':>9}{'brotli':>9}")
+    with app.app_context():
+        for name, payload in payloads.items():
+            body, before_ms = time_encoding(before, payload, repeat)
+            after_ms = time_encoding(after, payload, repeat)[1] if after else float("nan")
+            gzip_size = len(gzip.compress(body, compresslevel=GZIP_LEVEL))
+            brotli_size = len(brotli.compress(body, quality=BROTLI_QUALITY)) if brotli else "-"
+            print(f"{name:<28}{before_ms:>9.3f}{after_ms:>11.3f}{len(body):>11}{gzip_size:>9}{brotli_size:>9}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark JSON encoding and compression of API payloads.")
+    parser.add_argument("--repeat", type=int, default=50, help="The number of encodings averaged per measurement.")
+    args = parser.parse_args()
+    run_benchmark(args.repeat)
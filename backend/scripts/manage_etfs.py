@@ -5,50 +5,74 @@ Command-Line Admin Tool for ETF Management.
 
 This script provides a command-line interface (CLI) for performing CRUD
 (Create, Read, Update, Delete) operations on the 'etfs' table in the
-Supabase database. It allows an administrator to easily list, add, remove,
+configured database (Supabase, or the local SQLite store when
+FINORA_DATA_BACKEND=sqlite). It allows an administrator to easily list, add, remove,
 and update the ETFs that the Finora application tracks.
 
 This tool is intended for administrative use only and is separate from the
 main Flask web application.
 
+Many ETFs can be onboarded at once with `import`, which reads a CSV file
+(columns: symbol, name, expense_ratio) and writes it in batched upserts. With
+`--backfill`, the history of every newly added ETF is then scraped right away,
+concurrently (see `populate_historical_data.backfill_symbols`), instead of
+waiting for the next scheduled scraper run. `remove` accepts several symbols,
+and deletes each one's history in bounded date-range chunks, so that removing
+a long history never runs into a statement timeout.
+
 Usage Examples:
   python manage_etfs.py list
   python manage_etfs.py add VTI "Vanguard Total Stock Market ETF" 0.03
+  python manage_etfs.py add VTI "Vanguard Total Stock Market ETF" 0.03 --backfill
+  python manage_etfs.py import etfs.csv --backfill --workers 8
+  python manage_etfs.py import etfs.csv --update
   python manage_etfs.py remove VTI
+  python manage_etfs.py remove VTI VXUS BND --chunk-days 90
   python manage_etfs.py update VOO --name "Vanguard S&P 500 Index Fund ETF"
 """
 import os
+import sys
+import csv
 import argparse
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from supabase import create_client, Client
+
+# Make the backend's `services` package and the scraper importable when this
+# file is run directly as a script (e.g., `python scripts/manage_etfs.py list`).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from services.repository import get_repository
+from populate_historical_data import (
+    DEFAULT_REQUESTS_PER_SECOND, DEFAULT_WORKERS, FixtureDownloader, backfill_symbols
+)
 
 # --- Configuration ---
-# Load environment variables from the .env file and initialize the Supabase client.
+# Load environment variables (database backend and credentials) from the .env file.
 load_dotenv()
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError("Supabase credentials not found in .env file")
+# The number of ETFs written by each bulk upsert of an import.
+DEFAULT_IMPORT_BATCH_SIZE = 100
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# The length of the date range deleted by each statement when a history is
+# removed. A year is about 252 rows per symbol.
+DEFAULT_DELETE_CHUNK_DAYS = 365
 
 # --- Service Functions for DB Operations ---
 
 def list_etfs():
     """Fetches and prints a formatted list of all ETFs currently tracked in the database."""
     print("Fetching all ETFs from the database...")
-    response = supabase.table('etfs').select('symbol, name, expense_ratio').order('symbol').execute()
-    if response.data:
+    etfs = sorted(get_repository().get_etf_metadata(), key=lambda etf: etf['symbol'])
+    if etfs:
         # Print a formatted header for the table
         print(f"{'Symbol':<6} | {'Name':<60} | {'Expense Ratio':<15}")
         print("-" * 90)
-        for etf in response.data:
+        for etf in etfs:
             print(f"- {etf['symbol']:<6} | {etf['name']:<60} | {etf['expense_ratio']}%")
     else:
         print("No ETFs found.")
 
-def add_etf(symbol: str, name: str, expense_ratio: float):
+def add_etf(symbol: str, name: str, expense_ratio: float) -> bool:
     """
     Adds a new ETF to the 'etfs' table in the database.
 
@@ -56,27 +80,161 @@ def add_etf(symbol: str, name: str, expense_ratio: float):
         symbol (str): The stock symbol of the ETF (e.g., VOO).
         name (str): The full name of the ETF.
         expense_ratio (float): The annual expense ratio of the fund.
+
+    Returns:
+        bool: True if the ETF was added.
     """
     print(f"Adding ETF '{symbol}'...")
     try:
         # The symbol is converted to uppercase to maintain data consistency.
-        response = supabase.table('etfs').insert({
-            'symbol': symbol.upper(),
-            'name': name,
-            'expense_ratio': expense_ratio
-        }).execute()
-        if response.data:
+        if get_repository().add_etf(symbol.upper(), name, expense_ratio):
             print(f"✅ Successfully added {symbol}.")
+            return True
     except Exception as e:
         print(f"❌ Error adding {symbol}: {e}")
+    return False
+
+def read_etf_csv(path: str) -> list:
+    """
+    Reads and validates a CSV file of ETFs.
+
+    The file needs a header row with the columns 'symbol', 'name' and
+    'expense_ratio'. Invalid rows are reported and skipped. If a symbol
+    appears more than once, its last row wins.
+
+    Args:
+        path (str): The CSV file.
+
+    Returns:
+        list: The valid ETFs as dictionaries with 'symbol' (uppercase), 'name'
+              and 'expense_ratio', in file order.
+    """
+    etfs = {}
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        missing = {"symbol", "name", "expense_ratio"} - set(reader.fieldnames or [])
+        if missing:
+            raise ValueError(f"{path} is missing the column(s): {', '.join(sorted(missing))}")
+        # Line 1 is the header, so data rows start at line 2.
+        for line, row in enumerate(reader, start=2):
+            symbol = (row["symbol"] or "").strip().upper()
+            name = (row["name"] or "").strip()
+            try:
+                expense_ratio = float(row["expense_ratio"])
+            except (TypeError, ValueError):
+                expense_ratio = None
+            if not symbol or not name or expense_ratio is None:
+                print(f"⚠️  Skipping line {line}: a symbol, a name and a numeric expense ratio are required.")
+                continue
+            etfs[symbol] = {"symbol": symbol, "name": name, "expense_ratio": expense_ratio}
+    return list(etfs.values())
 
-def remove_etf(symbol: str):
+def import_etfs(path: str, update_existing: bool = False, batch_size: int = DEFAULT_IMPORT_BATCH_SIZE) -> list:
+    """
+    Adds every ETF of a CSV file to the 'etfs' table, in batched upserts.
+
+    Args:
+        path (str): The CSV file (see `read_etf_csv`).
+        update_existing (bool, optional): If True, ETFs that already exist get
+                                          the name and expense ratio from the
+                                          file. Otherwise they are left as is.
+        batch_size (int, optional): The number of ETFs per upsert.
+
+    Returns:
+        list: The symbols that were newly added.
+    """
+    print(f"Importing ETFs from {path}...")
+    try:
+        etfs = read_etf_csv(path)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error reading {path}: {e}")
+        return []
+
+    repository = get_repository()
+    existing = {etf['symbol'] for etf in repository.get_etf_metadata()}
+    new_symbols = {etf['symbol'] for etf in etfs if etf['symbol'] not in existing}
+    to_write = etfs if update_existing else [etf for etf in etfs if etf['symbol'] not in existing]
+
+    added = []
+    for i in range(0, len(to_write), batch_size):
+        batch = to_write[i:i + batch_size]
+        try:
+            repository.upsert_etfs(batch)
+            added.extend(etf['symbol'] for etf in batch if etf['symbol'] in new_symbols)
+        except Exception as e:
+            print(f"❌ Error writing a batch of {len(batch)} ETFs ({batch[0]['symbol']}...{batch[-1]['symbol']}): {e}")
+
+    updated = sum(1 for etf in to_write if etf['symbol'] in existing) if update_existing else 0
+    skipped = len(etfs) - len(to_write)
+    print(f"✅ Added {len(added)}, updated {updated} and skipped {skipped} existing ETF(s).")
+    return added
+
+def backfill_etfs(symbols: list, workers: int = DEFAULT_WORKERS,
+                  requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND, fixture: str = None) -> dict:
+    """
+    Scrapes the history of newly added ETFs right away, concurrently.
+
+    Args:
+        symbols (list): The symbols to backfill.
+        workers (int, optional): The number of download groups processed concurrently.
+        requests_per_second (float, optional): The maximum request rate per host.
+        fixture (str, optional): A CSV file (date, symbol, close) to use instead of Yahoo Finance.
+
+    Returns:
+        dict: The backfill report (see `backfill_symbols`), or None if there was nothing to do.
+    """
+    if not symbols:
+        print("No new ETFs to backfill.")
+        return None
+    return backfill_symbols(
+        symbols,
+        workers=workers,
+        requests_per_second=requests_per_second,
+        downloader=FixtureDownloader(fixture) if fixture else None,
+    )
+
+def delete_history_in_chunks(repository, symbol: str, chunk_days: int = DEFAULT_DELETE_CHUNK_DAYS) -> int:
+    """
+    Deletes a symbol's price history one date range at a time.
+
+    A single unbounded delete of a long history can exceed the database's
+    statement timeout. Deleting `chunk_days` at a time, oldest first, keeps
+    every statement small, and an interrupted removal can simply be re-run.
+
+    Args:
+        repository (MarketDataRepository): The data repository.
+        symbol (str): The ETF symbol.
+        chunk_days (int, optional): The number of calendar days per delete.
+
+    Returns:
+        int: The number of price rows deleted.
+    """
+    first_date = repository.get_earliest_date(symbol)
+    last_date = repository.get_latest_date(symbol)
+    if first_date is None or last_date is None:
+        return 0
+
+    deleted = 0
+    start = datetime.strptime(str(first_date)[:10], '%Y-%m-%d').date()
+    last = datetime.strptime(str(last_date)[:10], '%Y-%m-%d').date()
+    while start <= last:
+        end = start + timedelta(days=chunk_days - 1)
+        deleted += repository.delete_price_range(symbol, start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'))
+        start = end + timedelta(days=1)
+    # Rows written after the range was planned (and the symbol's aggregates)
+    # are removed by the final, now small, delete.
+    repository.delete_price_history(symbol)
+    return deleted
+
+def remove_etf(symbol: str, chunk_days: int = DEFAULT_DELETE_CHUNK_DAYS):
     """
     Removes an ETF from the 'etfs' table and deletes all of its associated
     historical price data from the 'etf_historical_data' table.
 
     Args:
         symbol (str): The stock symbol of the ETF to remove.
+        chunk_days (int, optional): The number of days of history deleted per
+                                    statement (see `delete_history_in_chunks`).
     """
     symbol = symbol.upper()
     print(f"Removing ETF '{symbol}' and all its historical data...")
@@ -85,14 +243,13 @@ def remove_etf(symbol: str):
         # the records from the 'child' table (etf_historical_data) before deleting
         # the 'parent' record from the 'etfs' table.
         print(f"Deleting historical data for {symbol}...")
-        supabase.table('etf_historical_data').delete().eq('symbol', symbol).execute()
+        repository = get_repository()
+        deleted = delete_history_in_chunks(repository, symbol, chunk_days)
+        print(f"Deleted {deleted} price rows in chunks of {chunk_days} days.")
         
         print(f"Deleting metadata for {symbol}...")
-        response = supabase.table('etfs').delete().eq('symbol', symbol).execute()
-
-        # The response.data will contain the record that was deleted.
-        # If it's empty, it means no record matched the symbol.
-        if response.data:
+        # The repository reports whether a record matched the symbol and was deleted.
+        if repository.delete_etf(symbol):
             print(f"✅ Successfully removed {symbol}.")
         else:
             print(f"⚠️  Warning: ETF {symbol} not found in the metadata table.")
@@ -124,8 +281,7 @@ def update_etf(symbol: str, name: str = None, expense_ratio: float = None):
         return
         
     try:
-        response = supabase.table('etfs').update(update_data).eq('symbol', symbol).execute()
-        if response.data:
+        if get_repository().update_etf(symbol, update_data):
             print(f"✅ Successfully updated {symbol}.")
         else:
             print(f"⚠️  Warning: ETF {symbol} not found. No update was made.")
@@ -136,21 +292,42 @@ def update_etf(symbol: str, name: str = None, expense_ratio: float = None):
 if __name__ == "__main__":
     # This block configures the command-line argument parser, defining the
     # subcommands and their expected arguments using Python's argparse library.
-    parser = argparse.ArgumentParser(description="Admin script to manage ETFs in the Supabase database.")
+    parser = argparse.ArgumentParser(description="Admin script to manage ETFs in the Finora database.")
     subparsers = parser.add_subparsers(dest="command", required=True, help="Available commands")
 
     # `list` command: No arguments needed.
     parser_list = subparsers.add_parser('list', help='List all ETFs in the database.')
 
+    # Options shared by the commands that can backfill the ETFs they add.
+    backfill_options = argparse.ArgumentParser(add_help=False)
+    backfill_options.add_argument('--backfill', action='store_true',
+                                  help='Scrape the history of the newly added ETFs right away.')
+    backfill_options.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                                  help='The number of concurrent download groups of the backfill.')
+    backfill_options.add_argument('--rate-limit', type=float, default=DEFAULT_REQUESTS_PER_SECOND,
+                                  help='The maximum number of backfill requests per second to each host.')
+    backfill_options.add_argument('--fixture', type=str,
+                                  help='A CSV file (date, symbol, close) to backfill from instead of Yahoo Finance.')
+
     # `add` command: Requires three positional arguments.
-    parser_add = subparsers.add_parser('add', help='Add a new ETF.')
+    parser_add = subparsers.add_parser('add', parents=[backfill_options], help='Add a new ETF.')
     parser_add.add_argument('symbol', type=str, help='The stock symbol of the ETF (e.g., VOO).')
     parser_add.add_argument('name', type=str, help='The full name of the ETF (e.g., "Vanguard S&P 500 ETF").')
     parser_add.add_argument('expense_ratio', type=float, help='The expense ratio as a float (e.g., 0.03).')
 
-    # `remove` command: Requires a single positional argument.
-    parser_remove = subparsers.add_parser('remove', help='Remove an ETF and its historical data.')
-    parser_remove.add_argument('symbol', type=str, help='The symbol of the ETF to remove.')
+    # `import` command: Requires the path of a CSV file.
+    parser_import = subparsers.add_parser('import', parents=[backfill_options], help='Add many ETFs from a CSV file.')
+    parser_import.add_argument('path', type=str, help='A CSV file with the columns symbol, name and expense_ratio.')
+    parser_import.add_argument('--update', action='store_true',
+                               help='Also overwrite the name and expense ratio of ETFs that already exist.')
+    parser_import.add_argument('--batch-size', type=int, default=DEFAULT_IMPORT_BATCH_SIZE,
+                               help='The number of ETFs written by each bulk upsert.')
+
+    # `remove` command: Requires one or more positional arguments.
+    parser_remove = subparsers.add_parser('remove', help='Remove ETFs and their historical data.')
+    parser_remove.add_argument('symbols', type=str, nargs='+', help='The symbols of the ETFs to remove.')
+    parser_remove.add_argument('--chunk-days', type=int, default=DEFAULT_DELETE_CHUNK_DAYS,
+                               help='The number of days of history deleted per statement.')
 
     # `update` command: Requires a symbol and optional arguments for the fields to update.
     parser_update = subparsers.add_parser('update', help='Update an existing ETF.')
@@ -164,8 +341,14 @@ if __name__ == "__main__":
     if args.command == 'list':
         list_etfs()
     elif args.command == 'add':
-        add_etf(args.symbol, args.name, args.expense_ratio)
+        if add_etf(args.symbol, args.name, args.expense_ratio) and args.backfill:
+            backfill_etfs([args.symbol.upper()], args.workers, args.rate_limit, args.fixture)
+    elif args.command == 'import':
+        added = import_etfs(args.path, args.update, max(args.batch_size, 1))
+        if args.backfill:
+            backfill_etfs(added, args.workers, args.rate_limit, args.fixture)
     elif args.command == 'remove':
-        remove_etf(args.symbol)
+        for symbol in args.symbols:
+            remove_etf(symbol, max(args.chunk_days, 1))
     elif args.command == 'update':
         update_etf(args.symbol, args.name, args.expense_ratio)
\ No newline at end of file
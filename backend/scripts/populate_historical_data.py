@@ -10,116 +10,1227 @@ intelligently scrapes only the new, missing data for each one from Yahoo Finance
 
 This caching strategy ensures the live application remains fast and reliable,
 without being dependent on slow, external APIs for historical data requests.
+
+The database is accessed through the backend's data repository, so setting
+FINORA_DATA_BACKEND=sqlite populates the local SQLite store instead.
+
+The latest cached date of every symbol is read with a single grouped query.
+Symbols that need data from the same start date are then downloaded together,
+in download groups of up to `--group-size` symbols, and their rows are
+written with bulk upserts of `--batch-size` rows.
+
+Download groups are independent of each other, so they can be processed by a
+pool of worker threads (`--workers`). A worker requests its group's tickers
+one after another, each through its own `yf.Ticker`, so the downloads of
+different groups run in parallel rather than queueing on a shared lock.
+Requests to each host (Yahoo Finance and the database) are spaced out by a
+shared rate limiter (`--rate-limit`), which counts every ticker request. A summary of the time spent in each phase is
+printed at the end of the run.
+
+The download source is pluggable: `--fixture` replaces Yahoo Finance with a
+local CSV file, so the whole pipeline can be exercised offline.
+
+Every run keeps a journal of each symbol's progress (`--journal`). Downloads
+and upserts that fail are retried with exponential backoff. If the run still
+dies or leaves symbols failed, the next run of the same day resumes from the
+journal and only processes the symbols that were not completed. At the end, a
+JSON report of what was fetched, skipped and failed is written (`--report`).
+
+Because the regular run only fetches data after each symbol's latest date, a
+hole in the middle of a history would never be repaired. `--audit-gaps` runs
+a separate mode that compares every symbol's dates against the trading
+calendar, computes the minimal set of missing date ranges, and downloads only
+those ranges.
+
+Both modes keep the weekly and monthly close aggregates (see
+`services/price_aggregates.py`) in step with the daily table: the periods
+touched by new or backfilled rows are recomputed and upserted after the
+downloads. `--rebuild-aggregates` recomputes them from the full history, e.g.
+to build the table for the first time.
+
+`backfill_symbols` runs the same pipeline on demand for a list of symbols,
+e.g. for ETFs that were just added with `manage_etfs.py --backfill`.
+
+Usage Examples:
+  python scripts/populate_historical_data.py
+  python scripts/populate_historical_data.py --workers 8 --rate-limit 4
+  python scripts/populate_historical_data.py --fixture prices.csv --batch-size 1000
+  python scripts/populate_historical_data.py --max-attempts 6 --report /tmp/scrape_report.json
+  python scripts/populate_historical_data.py --audit-gaps
+  python scripts/populate_historical_data.py --rebuild-aggregates
 """
 
 import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import yfinance as yf
+from yfinance.exceptions import YFTickerMissingError
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from supabase import create_client, Client
+
+# Make the backend's `services` package importable when this file is run
+# directly as a script (e.g., `python scripts/populate_historical_data.py`).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.repository import get_repository
+from services.price_aggregates import aggregation_start_date, compute_aggregate_rows
+from services.price_store import write_price_store
+from services.metrics_snapshot import publish_metrics_snapshot
 
 # --- Configuration ---
-# Load environment variables from the .env file and initialize the Supabase client.
+# Load environment variables (database backend and credentials) from the .env file.
 load_dotenv()
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError("Supabase credentials not found in .env file")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 # Set a historical start date for the very first scrape of a new ETF.
 # This ensures a consistent baseline of data for all tracked securities.
 INITIAL_SCRAPE_START_DATE = "2020-01-01"
 
-def run_scraper():
+# The default number of download groups processed at the same time. A single
+# worker processes them strictly one after another.
+DEFAULT_WORKERS = 4
+
+# The default maximum number of tickers downloaded together by one worker.
+DEFAULT_GROUP_SIZE = 25
+
+# The default number of rows written by one bulk upsert.
+DEFAULT_BATCH_SIZE = 500
+
+# The default maximum number of requests per second sent to each host.
+DEFAULT_REQUESTS_PER_SECOND = 2.0
+
+# The default number of attempts for a download or an upsert, and the delay
+# before the first retry. Each further retry waits twice as long.
+DEFAULT_MAX_ATTEMPTS = 4
+RETRY_BASE_DELAY_SECONDS = 1.0
+
+# Default locations of the run journal, the final report and the journal of
+# on-demand backfills, inside the backend's data folder.
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+DEFAULT_JOURNAL_PATH = os.path.join(DATA_DIR, "scraper_journal.json")
+DEFAULT_REPORT_PATH = os.path.join(DATA_DIR, "scraper_report.json")
+DEFAULT_BACKFILL_JOURNAL_PATH = os.path.join(DATA_DIR, "backfill_journal.json")
+
+# Errors caused by the code or the data rather than by the network. Retrying
+# them would only fail again, so they are raised immediately. ValueError is not
+# one of them: a throttled Yahoo Finance request returns an HTML page, whose
+# JSONDecodeError is a ValueError and succeeds when retried.
+PERMANENT_ERRORS = (TypeError, KeyError, AttributeError)
+
+# The hosts the rate limiter keeps track of.
+YAHOO_HOST = "yahoo"
+DATABASE_HOST = "database"
+
+class HostRateLimiter:
+    """
+    Spaces out requests so that no host receives more than a fixed rate.
+
+    Every host has its own schedule, so waiting on Yahoo Finance never delays
+    a database query. The limiter is shared by all worker threads.
+    """
+
+    def __init__(self, requests_per_second: float):
+        """
+        Args:
+            requests_per_second (float): The maximum rate per host. Zero or a
+                                         negative value disables the limit.
+        """
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_slot = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def wait(self, host: str):
+        """Blocks until the next request to `host` may be sent."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot[host])
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+class PhaseTimer:
+    """Accumulates the time spent in each phase of the run, across threads."""
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, phase: str, seconds: float):
+        """Adds one timed occurrence of a phase."""
+        with self._lock:
+            self.seconds[phase] += seconds
+            self.counts[phase] += 1
+
+    def phase(self, phase: str):
+        """Returns a context manager that times the enclosed block as `phase`."""
+        return _TimedPhase(self, phase)
+
+    def print_summary(self, wall_seconds: float):
+        """
+        Prints the time spent per phase.
+
+        Phases run concurrently, so their total can exceed the wall-clock time.
+        """
+        print("\n--- Time spent per phase ---")
+        for phase, seconds in self.seconds.items():
+            print(f"{phase:<14} {seconds:9.2f}s over {self.counts[phase]} call(s)")
+        print(f"{'wall clock':<14} {wall_seconds:9.2f}s")
+
+class RunJournal:
+    """
+    A persistent record of each symbol's progress during one day's run.
+
+    Every symbol ends up with one of these statuses:
+    - "done": its new rows were all written.
+    - "no_data": the download returned nothing new for it.
+    - "failed": a download or upsert still failed after every retry.
+
+    The journal is saved to disk (atomically) after every update. A run that
+    starts on the same day as an unfinished journal resumes it: symbols that
+    are "done" or "no_data" are not processed again. Failed symbols are.
+    """
+
+    def __init__(self, path: str, run_date, fresh: bool = False):
+        """
+        Args:
+            path (str): The journal file.
+            run_date (date): The day of the run. A journal from another day is
+                             never resumed, since there is new data to fetch.
+            fresh (bool, optional): If True, any existing journal is ignored.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        previous = None if fresh else self._load(path)
+        self.resumed = bool(
+            previous
+            and previous.get("run_date") == str(run_date)
+            and not previous.get("finished_at")
+        )
+        if self.resumed:
+            self.state = previous
+            self.state["attempts"] = previous.get("attempts", 1) + 1
+        else:
+            self.state = {
+                "run_date": str(run_date),
+                "started_at": datetime.now().isoformat(timespec="seconds"),
+                "finished_at": None,
+                "attempts": 1,
+                "symbols": {},
+            }
+        self._save()
+
+    def completed_symbols(self) -> set:
+        """Returns the symbols that an earlier attempt of this run completed."""
+        return {
+            symbol for symbol, entry in self.state["symbols"].items()
+            if entry["status"] in ("done", "no_data")
+        }
+
+    def mark(self, symbol: str, status: str, **details):
+        """Records a symbol's outcome (e.g., rows=..., error=...) and saves the journal."""
+        with self._lock:
+            self.state["symbols"][symbol] = {"status": status, **details}
+            self._save()
+
+    def finish(self):
+        """Marks the run as finished, so the next run starts a new journal."""
+        with self._lock:
+            self.state["finished_at"] = datetime.now().isoformat(timespec="seconds")
+            self._save()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temporary_path = f"{self.path}.tmp-{os.getpid()}"
+        with open(temporary_path, "w") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(temporary_path, self.path)
+
+    @staticmethod
+    def _load(path: str):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+def call_with_retries(function, max_attempts: int, description: str, log: list):
+    """
+    Calls a function, retrying transient failures with exponential backoff.
+
+    The n-th retry waits `RETRY_BASE_DELAY_SECONDS * 2**(n-1)` seconds, plus a
+    random jitter of up to 50%, so that concurrent workers do not retry in
+    lockstep against a rate-limited host.
+
+    Args:
+        function (callable): The function to call, without arguments.
+        max_attempts (int): The maximum number of calls.
+        description (str): What the call does, for the log messages.
+        log (list): The progress messages, to which retries are appended.
+
+    Returns:
+        tuple: (the function's result, the number of attempts made).
+
+    Raises:
+        Exception: The last error, once every attempt has failed, or a
+                   `PERMANENT_ERRORS` error immediately.
+    """
+    for attempt in range(1, max_attempts + 1):
+        try:
+            return function(), attempt
+        except PERMANENT_ERRORS:
+            raise
+        except Exception as e:
+            if attempt == max_attempts:
+                raise
+            delay = RETRY_BASE_DELAY_SECONDS * 2 ** (attempt - 1) * (1 + random.random() / 2)
+            log.append(f"{description} failed (attempt {attempt}/{max_attempts}): {e}. Retrying in {delay:.1f}s.")
+            time.sleep(delay)
+
+class DownloadError(Exception):
+    """
+    Raised when some tickers of a download failed. Only those are retried.
+
+    The closes of the tickers that did succeed travel with the error, so they
+    are kept instead of being downloaded again.
+    """
+
+    def __init__(self, errors: dict, closes: pd.DataFrame = None):
+        """
+        Args:
+            errors (dict): The error message of each failed ticker.
+            closes (pd.DataFrame, optional): The closes of the other tickers,
+                                             in the downloader's usual format.
+        """
+        self.errors = errors
+        self.closes = closes if closes is not None else pd.DataFrame()
+        super().__init__("; ".join(f"{symbol}: {error}" for symbol, error in errors.items()))
+
+class YahooDownloader:
+    """
+    Downloads adjusted daily closes from Yahoo Finance.
+
+    `yf.download` keeps its results in module-level state, so concurrent calls
+    from several workers would overwrite each other's data. Each ticker is
+    instead fetched through its own `yf.Ticker`, which shares nothing with the
+    other workers, so groups really are downloaded in parallel. Within a
+    group, the tickers are requested one after another, and every request
+    waits for its slot with the Yahoo Finance rate limiter.
+
+    Yahoo Finance reports failures per ticker: without `raise_errors`, a failed
+    request is only logged and the ticker comes back empty, which would look
+    exactly like a ticker without new data. Errors are therefore raised. A
+    ticker without prices in the range, or without a time zone (i.e., a
+    delisted symbol), counts as having no data; any other failure is reported
+    with a `DownloadError`.
+    """
+
+    def __init__(self, rate_limiter: HostRateLimiter = None):
+        """
+        Args:
+            rate_limiter (HostRateLimiter, optional): The limiter shared by all
+                                                      workers. Without one,
+                                                      requests are not spaced out.
+        """
+        self.rate_limiter = rate_limiter
+
+    def __call__(self, symbols: list, start_date, end_date) -> pd.DataFrame:
+        """
+        Downloads the closes of several tickers, one request per ticker.
+
+        Args:
+            symbols (list): The tickers to download.
+            start_date (date): The first date to include.
+            end_date (date): The day after the last date to include.
+
+        Returns:
+            pd.DataFrame: A date x symbol frame of closing prices (NaN where a
+                          symbol has no data). Symbols without any data may
+                          be missing from the columns.
+
+        Raises:
+            DownloadError: If any ticker failed for another reason than having
+                           no data (e.g., a network error or a throttled
+                           request). It carries the closes of the other tickers.
+        """
+        closes = {}
+        errors = {}
+        for symbol in symbols:
+            if self.rate_limiter is not None:
+                self.rate_limiter.wait(YAHOO_HOST)
+            try:
+                # auto_adjust=True is important as it adjusts prices for stock splits
+                # and dividends, ensuring historical accuracy.
+                history = yf.Ticker(symbol).history(start=start_date, end=end_date, auto_adjust=True,
+                                                    raise_errors=True)
+            except YFTickerMissingError:
+                continue
+            except Exception as e:
+                errors[symbol] = f"{type(e).__name__}: {e}"
+                continue
+            if history.empty:
+                continue
+            # Daily closes are stored by calendar date, without the exchange's time zone.
+            closes[symbol] = history["Close"].tz_localize(None)
+        closes = pd.DataFrame(closes).sort_index() if closes else pd.DataFrame()
+        if errors:
+            raise DownloadError(errors, closes)
+        return closes
+
+class FixtureDownloader:
+    """
+    Serves closes from a local CSV file instead of Yahoo Finance.
+
+    The file has one row per price, with 'date', 'symbol' and 'close' columns.
+    It is used to run the scraper offline, e.g. in tests and benchmarks.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): The CSV file to read.
+        """
+        frame = pd.read_csv(path, parse_dates=["date"])
+        self.closes = frame.pivot(index="date", columns="symbol", values="close").sort_index()
+
+    def __call__(self, symbols: list, start_date, end_date) -> pd.DataFrame:
+        """Returns the fixture closes of `symbols` in [start_date, end_date), like `YahooDownloader`."""
+        window = self.closes[(self.closes.index >= pd.Timestamp(start_date)) & (self.closes.index < pd.Timestamp(end_date))]
+        return window[[symbol for symbol in symbols if symbol in window.columns]].dropna(how="all")
+
+class _TimedPhase:
+    """The context manager returned by `PhaseTimer.phase`."""
+
+    def __init__(self, timer: PhaseTimer, phase: str):
+        self.timer, self.phase = timer, phase
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.timer.record(self.phase, time.perf_counter() - self.start)
+
+def run_scraper(workers: int = DEFAULT_WORKERS, requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+                group_size: int = DEFAULT_GROUP_SIZE, batch_size: int = DEFAULT_BATCH_SIZE, downloader=None,
+                max_attempts: int = DEFAULT_MAX_ATTEMPTS, journal_path: str = DEFAULT_JOURNAL_PATH,
+                report_path: str = DEFAULT_REPORT_PATH, fresh: bool = False) -> dict:
     """
     Executes the main data scraping and caching logic.
 
-    This function performs a series of steps for each ETF tracked in the database:
-    1. Fetches the master list of ETF symbols.
-    2. For each symbol, determines the last date for which data is cached.
-    3. Calculates the required date range for fetching new data.
-    4. Downloads the missing historical data from Yahoo Finance.
-    5. Formats the data and upserts it into the 'etf_historical_data' table.
+    This function performs the following steps:
+    1. Fetches the master list of ETF symbols and opens (or resumes) the run journal.
+    2. Determines the last cached date of every symbol in one grouped query.
+    3. Groups the symbols that need data from the same start date.
+    4. Downloads each group's missing data (see `YahooDownloader`).
+    5. Formats the data and upserts it into the 'etf_historical_data' table
+       in batches.
+    6. Recomputes the weekly and monthly aggregates of the periods that
+       received new rows.
+    7. Publishes a memory-mapped columnar snapshot of the whole price table.
+    8. Computes every ETF's metrics once and publishes them as a snapshot.
+    9. Writes the run report.
+
+    Steps 4 and 5 are run for up to `workers` download groups at the same time,
+    and are retried with exponential backoff when they fail.
 
     The process is idempotent, meaning it can be run multiple times without
     creating duplicate entries or causing errors.
+
+    Args:
+        workers (int, optional): The number of download groups processed concurrently.
+        requests_per_second (float, optional): The maximum request rate per host.
+        group_size (int, optional): The maximum number of tickers per download.
+        batch_size (int, optional): The number of rows per bulk upsert.
+        downloader (callable, optional): The download source, called as
+                                         `downloader(symbols, start_date, end_date)`.
+                                         Defaults to a `YahooDownloader` that
+                                         rate-limits each ticker request.
+        max_attempts (int, optional): The number of attempts per download or upsert.
+        journal_path (str, optional): The run journal file.
+        report_path (str, optional): Where to write the JSON report.
+        fresh (bool, optional): If True, an unfinished journal is not resumed.
+
+    Returns:
+        dict: The run report (see `build_run_report`), or None if there are no ETFs.
     """
+    run_start = time.perf_counter()
+    timer = PhaseTimer()
+    rate_limiter = HostRateLimiter(requests_per_second)
+    downloader = downloader or YahooDownloader(rate_limiter)
+    today = datetime.now().date()
+
     # 1. Get the list of symbols to track directly from our 'etfs' table
+    repository = get_repository()
     print("Fetching list of ETFs to track from the database...")
-    etfs_response = supabase.table('etfs').select('symbol').execute()
-    if not etfs_response.data:
+    etfs = repository.get_etf_metadata()
+    if not etfs:
         print("No ETFs found in the database. Please populate the 'etfs' table first.")
-        return
+        return None
     
-    symbols_to_track = [item['symbol'] for item in etfs_response.data]
+    symbols_to_track = [item['symbol'] for item in etfs]
     print(f"Found {len(symbols_to_track)} ETFs to process.")
 
-    for symbol in symbols_to_track:
-        print(f"--- Processing: {symbol} ---")
-        
-        # 2. Find the most recent date we have for this symbol in our database.
-        # This makes the script efficient and idempotent. By finding the last entry,
-        # we ensure that we only fetch data that is genuinely new.
-        response = supabase.table('etf_historical_data') \
-            .select('date') \
-            .eq('symbol', symbol) \
-            .order('date', desc=True) \
-            .limit(1) \
-            .execute()
-
-        latest_date_in_db = None
-        if response.data:
+    # Symbols completed by an earlier, interrupted attempt of today's run are not processed again.
+    journal = RunJournal(journal_path, today, fresh=fresh)
+    already_completed = journal.completed_symbols() if journal.resumed else set()
+    if journal.resumed:
+        print(f"Resuming today's run (attempt {journal.state['attempts']}): "
+              f"{len(already_completed)} ETFs were already completed.")
+    pending_symbols = [symbol for symbol in symbols_to_track if symbol not in already_completed]
+
+    # 2. Find the most recent date we have for every symbol, in a single query.
+    # This makes the script efficient and idempotent: by starting after the last
+    # entry, we only fetch data that is genuinely new.
+    rate_limiter.wait(DATABASE_HOST)
+    with timer.phase("latest dates"):
+        latest_dates = repository.get_latest_dates(pending_symbols)
+
+    # 3. Group the symbols by the date their scrape has to start from.
+    groups = plan_download_groups(pending_symbols, latest_dates, today, group_size)
+    scheduled = {symbol for _, symbols in groups for symbol in symbols}
+    up_to_date = [symbol for symbol in pending_symbols if symbol not in scheduled]
+    print(f"{len(up_to_date)} ETFs are already up to date. {len(groups)} download group(s) to process with {workers} worker(s).")
+
+    # 4-5. Download and store every group.
+    scrape_groups(repository, downloader, groups, today, rate_limiter, timer, batch_size,
+                  journal, max_attempts, workers)
+
+    # 6. Bring the aggregates of every symbol that received rows up to date.
+    # Symbols completed by an earlier attempt are included, in case that
+    # attempt died before reaching this step.
+    _, aggregate_errors = refresh_aggregates(repository, changed_start_dates(journal), rate_limiter, timer,
+                                             group_size, batch_size, max_attempts)
+
+    # 7-8. Republish the price store and metrics snapshots from the new data.
+    publish_snapshots(repository, symbols_to_track, timer)
+
+    timer.print_summary(time.perf_counter() - run_start)
+
+    # 9. Only a run without failures is finished. Otherwise the next run of the
+    # day resumes the journal and retries just the failed symbols (and the
+    # aggregates of every symbol completed so far).
+    report = build_run_report(journal, already_completed, up_to_date, timer)
+    report["failed"] += [{"symbol": symbol, "error": error} for symbol, error in sorted(aggregate_errors.items())]
+    if not report["failed"]:
+        journal.finish()
+        report["finished_at"] = journal.state["finished_at"]
+    os.makedirs(os.path.dirname(os.path.abspath(report_path)), exist_ok=True)
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nFetched {len(report['fetched'])}, skipped {len(report['skipped'])} and failed "
+          f"{len(report['failed'])} ETF(s). Report written to {report_path}.")
+    print("\n--- Scraping process complete. ---")
+    return report
+
+def backfill_symbols(symbols: list, workers: int = DEFAULT_WORKERS,
+                     requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+                     group_size: int = DEFAULT_GROUP_SIZE, batch_size: int = DEFAULT_BATCH_SIZE,
+                     downloader=None, max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                     journal_path: str = DEFAULT_BACKFILL_JOURNAL_PATH) -> dict:
+    """
+    Scrapes the missing history of specific symbols right away.
+
+    This is the daily run restricted to a list of symbols (e.g., ETFs that were
+    just added), so they are usable without waiting for the next scheduled run.
+    It keeps its own journal, which is never resumed, so the daily run's
+    journal is not affected.
+
+    Args:
+        symbols (list): The symbols to backfill. They must exist in the 'etfs' table.
+        The other arguments are the same as for `run_scraper`.
+
+    Returns:
+        dict: 'fetched' (symbol and rows), 'skipped' (symbol and reason) and
+              'failed' (symbol and error), as in the run report.
+    """
+    run_start = time.perf_counter()
+    timer = PhaseTimer()
+    rate_limiter = HostRateLimiter(requests_per_second)
+    downloader = downloader or YahooDownloader(rate_limiter)
+    today = datetime.now().date()
+    repository = get_repository()
+    journal = RunJournal(journal_path, today, fresh=True)
+
+    with timer.phase("latest dates"):
+        latest_dates = repository.get_latest_dates(symbols)
+    groups = plan_download_groups(symbols, latest_dates, today, group_size)
+    scheduled = {symbol for _, members in groups for symbol in members}
+    up_to_date = [symbol for symbol in symbols if symbol not in scheduled]
+    print(f"\nBackfilling {len(scheduled)} ETF(s) in {len(groups)} download group(s) with {workers} worker(s)...")
+
+    scrape_groups(repository, downloader, groups, today, rate_limiter, timer, batch_size,
+                  journal, max_attempts, workers)
+    _, aggregate_errors = refresh_aggregates(repository, changed_start_dates(journal), rate_limiter, timer,
+                                             group_size, batch_size, max_attempts)
+    if any(entry.get("rows") for entry in journal.state["symbols"].values()):
+        publish_snapshots(repository, [item['symbol'] for item in repository.get_etf_metadata()], timer)
+    timer.print_summary(time.perf_counter() - run_start)
+
+    report = build_run_report(journal, set(), up_to_date, timer)
+    report["failed"] += [{"symbol": symbol, "error": error} for symbol, error in sorted(aggregate_errors.items())]
+    journal.finish()
+    print(f"\nBackfilled {len(report['fetched'])}, skipped {len(report['skipped'])} and failed "
+          f"{len(report['failed'])} ETF(s).")
+    return report
+
+def scrape_groups(repository, downloader, groups: list, today, rate_limiter: HostRateLimiter, timer: PhaseTimer,
+                  batch_size: int, journal: RunJournal, max_attempts: int, workers: int):
+    """
+    Downloads and stores every download group on a pool of worker threads.
+
+    Each group's work is independent and idempotent, so groups can safely be
+    processed in any order and in parallel. Progress messages are printed
+    group by group as they complete.
+
+    Args:
+        groups (list): (start_date, symbols) tuples, see `plan_download_groups`.
+        today (date): The day after the last date to download.
+        workers (int): The number of groups processed at the same time.
+        The other arguments are the same as for `scrape_group`.
+    """
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        futures = {
+            executor.submit(scrape_group, repository, downloader, symbols, start_date, today,
+                            rate_limiter, timer, batch_size, journal, max_attempts): (start_date, symbols)
+            for start_date, symbols in groups
+        }
+        for future in as_completed(futures):
+            start_date, symbols = futures[future]
+            try:
+                for line in future.result():
+                    print(line)
+            except Exception as e:
+                print(f"An unexpected error occurred for {', '.join(symbols)} (from {start_date}): {e}")
+                for symbol in symbols:
+                    journal.mark(symbol, "failed", error=str(e))
+
+def changed_start_dates(journal: RunJournal) -> dict:
+    """Returns the first scraped date of every symbol the journal records new rows for."""
+    return {
+        symbol: entry["start_date"]
+        for symbol, entry in journal.state["symbols"].items()
+        if entry["status"] == "done" and entry.get("rows") and entry.get("start_date")
+    }
+
+def publish_snapshots(repository, symbols: list, timer: PhaseTimer):
+    """
+    Publishes the data derived from the price table after it has changed.
+
+    Args:
+        repository (MarketDataRepository): The data repository.
+        symbols (list): Every tracked symbol.
+        timer (PhaseTimer): The run's phase timer.
+    """
+    # Publish a fresh memory-mapped snapshot of the full price table, which
+    # the web workers map and share instead of each loading its own copy.
+    print("\nWriting columnar price store snapshot...")
+    try:
+        with timer.phase("price store"):
+            version = write_price_store(repository.get_price_rows(symbols))
+        print(f"Published price store snapshot {version}.")
+    except Exception as e:
+        print(f"An error occurred while writing the price store: {e}")
+
+    # Compute every ETF's market metrics once and publish them as a snapshot,
+    # so the API does not recompute them on every request.
+    print("Publishing metrics snapshot...")
+    try:
+        with timer.phase("metrics"):
+            snapshot = publish_metrics_snapshot()
+        print(f"Published metrics snapshot {snapshot['version']} for {len(snapshot['etfs'])} ETFs.")
+    except Exception as e:
+        print(f"An error occurred while publishing the metrics snapshot: {e}")
+
+def build_run_report(journal: RunJournal, already_completed: set, up_to_date: list, timer: PhaseTimer) -> dict:
+    """
+    Summarizes a run in a machine-readable form.
+
+    Args:
+        journal (RunJournal): The run's journal.
+        already_completed (set): Symbols completed by an earlier attempt of the run.
+        up_to_date (list): Symbols that needed no new data.
+        timer (PhaseTimer): The run's phase timer.
+
+    Returns:
+        dict: 'run_date', 'started_at', 'finished_at', 'attempt', 'fetched'
+              (symbol and rows), 'skipped' (symbol and reason), 'failed'
+              (symbol and error) and 'phase_seconds'.
+    """
+    entries = journal.state["symbols"]
+    fetched = [
+        {"symbol": symbol, "rows": entry.get("rows", 0)}
+        for symbol, entry in entries.items()
+        if entry["status"] == "done" and symbol not in already_completed
+    ]
+    skipped = (
+        [{"symbol": symbol, "reason": "completed_earlier"} for symbol in sorted(already_completed)]
+        + [{"symbol": symbol, "reason": "up_to_date"} for symbol in up_to_date]
+        + [{"symbol": symbol, "reason": "no_new_data"} for symbol, entry in entries.items()
+           if entry["status"] == "no_data" and symbol not in already_completed]
+    )
+    failed = [
+        {"symbol": symbol, "error": entry.get("error")}
+        for symbol, entry in entries.items() if entry["status"] == "failed"
+    ]
+    return {
+        "run_date": journal.state["run_date"],
+        "started_at": journal.state["started_at"],
+        "finished_at": None,
+        "attempt": journal.state["attempts"],
+        "fetched": fetched,
+        "skipped": skipped,
+        "failed": failed,
+        "phase_seconds": {phase: round(seconds, 3) for phase, seconds in timer.seconds.items()},
+    }
+
+def plan_download_groups(symbols: list, latest_dates: dict, today, group_size: int) -> list:
+    """
+    Groups the symbols that need new data by the date their scrape starts from.
+
+    Args:
+        symbols (list): Every tracked symbol.
+        latest_dates (dict): The latest cached date ('YYYY-MM-DD') per symbol.
+                             Symbols without data are absent.
+        today (date): The day the scrape runs (excluded from the download).
+        group_size (int): The maximum number of symbols per group.
+
+    Returns:
+        list: (start_date, symbols) tuples, one per download. Symbols that are
+              already up to date are left out.
+    """
+    by_start = defaultdict(list)
+    for symbol in symbols:
+        latest_date = latest_dates.get(symbol)
+        if latest_date:
             # If data exists, the next scrape should start the day after the latest record.
-            latest_date_in_db = datetime.strptime(response.data[0]['date'], '%Y-%m-%d').date()
-            print(f"Latest data in database: {latest_date_in_db}")
-            start_date = latest_date_in_db + timedelta(days=1)
+            start_date = datetime.strptime(str(latest_date)[:10], '%Y-%m-%d').date() + timedelta(days=1)
         else:
             # If no data exists for this symbol, start from the initial fixed date.
-            print("No existing data found. Starting initial scrape from 2020.")
             start_date = datetime.strptime(INITIAL_SCRAPE_START_DATE, '%Y-%m-%d').date()
+        if start_date < today:
+            by_start[start_date].append(symbol)
 
-        # 3. Scrape new data from Yahoo Finance
-        today = datetime.now().date()
-        if start_date >= today:
-            print(f"Data for {symbol} is already up to date. Skipping scrape.")
-            continue
+    groups = []
+    for start_date in sorted(by_start):
+        members = by_start[start_date]
+        for i in range(0, len(members), max(group_size, 1)):
+            groups.append((start_date, members[i:i + group_size]))
+    return groups
+
+def download_group(downloader, symbols: list, start_date, end_date, timer: PhaseTimer,
+                   max_attempts: int, log: list) -> tuple:
+    """
+    Downloads the closes of a group of symbols, retrying only the failed ones.
 
-        print(f"Scraping new data for {symbol} from {start_date} to {today}...")
-        # yf.download fetches the data. auto_adjust=True is important as it
-        # adjusts prices for stock splits and dividends, ensuring historical accuracy.
-        df = yf.download(symbol, start=start_date, end=today, progress=False, auto_adjust=True)
+    When a download raises a `DownloadError`, the closes it carries are kept
+    and the next attempt only requests the tickers that failed. A ticker that
+    keeps failing therefore does not cost the rest of its group their data.
 
-        if df.empty:
-            print(f"No new data found from Yahoo Finance for {symbol}.")
+    Rate limiting is left to the downloader, which knows how many requests a
+    download takes (see `YahooDownloader`).
+
+    Args:
+        downloader (callable): The download source.
+        symbols (list): The symbols of the group.
+        start_date (date): The first date to download.
+        end_date (date): The day after the last date to download.
+        timer (PhaseTimer): The timer shared by all workers.
+        max_attempts (int): The number of attempts per symbol.
+        log (list): The progress messages, to which retries are appended.
+
+    Returns:
+        tuple: (a date x symbol frame of the closes that were downloaded, the
+                error message of every symbol that still failed).
+    """
+    frames = []
+    remaining = list(symbols)
+
+    def download():
+        with timer.phase("download"):
+            try:
+                frames.append(downloader(remaining, start_date, end_date))
+            except DownloadError as e:
+                frames.append(e.closes)
+                remaining[:] = [symbol for symbol in remaining if symbol in e.errors]
+                raise
+
+    errors = {}
+    try:
+        call_with_retries(download, max_attempts, "Download", log)
+    except DownloadError as e:
+        log.append(f"Download of {', '.join(e.errors)} failed after {max_attempts} attempt(s): {e}")
+        errors = {symbol: f"download: {error}" for symbol, error in e.errors.items()}
+    except Exception as e:
+        log.append(f"Download failed after {max_attempts} attempt(s): {e}")
+        errors = {symbol: f"download: {e}" for symbol in remaining}
+
+    frames = [frame for frame in frames if not frame.empty]
+    closes = pd.concat(frames, axis=1).sort_index() if frames else pd.DataFrame()
+    return closes, errors
+
+def scrape_group(repository, downloader, symbols: list, start_date, end_date,
+                 rate_limiter: HostRateLimiter, timer: PhaseTimer, batch_size: int,
+                 journal: RunJournal, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> list:
+    """
+    Downloads and stores the new data of symbols that share a start date.
+
+    This runs on a worker thread. Its progress messages are returned instead of
+    printed, so that the output of concurrent groups is not interleaved. The
+    outcome of every symbol is recorded in the journal.
+
+    Args:
+        repository (MarketDataRepository): The data repository.
+        downloader (callable): The download source.
+        symbols (list): The symbols of the group.
+        start_date (date): The first date to download.
+        end_date (date): The day after the last date to download.
+        rate_limiter (HostRateLimiter): The limiter shared by all workers.
+        timer (PhaseTimer): The timer shared by all workers.
+        batch_size (int): The number of rows per bulk upsert.
+        journal (RunJournal): The run journal.
+        max_attempts (int, optional): The number of attempts per download or upsert.
+
+    Returns:
+        list: The progress messages for this group.
+    """
+    log = [f"--- Scraping {len(symbols)} ETF(s) from {start_date} to {end_date}: {', '.join(symbols)} ---"]
+
+    closes, download_errors = download_group(downloader, symbols, start_date, end_date,
+                                             timer, max_attempts, log)
+    for symbol, error in download_errors.items():
+        journal.mark(symbol, "failed", error=error)
+
+    present = [symbol for symbol in symbols if symbol in closes.columns and closes[symbol].notna().any()]
+    for symbol in symbols:
+        if symbol not in present and symbol not in download_errors:
+            log.append(f"No new data found from Yahoo Finance for {symbol}.")
+            journal.mark(symbol, "no_data", rows=0)
+    if not present:
+        return log
+    log.append(f"Found {int(closes[present].notna().to_numpy().sum())} new records to insert.")
+
+    # Insert the records in bulk. The batches are converted from the frame one
+    # at a time, so only one batch of row dictionaries exists at any moment.
+    # Upserts make every batch idempotent: while our date logic should prevent
+    # any duplicate primary keys (symbol, date), a re-run after a partial
+    # failure simply overwrites the same rows.
+    rows_written = Counter()
+    errors = {}
+    batches = frame_to_records(closes, present, batch_size)
+    while True:
+        with timer.phase("transform"):
+            batch = next(batches, None)
+        if batch is None:
+            break
+        # Once a batch of a symbol has failed, its later rows are not written:
+        # the symbol's latest date must not move past the missing rows, so that
+        # the next run fetches them again.
+        batch = [row for row in batch if row["symbol"] not in errors]
+        if not batch:
             continue
 
-        # 4. Prepare and insert the new records into Supabase.
-        # The yfinance library returns a pandas DataFrame, which we must convert
-        # into a list of dictionaries that matches our Supabase table schema.
-        records_to_insert = []
-        for date, row in df.iterrows():
-            record = {
-                "symbol": symbol,
-                "date": date.strftime('%Y-%m-%d'),
-                "close_price": round(float(row['Close']), 2)
-            }
-            records_to_insert.append(record)
+        def upsert():
+            rate_limiter.wait(DATABASE_HOST)
+            with timer.phase("upsert"):
+                repository.upsert_prices(batch)
+
+        try:
+            call_with_retries(upsert, max_attempts, f"Upsert of {len(batch)} rows", log)
+            rows_written.update(row["symbol"] for row in batch)
+        except Exception as e:
+            log.append(f"An error occurred during insert of a batch of {len(batch)} rows: {e}")
+            for symbol in {row["symbol"] for row in batch}:
+                errors[symbol] = f"upsert: {e}"
+
+    for symbol in present:
+        if symbol in errors:
+            journal.mark(symbol, "failed", rows=rows_written[symbol], error=errors[symbol])
+        else:
+            journal.mark(symbol, "done", rows=rows_written[symbol], start_date=str(start_date))
+    log.append(f"Successfully inserted/updated {sum(rows_written.values())} records.")
+    return log
+
+def find_price_gaps(rows: list) -> list:
+    """
+    Finds the interior gaps of every symbol's price history.
+
+    The trading calendar is taken to be the union of the dates of every symbol,
+    i.e. every day on which at least one tracked ETF has a close. Within the
+    span from a symbol's first to its last date, each maximal run of calendar
+    days without a close is one gap. Days before a symbol's first close (e.g.,
+    before it was listed) are not gaps.
+
+    The search is vectorized over a (symbols x calendar days) presence matrix:
+    gap boundaries are where the "missing" flag changes along each row.
+
+    Args:
+        rows (list): Price rows with 'symbol', 'date' and 'close_price'.
+
+    Returns:
+        list: (symbol, first_missing_date, last_missing_date, missing_days)
+              tuples, with the dates as `datetime.date`.
+    """
+    if not rows:
+        return []
+    frame = pd.DataFrame(rows, columns=['symbol', 'date', 'close_price'])
+    frame['date'] = pd.to_datetime(frame['date'])
+    present_frame = frame.assign(present=True).pivot_table(
+        index='symbol', columns='date', values='present', aggfunc='any', fill_value=False
+    ).sort_index(axis=1)
+    present = present_frame.to_numpy(dtype=bool)
+    calendar = present_frame.columns
+    day_count = len(calendar)
+
+    # Restrict the search to each symbol's own first..last date.
+    first = np.argmax(present, axis=1)
+    last = day_count - 1 - np.argmax(present[:, ::-1], axis=1)
+    days = np.arange(day_count)
+    missing = ~present & (days >= first[:, np.newaxis]) & (days <= last[:, np.newaxis])
 
-        if records_to_insert:
-            print(f"Found {len(records_to_insert)} new records to insert.")
+    # A run of missing days starts where the padded flag goes 0 -> 1 and ends
+    # (exclusively) where it goes 1 -> 0. Both scans are in row-major order, so
+    # the n-th start and the n-th end belong to the same gap.
+    edges = np.diff(np.pad(missing.astype(np.int8), ((0, 0), (1, 1))), axis=1)
+    starts = np.argwhere(edges == 1)
+    ends = np.argwhere(edges == -1)
+
+    symbols = present_frame.index
+    return [
+        (symbols[row], calendar[start].date(), calendar[end - 1].date(), int(end - start))
+        for (row, start), (_, end) in zip(starts, ends)
+    ]
+
+def run_gap_audit(workers: int = DEFAULT_WORKERS, requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+                  group_size: int = DEFAULT_GROUP_SIZE, batch_size: int = DEFAULT_BATCH_SIZE, downloader=None,
+                  max_attempts: int = DEFAULT_MAX_ATTEMPTS, report_path: str = DEFAULT_REPORT_PATH) -> dict:
+    """
+    Finds the interior gaps of every price history and backfills only those.
+
+    This function performs the following steps:
+    1. Loads the full price table and finds every gap (see `find_price_gaps`).
+    2. Groups the symbols whose gaps cover the same date range.
+    3. Downloads each group's range and upserts the returned rows in batches.
+    4. Recomputes the aggregates of the backfilled periods and republishes the
+       price store and metrics snapshots, if anything changed. The latest date
+       does not move, but the new price store version changes the data
+       revision, so the servers drop their cached prices and metrics.
+    5. Writes a JSON report of the gaps found, filled and left open.
+
+    Gaps that the download source has no data for (e.g., a day on which one
+    ETF genuinely did not trade) are reported as unfilled and left alone.
+
+    Args:
+        See `run_scraper`.
+
+    Returns:
+        dict: The audit report.
+    """
+    run_start = time.perf_counter()
+    timer = PhaseTimer()
+    rate_limiter = HostRateLimiter(requests_per_second)
+    downloader = downloader or YahooDownloader(rate_limiter)
+    repository = get_repository()
+
+    # 1. Find every gap in one pass over the whole table.
+    symbols_to_track = [item['symbol'] for item in repository.get_etf_metadata()]
+    print(f"Auditing the price history of {len(symbols_to_track)} ETFs for gaps...")
+    with timer.phase("load"):
+        rows = repository.get_price_rows(symbols_to_track)
+    with timer.phase("audit"):
+        gaps = find_price_gaps(rows)
+    print(f"Found {len(gaps)} gap(s) covering {sum(gap[3] for gap in gaps)} missing trading day(s).")
+
+    # 2. Symbols missing exactly the same range share a download group.
+    by_range = defaultdict(list)
+    for symbol, first_missing, last_missing, _ in gaps:
+        by_range[(first_missing, last_missing)].append(symbol)
+    groups = [
+        (first_missing, last_missing, members[i:i + group_size])
+        for (first_missing, last_missing), members in sorted(by_range.items())
+        for i in range(0, len(members), max(group_size, 1))
+    ]
+
+    # 3. Download and store each range.
+    filled = Counter()
+    failed = {}
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        futures = {
+            executor.submit(fill_gap_group, repository, downloader, symbols, first_missing, last_missing,
+                            rate_limiter, timer, batch_size, max_attempts): symbols
+            for first_missing, last_missing, symbols in groups
+        }
+        for future in as_completed(futures):
             try:
-                # We use .upsert() as a robust way to insert data. While our date logic
-                # should prevent any duplicate primary keys (symbol, date), upsert
-                # provides an extra layer of safety against potential conflicts.
-                _, count = supabase.table('etf_historical_data').upsert(records_to_insert).execute()
-                print(f"Successfully inserted/updated records for {symbol}.")
+                rows_written, errors, log = future.result()
             except Exception as e:
-                print(f"An error occurred during insert for {symbol}: {e}")
+                rows_written, errors, log = Counter(), {symbol: str(e) for symbol in futures[future]}, []
+            filled.update(rows_written)
+            failed.update(errors)
+            for line in log:
+                print(line)
 
-    print("\n--- Scraping process complete. ---")
+    # 4. Derived data only needs rebuilding if rows were actually added.
+    if filled:
+        first_filled = {}
+        for symbol, first_missing, _, _ in gaps:
+            if filled[symbol] and (symbol not in first_filled or first_missing < first_filled[symbol]):
+                first_filled[symbol] = first_missing
+        _, aggregate_errors = refresh_aggregates(repository, first_filled, rate_limiter, timer,
+                                                 group_size, batch_size, max_attempts)
+        failed.update(aggregate_errors)
+        publish_snapshots(repository, symbols_to_track, timer)
+    timer.print_summary(time.perf_counter() - run_start)
+
+    # 5. Report every gap with the number of days that were filled.
+    report = {
+        "mode": "audit_gaps",
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+        "gaps": [
+            {"symbol": symbol, "start_date": str(first_missing), "end_date": str(last_missing), "missing_days": days}
+            for symbol, first_missing, last_missing, days in gaps
+        ],
+        "filled": [{"symbol": symbol, "rows": rows} for symbol, rows in sorted(filled.items())],
+        "failed": [{"symbol": symbol, "error": error} for symbol, error in sorted(failed.items())],
+        "phase_seconds": {phase: round(seconds, 3) for phase, seconds in timer.seconds.items()},
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(report_path)), exist_ok=True)
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nFilled {sum(filled.values())} of {sum(gap[3] for gap in gaps)} missing day(s); "
+          f"{len(failed)} ETF(s) failed. Report written to {report_path}.")
+    return report
+
+def fill_gap_group(repository, downloader, symbols: list, first_missing, last_missing,
+                   rate_limiter: HostRateLimiter, timer: PhaseTimer, batch_size: int, max_attempts: int) -> tuple:
+    """
+    Downloads one missing date range for a group of symbols and stores it.
+
+    Only rows inside [first_missing, last_missing] are written, so the rows
+    around the gap are never touched.
+
+    Args:
+        first_missing (date): The first missing date of the gap.
+        last_missing (date): The last missing date of the gap.
+        The other arguments are the same as for `scrape_group`.
+
+    Returns:
+        tuple: (rows written per symbol as a Counter, error per failed symbol,
+                progress messages).
+    """
+    log = [f"--- Backfilling {', '.join(symbols)} from {first_missing} to {last_missing} ---"]
+    rows_written = Counter()
+
+    closes, errors = download_group(downloader, symbols, first_missing, last_missing + timedelta(days=1),
+                                    timer, max_attempts, log)
+    if not closes.empty:
+        closes = closes[(closes.index >= pd.Timestamp(first_missing)) & (closes.index <= pd.Timestamp(last_missing))]
+    present = [symbol for symbol in symbols if symbol in closes.columns and closes[symbol].notna().any()]
+    if not present:
+        if not errors:
+            log.append("The download source has no data for this range.")
+        return rows_written, errors, log
+
+    for batch in frame_to_records(closes, present, batch_size):
+        def upsert():
+            rate_limiter.wait(DATABASE_HOST)
+            with timer.phase("upsert"):
+                repository.upsert_prices(batch)
+
+        try:
+            call_with_retries(upsert, max_attempts, f"Upsert of {len(batch)} rows", log)
+            rows_written.update(row["symbol"] for row in batch)
+        except Exception as e:
+            log.append(f"An error occurred during insert of a batch of {len(batch)} rows: {e}")
+            for symbol in {row["symbol"] for row in batch}:
+                errors[symbol] = f"upsert: {e}"
+    log.append(f"Filled {sum(rows_written.values())} missing row(s).")
+    return rows_written, errors, log
+
+def refresh_aggregates(repository, start_dates: dict, rate_limiter: HostRateLimiter, timer: PhaseTimer,
+                       group_size: int = DEFAULT_GROUP_SIZE, batch_size: int = DEFAULT_BATCH_SIZE,
+                       max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> tuple:
+    """
+    Recomputes the weekly and monthly aggregates affected by changed daily rows.
+
+    Each symbol's daily rows are reloaded from the start of the earliest week
+    or month that contains a changed date (see `aggregation_start_date`), so
+    every affected period is rebuilt from all of its closes, while older
+    periods are left untouched. Symbols sharing that start are processed
+    together, `group_size` at a time.
+
+    Args:
+        repository (MarketDataRepository): The data repository.
+        start_dates (dict): The earliest changed date of each symbol, or None
+                            to recompute a symbol's aggregates from its full history.
+        rate_limiter (HostRateLimiter): The run's rate limiter.
+        timer (PhaseTimer): The run's phase timer.
+        group_size (int, optional): The maximum number of symbols per load.
+        batch_size (int, optional): The number of aggregate rows per bulk upsert.
+        max_attempts (int, optional): The number of attempts per load or upsert.
+
+    Returns:
+        tuple: (the number of aggregate rows written, error per failed symbol).
+    """
+    if not start_dates:
+        return 0, {}
+    by_start = defaultdict(list)
+    for symbol, first_changed in start_dates.items():
+        start = aggregation_start_date(first_changed).strftime('%Y-%m-%d') if first_changed else None
+        by_start[start].append(symbol)
+
+    print(f"\nRecomputing weekly and monthly aggregates for {len(start_dates)} ETF(s)...")
+    log = []
+    rows_written = 0
+    errors = {}
+    for start, members in by_start.items():
+        for i in range(0, len(members), max(group_size, 1)):
+            chunk = members[i:i + group_size]
+
+            def load():
+                rate_limiter.wait(DATABASE_HOST)
+                with timer.phase("aggregates"):
+                    return compute_aggregate_rows(repository.get_price_rows(chunk, start_date=start))
+
+            try:
+                records, _ = call_with_retries(load, max_attempts, f"Load of {len(chunk)} histories", log)
+                for j in range(0, len(records), batch_size):
+                    batch = records[j:j + batch_size]
+
+                    def upsert():
+                        rate_limiter.wait(DATABASE_HOST)
+                        with timer.phase("aggregates"):
+                            repository.upsert_aggregates(batch)
+
+                    call_with_retries(upsert, max_attempts, f"Upsert of {len(batch)} aggregate rows", log)
+                rows_written += len(records)
+            except Exception as e:
+                log.append(f"Could not update the aggregates of {', '.join(chunk)}: {e}")
+                errors.update({symbol: f"aggregates: {e}" for symbol in chunk})
+
+    for line in log:
+        print(line)
+    print(f"Wrote {rows_written} aggregate row(s).")
+    return rows_written, errors
+
+def rebuild_aggregates(group_size: int = DEFAULT_GROUP_SIZE, batch_size: int = DEFAULT_BATCH_SIZE,
+                       max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> dict:
+    """
+    Recomputes the weekly and monthly aggregates of every ETF from scratch.
+
+    This builds the aggregate table for the first time, or repairs it after
+    the daily table has been edited outside of the scraper.
+
+    Returns:
+        dict: The error per symbol that could not be rebuilt.
+    """
+    repository = get_repository()
+    timer = PhaseTimer()
+    symbols = [item['symbol'] for item in repository.get_etf_metadata()]
+    _, errors = refresh_aggregates(repository, dict.fromkeys(symbols), HostRateLimiter(0), timer,
+                                   group_size, batch_size, max_attempts)
+    timer.print_summary(sum(timer.seconds.values()))
+    return errors
+
+def frame_to_records(closes: pd.DataFrame, symbols: list, chunk_size: int):
+    """
+    Converts a date x symbol frame of closes into database rows, in chunks.
+
+    The conversion is vectorized: the dates are formatted once for the whole
+    frame, the prices are rounded with NumPy, and the positions of the
+    non-missing cells are found with a single mask. Only the row dictionaries
+    of the chunk being yielded are ever built, so memory use is bounded by
+    `chunk_size` rather than by the size of the download.
+
+    Args:
+        closes (pd.DataFrame): Closing prices with a DatetimeIndex, one column per symbol.
+        symbols (list): The columns to convert, in order.
+        chunk_size (int): The maximum number of rows per chunk.
+
+    Yields:
+        list: Up to `chunk_size` dictionaries with 'symbol', 'date' and
+              'close_price' (rounded to two decimals), grouped by symbol and
+              sorted by date within each symbol.
+    """
+    if not symbols or closes.empty:
+        return
+    dates = np.asarray(closes.index.strftime('%Y-%m-%d'), dtype=object)
+    names = np.asarray(symbols, dtype=object)
+
+    # Flatten symbol-major (all dates of the first symbol, then the next...).
+    values = closes[symbols].to_numpy(dtype=np.float64).T.ravel()
+    present = np.flatnonzero(~np.isnan(values))
+    prices = np.round(values[present], 2)
+    symbol_positions, date_positions = np.divmod(present, len(dates))
+
+    for start in range(0, len(present), chunk_size):
+        end = start + chunk_size
+        yield [
+            {"symbol": symbol, "date": date, "close_price": price}
+            for symbol, date, price in zip(
+                names[symbol_positions[start:end]].tolist(),
+                dates[date_positions[start:end]].tolist(),
+                prices[start:end].tolist(),
+            )
+        ]
 
 if __name__ == "__main__":
     # This block allows the script to be run directly from the command line.
-    run_scraper()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Scrape new ETF price data into the database cache.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="The number of download groups processed concurrently (1 = sequential).")
+    parser.add_argument("--rate-limit", type=float, default=DEFAULT_REQUESTS_PER_SECOND,
+                        help="The maximum number of requests per second to each host (0 = unlimited).")
+    parser.add_argument("--group-size", type=int, default=DEFAULT_GROUP_SIZE,
+                        help="The maximum number of tickers per download group.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="The number of rows written by each bulk upsert.")
+    parser.add_argument("--fixture", help="A CSV file (date, symbol, close) to use instead of Yahoo Finance.")
+    parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS,
+                        help="The number of attempts for each download or upsert.")
+    parser.add_argument("--journal", default=DEFAULT_JOURNAL_PATH, help="The run journal used to resume interrupted runs.")
+    parser.add_argument("--report", default=DEFAULT_REPORT_PATH, help="Where to write the JSON run report.")
+    parser.add_argument("--fresh", action="store_true", help="Ignore an unfinished journal and process every ETF.")
+    parser.add_argument("--audit-gaps", action="store_true",
+                        help="Instead of fetching new data, find and backfill gaps inside the stored histories.")
+    parser.add_argument("--rebuild-aggregates", action="store_true",
+                        help="Instead of fetching new data, recompute every weekly and monthly aggregate.")
+    args = parser.parse_args()
+    if args.rebuild_aggregates:
+        errors = rebuild_aggregates(
+            group_size=args.group_size,
+            batch_size=max(args.batch_size, 1),
+            max_attempts=max(args.max_attempts, 1),
+        )
+        sys.exit(1 if errors else 0)
+    if args.audit_gaps:
+        report = run_gap_audit(
+            workers=args.workers,
+            requests_per_second=args.rate_limit,
+            group_size=args.group_size,
+            batch_size=max(args.batch_size, 1),
+            downloader=FixtureDownloader(args.fixture) if args.fixture else None,
+            max_attempts=max(args.max_attempts, 1),
+            report_path=args.report,
+        )
+        sys.exit(1 if report["failed"] else 0)
+    report = run_scraper(
+        workers=args.workers,
+        requests_per_second=args.rate_limit,
+        group_size=args.group_size,
+        batch_size=max(args.batch_size, 1),
+        downloader=FixtureDownloader(args.fixture) if args.fixture else None,
+        max_attempts=max(args.max_attempts, 1),
+        journal_path=args.journal,
+        report_path=args.report,
+        fresh=args.fresh,
+    )
+    # A non-zero exit status lets schedulers notice runs that left symbols failed.
+    sys.exit(1 if report and report["failed"] else 0)
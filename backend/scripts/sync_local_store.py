@@ -0,0 +1,73 @@
+# backend/scripts/sync_local_store.py
+
+"""
+Local Data Store Synchronization Script for Finora.
+
+This script copies the ETF metadata and the complete historical price table
+from Supabase into the local SQLite store used when FINORA_DATA_BACKEND=sqlite,
+and derives the local weekly and monthly aggregates from the copied rows.
+Once synchronized, the whole backend (and its benchmarks) can run offline, with
+every read served from local disk.
+
+Usage Examples:
+  python scripts/sync_local_store.py
+  python scripts/sync_local_store.py --path /tmp/finora.sqlite3
+"""
+
+import os
+import sys
+import argparse
+from dotenv import load_dotenv
+
+# Make the backend's `services` package importable when this file is run
+# directly as a script (e.g., `python scripts/sync_local_store.py`).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.repository import SupabaseRepository, SQLiteRepository
+from services.price_aggregates import aggregation_start_date, compute_aggregate_rows
+
+# --- Configuration ---
+# Load the Supabase credentials from the .env file.
+load_dotenv()
+
+def sync_local_store(path: str = None):
+    """
+    Copies ETF metadata and price history from Supabase into SQLite.
+
+    The copy is idempotent: existing ETFs are left in place and price rows are
+    upserted, so the script can be re-run at any time to catch up.
+
+    Args:
+        path (str, optional): The SQLite file to write. Defaults to the
+                              location used by `SQLiteRepository`.
+    """
+    source = SupabaseRepository()
+    target = SQLiteRepository(path)
+    print(f"Synchronizing Supabase into the local store at {target.path}...")
+
+    # 1. Copy the ETF metadata, skipping symbols that already exist locally.
+    existing = {etf['symbol'] for etf in target.get_etf_metadata()}
+    etfs = source.get_etf_metadata()
+    for etf in etfs:
+        if etf['symbol'] not in existing:
+            target.add_etf(etf['symbol'], etf['name'], etf['expense_ratio'])
+    print(f"Copied metadata for {len(etfs)} ETFs.")
+
+    # 2. Copy only the price rows newer than what the local store already has,
+    # and recompute the weekly and monthly aggregates of the periods they touch.
+    for etf in etfs:
+        symbol = etf['symbol']
+        latest_local = target.get_latest_date(symbol)
+        rows = source.get_price_rows([symbol], start_date=latest_local)
+        target.upsert_prices(rows)
+        if rows:
+            start = aggregation_start_date(rows[0]['date']).strftime('%Y-%m-%d')
+            target.upsert_aggregates(compute_aggregate_rows(target.get_price_rows([symbol], start_date=start)))
+        print(f"- {symbol}: {len(rows)} rows copied.")
+
+    print("\n--- Synchronization complete. ---")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Copy Supabase market data into the local SQLite store.")
+    parser.add_argument('--path', type=str, help='The SQLite database file to write.')
+    args = parser.parse_args()
+    sync_local_store(args.path)
@@ -0,0 +1,220 @@
+# backend/services/batch_recommendation.py
+
+"""
+Streaming Recommendations for Batches of Profiles.
+
+Advisors and the nightly analytics jobs need recommendations for thousands of
+profiles at a time. Sending each profile to `/api/recommend` repeats the whole
+request pipeline per profile, including the charts and the Monte Carlo
+projection that such jobs usually do not need.
+
+`iter_batch_recommendations` instead consumes the profiles in chunks of
+`BATCH_CHUNK_SIZE`:
+
+1. The metrics snapshot and its ranking index are read once, so every profile
+   of the batch is matched against the same metrics, even if the cache
+   refreshes in the meantime.
+2. The profiles of a chunk are validated one by one. An invalid profile yields
+   an error result for its index and does not affect the others.
+3. The valid profiles are scored, blended and assembled together (see
+   `generate_batch_recommendations`).
+4. Projections are only run on request. They share one `PriceDataLoader`, so
+   each ETF's history is fetched once for the whole batch.
+
+Results are produced chunk by chunk, in input order, so the caller can stream
+them back while later profiles are still being read.
+"""
+
+import json
+import os
+
+from .data_loader import PriceDataLoader
+from .etf_ranking import get_ranking_index, parse_alternatives
+from .metrics_cache import get_universe_metrics
+from .projection_service import run_monte_carlo_simulation
+from .recommendation_service import ETF_CATEGORIES, generate_batch_recommendations
+
+# The number of profiles scored together. Larger chunks amortize the array
+# operations better; smaller ones start streaming results sooner.
+BATCH_CHUNK_SIZE = int(os.getenv("RECOMMEND_BATCH_CHUNK_SIZE", 1000))
+
+# The number of bytes of an NDJSON body read at a time.
+NDJSON_BLOCK_SIZE = 64 * 1024
+
+# The profile keys that the frontend sends, and that every profile must have.
+REQUIRED_PROFILE_KEYS = ["age", "income", "investmentAmount", "timeHorizon", "riskTolerance", "experience"]
+
+# The accepted values of boolean query parameters.
+_BOOLEAN_VALUES = {"true": True, "1": True, "false": False, "0": False}
+
+
+def parse_batch_options(args) -> dict:
+    """
+    Validates the query parameters of a batch request.
+
+    Args:
+        args: The request's query arguments (e.g., `request.args`). The
+              supported parameters are `alternatives` (see `parse_alternatives`)
+              and `projections` ("true" or "false", the default).
+
+    Returns:
+        dict: Keyword arguments for `iter_batch_recommendations`.
+
+    Raises:
+        ValueError: If a parameter is invalid. The message is safe to return
+                    to the client.
+    """
+    options = {"alternatives": parse_alternatives(args), "include_projections": False}
+
+    projections = args.get("projections")
+    if projections is not None:
+        if projections.lower() not in _BOOLEAN_VALUES:
+            raise ValueError("The 'projections' parameter must be 'true' or 'false'.")
+        options["include_projections"] = _BOOLEAN_VALUES[projections.lower()]
+
+    return options
+
+
+def parse_profile(data) -> dict:
+    """
+    Converts a profile as sent by the frontend into the service layer's format.
+
+    Note the transformation from the frontend's camelCase (e.g., investmentAmount)
+    to the snake_case expected by the Python services.
+
+    Args:
+        data: One decoded profile from the request body.
+
+    Returns:
+        dict: The profile with snake_case keys and typed values.
+
+    Raises:
+        ValueError: If the profile is not an object, misses a required key or
+                    has a value of the wrong type.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Each profile must be a JSON object.")
+    if not all(key in data for key in REQUIRED_PROFILE_KEYS):
+        raise ValueError("Profile is missing required keys.")
+    try:
+        return {
+            "age": int(data["age"]),
+            "income": int(data["income"]),
+            "investment_amount": float(data["investmentAmount"]),
+            "time_horizon": str(data["timeHorizon"]),
+            "risk_tolerance": str(data["riskTolerance"]),
+            "experience": str(data["experience"])
+        }
+    except (TypeError, ValueError):
+        raise ValueError("Profile has a value of the wrong type.")
+
+
+def read_ndjson(stream, loads=json.loads, block_size: int = NDJSON_BLOCK_SIZE):
+    """
+    Decodes newline-delimited JSON lazily, as the body is read.
+
+    The stream is read in blocks rather than line by line, which is much
+    cheaper for request streams, and each complete line is decoded on its own.
+
+    Args:
+        stream: A binary file-like object, e.g. the request stream.
+        loads (callable, optional): The JSON decoder to use.
+        block_size (int, optional): The number of bytes read at a time.
+
+    Returns:
+        iterator: The decoded value of each non-blank line. A line that is not
+                  valid JSON produces a `ValueError` instance in its place, so
+                  that one bad line only fails its own profile.
+    """
+    remainder = b""
+    while True:
+        block = stream.read(block_size)
+        lines = (remainder + block).split(b"\n")
+        # The last piece is an incomplete line, unless the body has ended.
+        remainder = lines.pop() if block else b""
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                yield loads(line)
+            except ValueError:
+                yield ValueError("Line is not valid JSON.")
+        if not block:
+            return
+
+
+def iter_batch_recommendations(items, alternatives: int = 0, include_projections: bool = False,
+                               chunk_size: int = BATCH_CHUNK_SIZE):
+    """
+    Generates the recommendations of a stream of profiles, chunk by chunk.
+
+    The metrics snapshot is read before this function returns, so a failure
+    to load the metrics is raised here rather than while streaming.
+
+    Args:
+        items: An iterable of decoded profiles in the frontend's format (see
+               `parse_profile`). `ValueError` instances are reported as errors.
+        alternatives (int, optional): How many runner-up ETFs to list with each
+                                      selection. Defaults to none.
+        include_projections (bool, optional): Whether to run the Monte Carlo
+                                              projection of every profile.
+        chunk_size (int, optional): The number of profiles processed together.
+
+    Returns:
+        iterator: Lists of results, one list per chunk and one result per
+                  profile, in input order. Each result holds the profile's
+                  'index' and either its recommendation (see
+                  `generate_batch_recommendations`) or an 'error' message.
+    """
+    ranking_index = get_ranking_index(get_universe_metrics(), ETF_CATEGORIES)
+    loader = PriceDataLoader() if include_projections else None
+    return _iter_chunks(items, ranking_index, alternatives, loader, chunk_size)
+
+
+def _iter_chunks(items, ranking_index, alternatives, loader, chunk_size):
+    """The generator behind `iter_batch_recommendations`."""
+    chunk = []
+    for index, item in enumerate(items):
+        chunk.append((index, item))
+        if len(chunk) == chunk_size:
+            yield _process_chunk(chunk, ranking_index, alternatives, loader)
+            chunk = []
+    if chunk:
+        yield _process_chunk(chunk, ranking_index, alternatives, loader)
+    if loader is not None:
+        print(loader.summary())
+
+
+def _process_chunk(chunk: list, ranking_index, alternatives: int, loader) -> list:
+    """Validates, recommends and optionally projects one chunk of profiles."""
+    # 1. Validate each profile. Invalid ones get their error result right away.
+    results = {}
+    valid = []
+    for index, item in chunk:
+        try:
+            if isinstance(item, ValueError):
+                raise item
+            valid.append((index, parse_profile(item)))
+        except ValueError as e:
+            results[index] = {"index": index, "error": str(e)}
+
+    # 2. Recommend every valid profile of the chunk at once.
+    profiles = [profile for _, profile in valid]
+    recommendations = generate_batch_recommendations(profiles, alternatives, ranking_index)
+
+    for (index, profile), recommendation in zip(valid, recommendations):
+        result = {"index": index, **recommendation}
+        # 3. Project the portfolio's growth only when it was asked for.
+        if loader is not None:
+            try:
+                result["projections"] = run_monte_carlo_simulation(
+                    portfolio=recommendation["recommended_portfolio"],
+                    initial_investment=profile["investment_amount"],
+                    loader=loader
+                )
+            except Exception as e:
+                print(f"An error occurred during the projection of batch profile {index}: {e}")
+                result = {"index": index, "error": "An internal error occurred."}
+        results[index] = result
+
+    return [results[index] for index, _ in chunk]
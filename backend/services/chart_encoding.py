@@ -0,0 +1,175 @@
+# backend/services/chart_encoding.py
+
+"""
+Compact Encodings for the Historical Price Charts.
+
+Each ETF in a recommended portfolio carries a year of closing prices for its
+chart. Sent as a list of `{"date", "close_price"}` records, that is roughly 250
+objects per ETF, each repeating both key names, which is most of the
+`/api/recommend` payload and most of its JSON encoding time.
+
+This module lets the client choose a cheaper representation:
+
+- "records":  The original list of `{"date", "close_price"}` dicts (default).
+- "columnar": `{"dates": [...], "prices": [...]}`, i.e. one array per column.
+- "delta":    The first date and price, followed by the day gap between
+              consecutive dates and the price change in cents. Both arrays
+              hold small integers, which are the cheapest values to encode.
+
+Independently of the format, the series can be downsampled to a target number
+of points with the Largest-Triangle-Three-Buckets (LTTB) algorithm. LTTB keeps
+the points that contribute most to the visual shape of the line, so a chart
+drawn from 60 points looks almost identical to one drawn from 250.
+"""
+
+import numpy as np
+
+from .price_series import PriceSeries
+
+CHART_FORMATS = ("records", "columnar", "delta")
+
+# Charts need at least the first and last point, and gain nothing visible from
+# more points than a year of trading days.
+MIN_CHART_POINTS = 3
+MAX_CHART_POINTS = 2000
+
+# Delta-encoded prices are stored as whole cents.
+DELTA_PRICE_SCALE = 100
+
+
+def parse_chart_options(args) -> dict:
+    """
+    Validates the chart parameters of a request.
+
+    Args:
+        args: The request's query arguments (e.g., `request.args`). The
+              supported parameters are `chart_format` (one of `CHART_FORMATS`)
+              and `chart_points` (the target number of points per chart).
+
+    Returns:
+        dict: Keyword arguments for `encode_chart_series`.
+
+    Raises:
+        ValueError: If a parameter is invalid. The message is safe to return
+                    to the client.
+    """
+    options = {}
+
+    chart_format = args.get("chart_format")
+    if chart_format is not None:
+        if chart_format not in CHART_FORMATS:
+            raise ValueError(f"The 'chart_format' parameter must be one of: {', '.join(CHART_FORMATS)}.")
+        options["chart_format"] = chart_format
+
+    points = args.get("chart_points")
+    if points is not None:
+        try:
+            options["points"] = int(points)
+        except ValueError:
+            raise ValueError("The 'chart_points' parameter must be an integer.")
+        if not MIN_CHART_POINTS <= options["points"] <= MAX_CHART_POINTS:
+            raise ValueError(f"The 'chart_points' parameter must be between {MIN_CHART_POINTS} and {MAX_CHART_POINTS}.")
+
+    return options
+
+
+def encode_chart_series(historical_data, chart_format: str = "records", points: int = None):
+    """
+    Converts a price history into the requested chart representation.
+
+    Args:
+        historical_data (PriceSeries or list): The price history in date order,
+                                               as returned by `get_historical_data_for_period`.
+        chart_format (str, optional): One of `CHART_FORMATS`. Defaults to "records".
+        points (int, optional): If given, the series is first downsampled to at
+                                most this many points with LTTB.
+
+    Returns:
+        PriceSeries or dict: For "records", a `PriceSeries`, which serializes to
+                             the list of `{"date", "close_price"}` records.
+                             Otherwise a dict with a 'format' key and the encoded arrays.
+    """
+    series = historical_data if isinstance(historical_data, PriceSeries) else PriceSeries.from_records(historical_data)
+    if points is not None and len(series) > points:
+        series = series.take(downsample_lttb(series.closes, points))
+
+    if chart_format == "records":
+        return series
+    if chart_format == "columnar":
+        return {"format": "columnar", "dates": series.date_strings(), "prices": series.closes.tolist()}
+    return _delta_encode(series)
+
+
+def downsample_lttb(values, target_points: int) -> np.ndarray:
+    """
+    Selects the points of a series to keep with Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. The points in between are split
+    into `target_points - 2` equal buckets. From each bucket, the point kept is
+    the one forming the largest triangle with the point kept from the previous
+    bucket and the average of the next bucket.
+
+    The x-coordinate is the position in the series, so trading days are
+    treated as evenly spaced, as they are drawn on the chart.
+
+    Args:
+        values: The y-values of the series.
+        target_points (int): The number of points to keep (at least 3).
+
+    Returns:
+        np.ndarray: The sorted positions of the points to keep.
+    """
+    y = np.asarray(values, dtype=np.float64)
+    n = len(y)
+    if target_points >= n or target_points < MIN_CHART_POINTS:
+        return np.arange(n)
+
+    # Bucket edges for the interior points 1 .. n-2.
+    edges = np.linspace(1, n - 1, target_points - 1).astype(int)
+    selected = np.empty(target_points, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for bucket in range(target_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # The average of the next bucket (or the last point for the final bucket).
+        if bucket + 2 < len(edges):
+            next_start, next_end = edges[bucket + 1], edges[bucket + 2]
+            average_x = (next_start + next_end - 1) / 2
+            average_y = y[next_start:next_end].mean()
+        else:
+            average_x, average_y = n - 1, y[n - 1]
+
+        candidates = np.arange(start, end)
+        areas = np.abs(
+            (previous - average_x) * (y[candidates] - y[previous])
+            - (previous - candidates) * (average_y - y[previous])
+        )
+        previous = int(candidates[np.argmax(areas)])
+        selected[bucket + 1] = previous
+    return selected
+
+
+def _delta_encode(series: PriceSeries) -> dict:
+    """
+    Encodes dates as day gaps and prices as changes in whole cents.
+
+    The original series is recovered with a cumulative sum:
+    `date_i = start_date + sum(day_deltas[:i+1])` and
+    `price_i = (start_cents + sum(price_deltas[:i+1])) / scale`, where the
+    first entry of each delta array is 0.
+    """
+    if not len(series):
+        return {"format": "delta", "start_date": None, "start_price": None,
+                "scale": DELTA_PRICE_SCALE, "day_deltas": [], "price_deltas": []}
+
+    days = series.dates.astype("datetime64[D]").astype(np.int64)
+    cents = np.round(series.closes * DELTA_PRICE_SCALE).astype(np.int64)
+    return {
+        "format": "delta",
+        "start_date": str(series.dates[0].astype("datetime64[D]")),
+        "start_price": int(cents[0]) / DELTA_PRICE_SCALE,
+        "scale": DELTA_PRICE_SCALE,
+        "day_deltas": np.diff(days, prepend=days[0]).tolist(),
+        "price_deltas": np.diff(cents, prepend=cents[0]).tolist(),
+    }
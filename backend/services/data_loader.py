@@ -0,0 +1,128 @@
+# backend/services/data_loader.py
+
+"""
+Request-Scoped Loader that Deduplicates Price History Fetches.
+
+One `/api/recommend` request reads price history in several places: the
+1-year chart of every selected ETF (one fetch per ETF) and then the 5-year
+statistics of the same ETFs for the Monte Carlo projection. Each of those
+calls goes to the history layer on its own, even though one fetch of each
+symbol's history contains every window the request needs.
+
+A `PriceDataLoader` is created per request and passed to the services, in the
+style of a GraphQL DataLoader:
+
+1. Callers first declare the symbols they are going to need (`prime`).
+2. The first read dispatches every declared symbol of a resolution in one
+   batched fetch of the full histories (the widest window there is).
+3. Every read, whatever its window, is then served by slicing those histories
+   in memory. Symbols that were not declared are fetched on first read, once.
+4. A weekly or monthly read of a symbol whose daily history is already loaded
+   is resampled from it, without another fetch.
+
+The loader counts the reads it served and the fetches it actually issued, so
+each request can report how many round-trips it saved.
+"""
+
+from collections import defaultdict
+
+import pandas as pd
+
+from .market_service import build_price_series, build_prices_matrix, get_price_histories
+from .price_aggregates import aggregate_series
+from .price_series import PriceSeries
+
+
+class PriceDataLoader:
+    """Batches and memoizes the price history reads of a single request."""
+
+    def __init__(self):
+        # The full history of every loaded (symbol, resolution).
+        self._histories = {}
+        # The symbols declared per resolution and not loaded yet.
+        self._pending = defaultdict(dict)
+
+        # Counters reported by `stats()`: every window read, and every batched
+        # fetch issued to the history layer.
+        self.reads = 0
+        self.fetches = 0
+
+    def prime(self, symbols: list, resolution: str = "daily"):
+        """
+        Declares that the request will read these symbols at a resolution.
+
+        Nothing is fetched yet: every symbol declared before the next read is
+        loaded by the same batch.
+
+        Args:
+            symbols (list): The ETF symbols.
+            resolution (str, optional): "daily", "weekly" or "monthly".
+        """
+        for symbol in symbols:
+            if (symbol, resolution) not in self._histories:
+                self._pending[resolution][symbol] = True
+
+    def get_series(self, symbol: str, days: int, resolution: str = "daily") -> PriceSeries:
+        """
+        Reads one symbol's last `days` days (see `get_historical_data_for_period`).
+
+        Args:
+            symbol (str): The ETF symbol.
+            days (int): The number of days of historical data to retrieve from today.
+            resolution (str, optional): "daily", "weekly" or "monthly".
+
+        Returns:
+            PriceSeries: The closing prices in ascending chronological order.
+        """
+        return build_price_series(self._load([symbol], resolution)[symbol], days)
+
+    def get_matrix(self, symbols: list, days: int, resolution: str = "daily") -> pd.DataFrame:
+        """
+        Reads many symbols' last `days` days as a date x symbol matrix (see
+        `get_historical_prices_matrix`).
+
+        Args:
+            symbols (list): The ETF symbols.
+            days (int): The number of days of historical data to retrieve from today.
+            resolution (str, optional): "daily", "weekly" or "monthly".
+
+        Returns:
+            pd.DataFrame: A date x symbol matrix of closing prices.
+        """
+        return build_prices_matrix(self._load(symbols, resolution), symbols, days)
+
+    def stats(self) -> dict:
+        """
+        Returns what the loader saved.
+
+        Returns:
+            dict: 'reads' (window reads served), 'fetches' (batched fetches
+                  issued) and 'saved' (the fetches that reading every window
+                  separately would have issued on top).
+        """
+        return {"reads": self.reads, "fetches": self.fetches, "saved": max(self.reads - self.fetches, 0)}
+
+    def summary(self) -> str:
+        """Returns the stats as a one-line log message."""
+        stats = self.stats()
+        return (f"Price loader served {stats['reads']} window read(s) with {stats['fetches']} "
+                f"fetch(es), saving {stats['saved']} round-trip(s).")
+
+    def _load(self, symbols: list, resolution: str) -> dict:
+        """
+        Returns the full histories of the symbols, fetching the ones that are
+        not loaded yet together with every symbol pending at that resolution.
+        """
+        self.reads += 1
+        self.prime(symbols, resolution)
+        pending = list(self._pending.pop(resolution, {}))
+        if resolution != "daily":
+            # The daily history holds every coarser one, so resample when possible.
+            for symbol in [symbol for symbol in pending if (symbol, "daily") in self._histories]:
+                self._histories[(symbol, resolution)] = aggregate_series(self._histories[(symbol, "daily")], resolution)
+                pending.remove(symbol)
+        if pending:
+            self.fetches += 1
+            for symbol, history in get_price_histories(pending, resolution).items():
+                self._histories[(symbol, resolution)] = history
+        return {symbol: self._histories[(symbol, resolution)] for symbol in symbols}
@@ -0,0 +1,175 @@
+# backend/services/etf_ranking.py
+
+"""
+Precomputed Ranking of the ETFs of Every Category.
+
+The recommendation engine picks the "best" ETF of each asset category with a
+weighted score of its Sharpe ratio, volatility and expense ratio, where the
+weights depend on the user's risk tolerance. Scoring every candidate again for
+every category of every request is wasted work: the scores only change when
+the metrics do.
+
+An `EtfRankingIndex` is therefore built once per metrics snapshot. For every
+(category, risk tolerance) pair it holds the candidates sorted by score, best
+first. Ties keep the order of the snapshot, so the top entry is exactly the
+ETF a linear scan keeping the first maximum would pick. Candidates whose score
+is NaN (e.g., an ETF with only two closes has no volatility, and hence no
+Sharpe ratio) are left out, since such a scan never picks them either: NaN
+compares false against any score. Selecting the best ETF is then a dictionary
+lookup, and the runners-up are available as top-k alternatives.
+
+The index is rebuilt whenever the metrics cache loads a new snapshot (see
+`metrics_cache.UniverseMetricsCache.on_refresh`), and lazily by
+`get_ranking_index` if a request sees a snapshot the index was not built from.
+"""
+
+import itertools
+import math
+import threading
+
+# The weights of the selection score per risk tolerance. Volatility and expense
+# are negative because lower is better.
+RISK_TOLERANCE_WEIGHTS = {
+    "conservative": {"sharpe": 0.6, "volatility": -0.3, "expense": -0.1},
+    "moderate": {"sharpe": 0.7, "volatility": -0.2, "expense": -0.1},
+    "aggressive": {"sharpe": 0.8, "volatility": -0.1, "expense": -0.1},
+}
+
+# The weighting used for any unrecognized risk tolerance.
+DEFAULT_RISK_TOLERANCE = "moderate"
+
+# The maximum number of alternatives that can be requested per category.
+MAX_ALTERNATIVES = 5
+
+# The index of the most recent snapshot, shared by every request.
+_index = None
+_index_lock = threading.Lock()
+
+# Numbers the indexes in the order they are built, i.e. the order in which this
+# process saw their snapshots, since the version strings themselves do not sort.
+_index_sequence = itertools.count()
+
+
+class EtfRankingIndex:
+    """The candidates of every (category, risk tolerance) pair, best first."""
+
+    def __init__(self, etfs: list, categories: dict, version: str):
+        """
+        Args:
+            etfs (list): The snapshot's ETF entries (see `compute_metrics_snapshot`).
+            categories (dict): A mapping of category name to its ETF symbols.
+            version (str): The version of the snapshot the index is built from.
+        """
+        self.version = version
+        # Higher for indexes built later, i.e. from newer snapshots.
+        self.sequence = next(_index_sequence)
+        # The selection metrics of every ETF, in snapshot order.
+        self.metrics = {
+            etf['symbol']: {
+                "name": etf['name'],
+                "expense_ratio": etf['expense_ratio'],
+                "volatility": etf['volatility'],
+                "sharpe_ratio": etf['sharpe_ratio'],
+                "one_year_return": etf['one_year_return'],
+            }
+            for etf in etfs
+        }
+        self._rankings = {}
+        for category, symbols in categories.items():
+            members = set(symbols)
+            candidates = [symbol for symbol in self.metrics if symbol in members]
+            for tolerance, weights in RISK_TOLERANCE_WEIGHTS.items():
+                scored = [(symbol, _score(self.metrics[symbol], weights)) for symbol in candidates]
+                # Only scores that can beat the scan's initial -inf are ranked. A NaN
+                # key would also leave `sort` with an inconsistent order.
+                scored = [(symbol, score) for symbol, score in scored if score > -math.inf]
+                # `sorted` is stable, so equal scores keep the snapshot order.
+                scored.sort(key=lambda entry: entry[1], reverse=True)
+                self._rankings[(category, tolerance)] = [
+                    {"symbol": symbol, **self.metrics[symbol], "score": score} for symbol, score in scored
+                ]
+
+    def ranked(self, category: str, risk_tolerance: str) -> list:
+        """
+        Returns every candidate of a category, best first.
+
+        Args:
+            category (str): The asset category (e.g., "US Large Cap").
+            risk_tolerance (str): The user's risk tolerance. Unrecognized values
+                                  use the "moderate" weights.
+
+        Returns:
+            list: The candidates' metrics, each with its 'symbol' and 'score'.
+                  Empty if the category has no ETF with metrics.
+        """
+        if risk_tolerance not in RISK_TOLERANCE_WEIGHTS:
+            risk_tolerance = DEFAULT_RISK_TOLERANCE
+        return self._rankings.get((category, risk_tolerance), [])
+
+    def best(self, category: str, risk_tolerance: str):
+        """
+        Returns the highest-scoring ETF of a category in O(1).
+
+        Returns:
+            dict or None: The ETF's symbol, metrics and score, or None if the
+                          category has no candidates.
+        """
+        ranking = self.ranked(category, risk_tolerance)
+        return ranking[0] if ranking else None
+
+    def top(self, category: str, risk_tolerance: str, k: int) -> list:
+        """Returns up to `k` of a category's best ETFs, best first."""
+        return self.ranked(category, risk_tolerance)[:k]
+
+
+def get_ranking_index(snapshot: dict, categories: dict) -> EtfRankingIndex:
+    """
+    Returns the ranking index of a metrics snapshot, building it if needed.
+
+    Args:
+        snapshot (dict): A metrics snapshot (see `compute_metrics_snapshot`).
+        categories (dict): A mapping of category name to its ETF symbols.
+
+    Returns:
+        EtfRankingIndex: The index for the snapshot's version.
+    """
+    global _index
+    index = _index
+    if index is None or index.version != snapshot['version']:
+        with _index_lock:
+            # Another thread may have built it while this one waited.
+            if _index is None or _index.version != snapshot['version']:
+                _index = EtfRankingIndex(snapshot['etfs'], categories, snapshot['version'])
+            index = _index
+    return index
+
+
+def parse_alternatives(args) -> int:
+    """
+    Validates the `alternatives` parameter of a request.
+
+    Args:
+        args: The request's query arguments (e.g., `request.args`).
+
+    Returns:
+        int: The number of alternatives to list per category (0 if absent).
+
+    Raises:
+        ValueError: If the parameter is invalid. The message is safe to return
+                    to the client.
+    """
+    value = args.get("alternatives")
+    if value is None:
+        return 0
+    try:
+        alternatives = int(value)
+    except ValueError:
+        raise ValueError("The 'alternatives' parameter must be an integer.")
+    if not 0 <= alternatives <= MAX_ALTERNATIVES:
+        raise ValueError(f"The 'alternatives' parameter must be between 0 and {MAX_ALTERNATIVES}.")
+    return alternatives
+
+
+def _score(metrics: dict, weights: dict) -> float:
+    """The weighted selection score: risk-adjusted return, risk and cost."""
+    return (metrics['sharpe_ratio'] * weights['sharpe'] + metrics['volatility'] * weights['volatility'] + metrics['expense_ratio'] * weights['expense'])
@@ -0,0 +1,233 @@
+# backend/services/market_query.py
+
+"""
+Server-Side Querying of the ETF Market Data Table.
+
+The Market Data page used to download every field of every ETF and then sort
+and filter the table in the browser. As the universe grows, this module lets
+`/api/etfs/market-data` do that work instead: it supports sorting, filtering,
+field selection and cursor-based pagination.
+
+Queries are served from a `MarketDataIndex`, which keeps a presorted list of row
+positions for every sortable field. It is built once per metrics snapshot
+version, so a "top N by Sharpe ratio" request only walks the first N entries of
+an existing order (plus any rows rejected by filters) instead of sorting and
+serializing the whole universe on every request.
+"""
+
+import base64
+import json
+import math
+import threading
+
+# Fields that can be requested, sorted on, and (if numeric) filtered on.
+TEXT_FIELDS = ("symbol", "name")
+NUMERIC_FIELDS = ("price", "ytd_return", "expense_ratio", "one_year_return", "volatility", "sharpe_ratio")
+ALL_FIELDS = TEXT_FIELDS + NUMERIC_FIELDS
+
+# Short filter names accepted in addition to the generic `min_<field>` and
+# `max_<field>` parameters (e.g., `min_sharpe=1` is `min_sharpe_ratio=1`).
+FILTER_ALIASES = {
+    "sharpe": "sharpe_ratio",
+    "expense": "expense_ratio",
+    "return": "one_year_return",
+    "ytd": "ytd_return",
+}
+
+# The largest page a single request may ask for.
+MAX_PAGE_SIZE = 500
+
+
+class MarketDataIndex:
+    """Presorted orderings over one version of the market data rows."""
+
+    def __init__(self, rows: list, version: str):
+        """
+        Args:
+            rows (list): The market data rows (see `compute_metrics_snapshot`).
+            version (str): The version of the snapshot the rows come from.
+        """
+        self.rows = rows
+        self.version = version
+        # For each field, the row positions in ascending order. Rows without a
+        # usable value (None or NaN) are kept apart so they always sort last.
+        self._orders = {}
+        for field in ALL_FIELDS:
+            present = [i for i, row in enumerate(rows) if _is_sortable(row.get(field))]
+            missing = [i for i, row in enumerate(rows) if not _is_sortable(row.get(field))]
+            key = (lambda i: (rows[i][field].lower(), rows[i]["symbol"])) if field in TEXT_FIELDS \
+                else (lambda i: (rows[i][field], rows[i]["symbol"]))
+            self._orders[field] = (sorted(present, key=key), missing)
+
+    def query(self, sort: str = "symbol", order: str = "asc", fields: list = None,
+              limit: int = None, cursor: str = None, filters: list = None) -> tuple:
+        """
+        Returns one page of rows.
+
+        Args:
+            sort (str, optional): The field to sort on. Defaults to "symbol".
+            order (str, optional): "asc" or "desc". Defaults to "asc".
+            fields (list, optional): The fields to include in each row. Defaults to all.
+            limit (int, optional): The maximum number of rows to return. Defaults to all.
+            cursor (str, optional): The `next_cursor` of the previous page.
+            filters (list, optional): (field, operator, value) tuples, where the
+                                      operator is ">=" or "<=".
+
+        Returns:
+            tuple: (rows, next_cursor). `next_cursor` is None on the last page.
+
+        Raises:
+            ValueError: If the cursor does not belong to this query or version.
+        """
+        ascending, missing = self._orders[sort]
+        present = len(ascending)
+        descending = order == "desc"
+
+        start = 0
+        if cursor:
+            start = _decode_cursor(cursor, self.version, sort, order)
+
+        page = []
+        next_cursor = None
+        # Offsets run over the sorted rows, then the rows without a value. They
+        # are mapped to row positions directly, so a page only touches the rows
+        # it scans instead of copying the whole ordering.
+        for offset in range(start, present + len(missing)):
+            if offset >= present:
+                position = missing[offset - present]
+            elif descending:
+                position = ascending[present - 1 - offset]
+            else:
+                position = ascending[offset]
+            row = self.rows[position]
+            if filters and not all(_passes(row, *condition) for condition in filters):
+                continue
+            if limit is not None and len(page) == limit:
+                next_cursor = _encode_cursor(self.version, sort, order, offset)
+                break
+            page.append({field: row.get(field) for field in fields} if fields else row)
+        return page, next_cursor
+
+
+# The index for the most recent snapshot version, rebuilt when it changes.
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_market_data_index(rows: list, version: str) -> MarketDataIndex:
+    """
+    Returns the index for a snapshot version, building it on first use.
+
+    Args:
+        rows (list): The snapshot's market data rows.
+        version (str): The snapshot's version.
+
+    Returns:
+        MarketDataIndex: The index over those rows.
+    """
+    global _index
+    with _index_lock:
+        if _index is None or _index.version != version:
+            _index = MarketDataIndex(rows, version)
+        return _index
+
+
+def parse_market_query(args) -> dict:
+    """
+    Validates the query-string parameters of a market data request.
+
+    Args:
+        args: The request's query arguments (e.g., `request.args`).
+
+    Returns:
+        dict: Keyword arguments for `MarketDataIndex.query`, or an empty dict
+              if the request uses none of the query parameters.
+
+    Raises:
+        ValueError: If a parameter is invalid. The message is safe to return
+                    to the client.
+    """
+    query = {}
+
+    sort = args.get("sort")
+    if sort is not None:
+        if sort not in ALL_FIELDS:
+            raise ValueError(f"Cannot sort by '{sort}'. Valid fields: {', '.join(ALL_FIELDS)}.")
+        query["sort"] = sort
+
+    order = args.get("order")
+    if order is not None:
+        if order not in ("asc", "desc"):
+            raise ValueError("The 'order' parameter must be 'asc' or 'desc'.")
+        query["order"] = order
+
+    fields = args.get("fields")
+    if fields is not None:
+        requested = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in requested if field not in ALL_FIELDS]
+        if unknown or not requested:
+            raise ValueError(f"Unknown fields: {', '.join(unknown) or '(none)'}. Valid fields: {', '.join(ALL_FIELDS)}.")
+        query["fields"] = requested
+
+    limit = args.get("limit")
+    if limit is not None:
+        try:
+            query["limit"] = int(limit)
+        except ValueError:
+            raise ValueError("The 'limit' parameter must be an integer.")
+        if not 1 <= query["limit"] <= MAX_PAGE_SIZE:
+            raise ValueError(f"The 'limit' parameter must be between 1 and {MAX_PAGE_SIZE}.")
+
+    if args.get("cursor"):
+        query["cursor"] = args.get("cursor")
+
+    filters = []
+    for name, value in args.items():
+        if not (name.startswith("min_") or name.startswith("max_")):
+            continue
+        field = FILTER_ALIASES.get(name[4:], name[4:])
+        if field not in NUMERIC_FIELDS:
+            raise ValueError(f"Cannot filter on '{name[4:]}'. Numeric fields: {', '.join(NUMERIC_FIELDS)}.")
+        try:
+            threshold = float(value)
+        except ValueError:
+            raise ValueError(f"The '{name}' parameter must be a number.")
+        filters.append((field, ">=" if name.startswith("min_") else "<=", threshold))
+    if filters:
+        query["filters"] = filters
+
+    return query
+
+
+def _is_sortable(value) -> bool:
+    """Returns False for values that cannot take part in an ordering."""
+    return value is not None and not (isinstance(value, float) and math.isnan(value))
+
+
+def _passes(row: dict, field: str, operator: str, threshold: float) -> bool:
+    """Checks one filter condition against a row. Missing values never pass."""
+    value = row.get(field)
+    if not _is_sortable(value):
+        return False
+    return value >= threshold if operator == ">=" else value <= threshold
+
+
+def _encode_cursor(version: str, sort: str, order: str, offset: int) -> str:
+    """Builds an opaque cursor pointing at a position in one sort order."""
+    payload = json.dumps({"v": version, "s": sort, "o": order, "p": offset}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str, version: str, sort: str, order: str) -> int:
+    """Validates a cursor and returns the position it points at."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        position = int(payload["p"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("The 'cursor' parameter is malformed.")
+    if payload.get("s") != sort or payload.get("o") != order:
+        raise ValueError("The 'cursor' parameter belongs to a different sort order.")
+    if payload.get("v") != version:
+        raise ValueError("The market data has changed since this cursor was issued. Please restart from the first page.")
+    return position
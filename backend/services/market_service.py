@@ -9,28 +9,69 @@ database interactions and complex formulas away from the API routes and other
 services.
 
 The functions are divided into two categories:
-1. Data Retrieval: Functions that query the Supabase database.
+1. Data Retrieval: Functions that query the configured data repository
+   (Supabase or a local SQLite file, see `repository.py`).
 2. Financial Calculations: Pure functions that perform mathematical operations
    on the retrieved data using libraries like pandas and numpy.
 """
 
 import os
-import requests
+import json
+import time
+import threading
+import hashlib
 import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-from supabase import create_client, Client
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
+from .price_aggregates import RESOLUTIONS, aggregate_series
+from .price_cache import PriceHistoryCache
+from .price_series import PriceSeries
+from .price_store import DEFAULT_PRICE_STORE_DIR, open_price_store, read_current_version, version_published_at
+from .repository import get_repository
+from .metrics_engine import compute_return_statistics, compute_ytd_returns
+from .return_index import ReturnIndex
 
 # --- Configuration ---
 load_dotenv()
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-if not all([SUPABASE_URL, SUPABASE_KEY]):
-    raise ValueError("Supabase credentials must be set in .env file")
+# Upper bound on the memory used by the process-local price history cache.
+PRICE_CACHE_MAX_BYTES = int(os.getenv("PRICE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Minimum number of seconds between two "latest cached date" checks. Within
+# this interval, cached histories are served without contacting the database.
+PRICE_CACHE_CHECK_INTERVAL_SECONDS = float(os.getenv("PRICE_CACHE_CHECK_INTERVAL_SECONDS", 60))
+
+# A single cache instance is shared by every request handled by this process.
+price_cache = PriceHistoryCache(PRICE_CACHE_MAX_BYTES)
+
+# The memory-mapped price snapshot published by the scraper (see `price_store.py`).
+# It is shared with every other worker process through the OS page cache, and
+# is only used while its latest date matches the database's latest date.
+_price_store = None
+_price_store_reads = 0
+
+# Prefix-sum return indexes built from the cached histories, keyed by symbol,
+# with the price watermark each one was last brought up to date at. When the
+# watermark moves they are extended with the new closes (or rebuilt if the
+# history changed in any other way).
+_return_indexes = {}
+_return_indexes_lock = threading.Lock()
+
+# A hash of the ETF metadata table, refreshed together with the price watermark.
+# Together they form the "data version" that derived data (such as the metrics
+# snapshot) is checked against.
+_metadata_hash = None
+
+# The version of the last published price store, which the scraper replaces
+# after every write, including backfills that do not move the latest date.
+# It is the third part of the data version.
+_data_revision = None
+
+# When this process first saw the current metadata hash. Metadata edits are not
+# dated anywhere else, so this is the earliest time they can be said to date
+# from (see `get_data_version`'s 'modified_at').
+_metadata_seen_at = None
 
 # --- Service Functions ---
 
@@ -44,15 +85,14 @@ def get_etf_metadata_from_db():
         list: A list of dictionaries, where each dictionary represents an ETF.
               Returns an empty list if no data is found.
     """
-    response = supabase.table('etfs').select('symbol, name, expense_ratio').execute()
-    return response.data if response.data else []
+    return get_repository().get_etf_metadata()
 
 def get_latest_prices_from_db(symbols: list) -> dict:
     """
     Fetches the most recent closing price for each given symbol from the cache.
 
-    Iterates through a list of symbols and queries the database for the latest
-    price entry for each one.
+    The whole list is resolved in bulk by the repository (a single round-trip
+    when the Supabase `get_latest_prices` function is deployed).
 
     Args:
         symbols (list): A list of ETF symbols (e.g., ['VOO', 'QQQ']).
@@ -63,68 +103,485 @@ def get_latest_prices_from_db(symbols: list) -> dict:
     """
     if not symbols:
         return {}
-    
+
     prices = {}
-    # Note: For a very large number of symbols (1000+), this loop could be slow.
-    # A more advanced implementation might use a single, more complex SQL query.
-    for symbol in symbols:
-        # For each symbol, get the latest entry by ordering by date descending.
-        response = supabase.table('etf_historical_data') \
-            .select('close_price') \
-            .eq('symbol', symbol) \
-            .order('date', desc=True) \
-            .limit(1) \
-            .execute()
-        
-        if response.data:
-            prices[symbol] = float(response.data[0]['close_price'])
-    
+    for row in get_repository().get_latest_prices(symbols):
+        if row.get('close_price') is not None:
+            prices[row['symbol']] = float(row['close_price'])
+
     print(f"Fetched latest prices for {len(prices)} symbols from DB cache.")
     return prices
 
-def get_historical_data_for_period(symbol: str, days: int) -> list:
+def get_historical_data_for_period(symbol: str, days: int, resolution: str = "daily") -> PriceSeries:
     """
     Gets cached historical data for a symbol for a specific past period.
 
+    The data is served from the process-local price cache when possible.
+
     Args:
         symbol (str): The ETF symbol to fetch data for.
         days (int): The number of days of historical data to retrieve from today.
+        resolution (str, optional): "daily" (the default), or "weekly" or
+                                    "monthly" for the last close of each week or
+                                    month (see `price_aggregates.py`). Long
+                                    windows need 5x to 20x fewer rows that way.
 
     Returns:
-        list: A list of dictionaries, each with 'date' and 'close_price'.
-              Data is sorted in ascending chronological order.
+        PriceSeries: The closing prices in ascending chronological order. It
+                     serializes to a list of `{'date', 'close_price'}` dictionaries.
     """
-    start_date = datetime.now().date() - timedelta(days=days)
-    
-    response = supabase.table('etf_historical_data') \
-        .select('date, close_price') \
-        .eq('symbol', symbol) \
-        .gte('date', start_date.strftime('%Y-%m-%d')) \
-        .order('date', desc=False) \
-        .execute()
-    return response.data if response.data else []
+    return build_price_series(_get_histories([symbol], resolution)[symbol], days)
+
+def get_historical_prices_matrix(symbols: list, days: int, resolution: str = "daily") -> pd.DataFrame:
+    """
+    Gets cached closing prices for many symbols over one period as a matrix.
+
+    Each symbol's full history is held in the process-local price cache, so the
+    requested window is simply sliced from it. Symbols that are not cached yet
+    are fetched together (see `MarketDataRepository.get_price_rows`), which means the number of
+    round-trips depends on the volume of data, not on the number of symbols.
+
+    Args:
+        symbols (list): The ETF symbols to fetch data for.
+        days (int): The number of days of historical data to retrieve from today.
+        resolution (str, optional): "daily", "weekly" or "monthly" (see
+                                    `get_historical_data_for_period`).
+
+    Returns:
+        pd.DataFrame: A date x symbol matrix of closing prices. The index is a
+                      sorted DatetimeIndex and there is one column per requested
+                      symbol (in the requested order). Dates on which a symbol
+                      has no data are NaN.
+    """
+    return build_prices_matrix(_get_histories(symbols, resolution), symbols, days)
+
+def get_price_histories(symbols: list, resolution: str = "daily") -> dict:
+    """
+    Gets the full cached history of many symbols in one batch.
+
+    This is the fetch behind `get_historical_data_for_period` and
+    `get_historical_prices_matrix`, for callers that cut several windows from
+    the same histories (see `data_loader.PriceDataLoader`).
+
+    Args:
+        symbols (list): The ETF symbols to fetch data for.
+        resolution (str, optional): "daily", "weekly" or "monthly".
+
+    Returns:
+        dict: A mapping of each symbol to its date-indexed pd.Series of closes
+              (empty for symbols without data).
+    """
+    return _get_histories(symbols, resolution)
+
+def build_price_series(history: pd.Series, days: int) -> PriceSeries:
+    """
+    Cuts the last `days` days of a full history (see `get_price_histories`).
+
+    Returns:
+        PriceSeries: A view of the window, see `get_historical_data_for_period`.
+    """
+    return PriceSeries.from_series(history).slice(start_date=_period_start(days))
+
+def build_prices_matrix(histories: dict, symbols: list, days: int) -> pd.DataFrame:
+    """
+    Cuts the last `days` days of full histories into a date x symbol matrix.
+
+    Args:
+        histories (dict): Full histories per symbol, see `get_price_histories`.
+        symbols (list): The columns of the matrix, in order.
+        days (int): The number of days of historical data to keep from today.
+
+    Returns:
+        pd.DataFrame: See `get_historical_prices_matrix`.
+    """
+    start = _period_start(days)
+    windows = {symbol: histories[symbol][histories[symbol].index >= start] for symbol in symbols}
+
+    non_empty = {symbol: window for symbol, window in windows.items() if not window.empty}
+    if not non_empty:
+        return pd.DataFrame(columns=list(symbols), dtype=float, index=pd.DatetimeIndex([], name='date'))
+    # Building a DataFrame from a dict of Series aligns them on the union of their dates.
+    matrix = pd.DataFrame(non_empty).sort_index()
+    matrix.index.name = 'date'
+    # Reindex so every requested symbol has a column, even if it had no rows.
+    return matrix.reindex(columns=list(symbols))
+
+def get_return_index(symbol: str) -> ReturnIndex:
+    """
+    Gets the prefix-sum return index of a symbol's full price history.
+
+    The index is built once from the cached history. When new price data
+    arrives, only the new closes are appended to it, so any number of window
+    queries can be answered in O(1) and a daily scrape costs O(1) per symbol.
+
+    Args:
+        symbol (str): The ETF symbol.
+
+    Returns:
+        ReturnIndex: The symbol's index (empty if the symbol has no data).
+    """
+    history = _get_full_histories([symbol])[symbol]
+    watermark = price_cache.watermark
+    with _return_indexes_lock:
+        index, indexed_at = _return_indexes.get(symbol, (None, None))
+        if index is not None and indexed_at == watermark:
+            return index
+        if index is None or not index.extend_from_series(history):
+            index = ReturnIndex.from_series(history)
+        if not history.empty:
+            _return_indexes[symbol] = (index, watermark)
+    return index
+
+def get_window_statistics(symbol: str, start_date=None, end_date=None) -> dict:
+    """
+    Gets return statistics for a symbol over an arbitrary date range.
+
+    Args:
+        symbol (str): The ETF symbol.
+        start_date (str, optional): The first date ('YYYY-MM-DD') of the window.
+        end_date (str, optional): The last date ('YYYY-MM-DD') of the window.
+
+    Returns:
+        dict: See `ReturnIndex.window_statistics`.
+    """
+    return get_return_index(symbol).window_statistics(start_date, end_date)
+
+def get_latest_cached_date():
+    """
+    Fetches the most recent date present in the historical price table.
+
+    This is a cheap, single-row query that acts as the "version" of the cached
+    price data: it only changes when the scraper has written a new session.
+
+    Returns:
+        str or None: The latest date as 'YYYY-MM-DD', or None if the table is empty.
+    """
+    return get_repository().get_latest_date()
+
+def get_data_version() -> dict:
+    """
+    Returns the current version of the market data.
+
+    The version changes when the scraper writes a new trading session (the
+    latest cached date moves), when it publishes any other write such as a
+    backfilled gap (the data revision, i.e. the published price store version,
+    changes) or when an ETF is added, removed or edited (the metadata hash
+    changes). It is refreshed at most once every
+    `PRICE_CACHE_CHECK_INTERVAL_SECONDS`, so calling this is usually free.
+
+    The version also carries 'modified_at', a time no earlier than the last
+    change of any of its parts: the latest of midnight UTC of the latest date,
+    the publish time of the data revision, and the time this process first saw
+    the metadata hash. It is what HTTP `Last-Modified` headers are based on.
+
+    Returns:
+        dict: {'latest_date': 'YYYY-MM-DD' or None, 'metadata_hash': str or None,
+               'data_revision': str or None, 'modified_at': aware datetime or None}
+    """
+    _ensure_price_cache_is_fresh()
+    latest_date = price_cache.watermark
+    modified = []
+    if latest_date is not None:
+        modified.append(datetime.strptime(str(latest_date), "%Y-%m-%d").replace(tzinfo=timezone.utc))
+    if _data_revision is not None:
+        try:
+            modified.append(version_published_at(_data_revision))
+        except ValueError:
+            pass
+    if _metadata_seen_at is not None:
+        modified.append(_metadata_seen_at)
+    return {
+        "latest_date": latest_date,
+        "metadata_hash": _metadata_hash,
+        "data_revision": _data_revision,
+        "modified_at": max(modified) if modified else None,
+    }
+
+def compute_metadata_hash(etf_metadata: list) -> str:
+    """
+    Computes a stable hash of the ETF metadata rows.
+
+    Args:
+        etf_metadata (list): The rows returned by `get_etf_metadata_from_db`.
+
+    Returns:
+        str: A hex digest that is independent of the row order.
+    """
+    rows = sorted(
+        ({"symbol": etf["symbol"], "name": etf["name"], "expense_ratio": float(etf["expense_ratio"])} for etf in etf_metadata),
+        key=lambda etf: etf["symbol"],
+    )
+    return hashlib.sha256(json.dumps(rows, sort_keys=True).encode("utf-8")).hexdigest()
+
+def get_price_cache_stats() -> dict:
+    """
+    Returns the hit/miss/eviction counters of the process-local price cache,
+    along with the state of the shared memory-mapped price store.
+
+    Returns:
+        dict: See `PriceHistoryCache.stats`, plus a 'price_store' entry.
+    """
+    stats = price_cache.stats()
+    stats["price_store"] = {
+        "version": _price_store.version if _price_store else None,
+        "latest_date": _price_store.latest_date if _price_store else None,
+        "in_use": _is_price_store_current(),
+        "reads": _price_store_reads,
+    }
+    return stats
+
+def _ensure_price_cache_is_fresh():
+    """
+    Invalidates the price cache if the database has received new data.
+
+    The same check also refreshes the metadata hash used by `get_data_version`.
+    The check is throttled to once every `PRICE_CACHE_CHECK_INTERVAL_SECONDS`.
+    If the check itself fails, the cached data is kept and served as-is.
+    """
+    global _metadata_hash, _metadata_seen_at
+    if not price_cache.should_check(time.monotonic(), PRICE_CACHE_CHECK_INTERVAL_SECONDS):
+        return
+    _refresh_price_store()
+    try:
+        latest_date = get_latest_cached_date()
+        metadata_hash = compute_metadata_hash(get_etf_metadata_from_db())
+        if metadata_hash != _metadata_hash:
+            _metadata_hash, _metadata_seen_at = metadata_hash, datetime.now(timezone.utc)
+    except Exception as e:
+        print(f"Could not check the latest cached date ({e}). Serving cached prices.")
+        return
+    if price_cache.validate(latest_date):
+        print(f"New price data detected (latest date {latest_date}). Price cache invalidated.")
+
+def _refresh_price_store():
+    """
+    Maps the most recently published price snapshot, if it has changed.
+
+    A new snapshot means the scraper has written to the price table, possibly
+    without moving its latest date (e.g., a backfilled gap). The cached
+    histories and return indexes may then be out of date, so they are cleared.
+
+    Opening a snapshot only maps its files into memory, so it is near-instant.
+    Any error leaves the store disabled, and prices are read from the cache and
+    repository instead.
+    """
+    global _price_store, _data_revision
+    try:
+        version = read_current_version(DEFAULT_PRICE_STORE_DIR)
+        if version != _data_revision:
+            _data_revision = version
+            with _return_indexes_lock:
+                _return_indexes.clear()
+            if price_cache.clear():
+                print(f"New data revision {version} detected. Price cache invalidated.")
+        if version is None:
+            _price_store = None
+        elif _price_store is None or _price_store.version != version:
+            _price_store = open_price_store(DEFAULT_PRICE_STORE_DIR)
+            print(f"Mapped price store snapshot {version} (latest date {_price_store.latest_date}).")
+    except Exception as e:
+        print(f"Could not open the price store ({e}). Falling back to the database.")
+        _price_store = None
+
+def _is_price_store_current() -> bool:
+    """Returns True if the mapped snapshot holds the database's latest data."""
+    return (
+        _price_store is not None
+        and price_cache.watermark is not None
+        and _price_store.latest_date == price_cache.watermark
+    )
+
+def _get_full_histories(symbols: list) -> dict:
+    """
+    Returns the full price history of each symbol.
+
+    Histories are read from the shared price store when it is current, then
+    from the process-local cache, and only then from the repository.
+
+    Args:
+        symbols (list): The ETF symbols to look up.
+
+    Returns:
+        dict: A mapping of each symbol to its date-indexed pd.Series of closes.
+    """
+    global _price_store_reads
+    _ensure_price_cache_is_fresh()
+
+    store = _price_store if _is_price_store_current() else None
+    histories = {}
+    missing = []
+    for symbol in symbols:
+        if store is not None and symbol in store:
+            # Served straight from the shared mapping, so it is not cached again here.
+            histories[symbol] = store.get_series(symbol)
+            _price_store_reads += 1
+            continue
+        cached = price_cache.get(symbol)
+        if cached is None:
+            missing.append(symbol)
+        else:
+            histories[symbol] = cached
+
+    if missing:
+        # Fetch the complete history of every missing symbol in one batch.
+        rows = get_repository().get_price_rows(missing)
+        frame = pd.DataFrame(rows, columns=['symbol', 'date', 'close_price'])
+        frame['date'] = pd.to_datetime(frame['date'])
+        frame['close_price'] = frame['close_price'].astype(float)
+        grouped = dict(tuple(frame.groupby('symbol', sort=False)))
+
+        for symbol in missing:
+            group = grouped.get(symbol)
+            if group is None:
+                # Not cached: invalidation follows the global latest date, so an
+                # empty entry would hide rows added for this symbol (e.g., by a
+                # backfill right after `manage_etfs add`) until the next session.
+                history = pd.Series(dtype=float, index=pd.DatetimeIndex([], name='date'))
+            else:
+                history = pd.Series(group['close_price'].to_numpy(), index=pd.DatetimeIndex(group['date'], name='date'))
+                price_cache.put(symbol, history)
+            histories[symbol] = history
+
+    return histories
+
+def _get_histories(symbols: list, resolution: str) -> dict:
+    """
+    Returns the full history of each symbol at the requested resolution.
+
+    Args:
+        symbols (list): The ETF symbols to look up.
+        resolution (str): One of `RESOLUTIONS`.
+
+    Returns:
+        dict: A mapping of each symbol to its date-indexed pd.Series of closes.
+
+    Raises:
+        ValueError: If the resolution is not recognized.
+    """
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution '{resolution}'. Expected one of {', '.join(RESOLUTIONS)}.")
+    if resolution == "daily":
+        return _get_full_histories(symbols)
+    return _get_aggregate_histories(symbols, resolution)
+
+def _get_aggregate_histories(symbols: list, resolution: str) -> dict:
+    """
+    Returns the weekly or monthly history of each symbol.
+
+    Aggregate histories share the price cache (and its invalidation) with the
+    daily ones, under a "SYMBOL@resolution" key. On a miss, they are derived
+    from the shared price store when it is current, which costs no database
+    round-trip. Otherwise they are read from the aggregate table maintained by
+    the scraper, which holds 5x (weekly) to 20x (monthly) fewer rows than the
+    daily table. Symbols without aggregate rows (e.g., before the table was
+    first built) fall back to resampling their daily history.
+
+    Args:
+        symbols (list): The ETF symbols to look up.
+        resolution (str): One of `AGGREGATE_RESOLUTIONS`.
+
+    Returns:
+        dict: A mapping of each symbol to its pd.Series of period closes,
+              indexed by each period's end date.
+    """
+    _ensure_price_cache_is_fresh()
+
+    histories = {}
+    missing = []
+    for symbol in symbols:
+        cached = price_cache.get(f"{symbol}@{resolution}")
+        if cached is None:
+            missing.append(symbol)
+        else:
+            histories[symbol] = cached
+    if not missing:
+        return histories
+
+    store = _price_store if _is_price_store_current() else None
+    from_daily = [symbol for symbol in missing if store is not None and symbol in store]
+    from_table = [symbol for symbol in missing if symbol not in from_daily]
+
+    if from_table:
+        rows = get_repository().get_aggregate_rows(from_table, resolution)
+        frame = pd.DataFrame(rows, columns=['symbol', 'date', 'close_price'])
+        frame['date'] = pd.to_datetime(frame['date'])
+        frame['close_price'] = frame['close_price'].astype(float)
+        grouped = dict(tuple(frame.groupby('symbol', sort=False)))
+        for symbol in from_table:
+            group = grouped.get(symbol)
+            if group is None:
+                from_daily.append(symbol)
+            else:
+                histories[symbol] = pd.Series(group['close_price'].to_numpy(), index=pd.DatetimeIndex(group['date'], name='date'))
+
+    if from_daily:
+        daily = _get_full_histories(from_daily)
+        for symbol in from_daily:
+            histories[symbol] = aggregate_series(daily[symbol], resolution)
+
+    for symbol in missing:
+        # Empty histories are not cached, for the reason given in `_get_full_histories`.
+        if not histories[symbol].empty:
+            price_cache.put(f"{symbol}@{resolution}", histories[symbol])
+    return histories
+
+def _period_start(days: int) -> pd.Timestamp:
+    """Returns the first date included in a window of `days` days ending today."""
+    return pd.Timestamp(datetime.now().date() - timedelta(days=days))
+
+def get_series_from_matrix(price_matrix: pd.DataFrame, symbol: str) -> pd.Series:
+    """
+    Extracts one symbol's price history from a matrix built by
+    `get_historical_prices_matrix`.
+
+    Args:
+        price_matrix (pd.DataFrame): A date x symbol matrix of closing prices.
+        symbol (str): The ETF symbol to extract.
+
+    Returns:
+        pd.Series: The symbol's closing prices indexed by date, with the dates
+                   on which it has no data removed. Empty if the symbol is absent.
+    """
+    if symbol not in price_matrix.columns:
+        return pd.Series(dtype=float, index=pd.DatetimeIndex([], name='date'))
+    return price_matrix[symbol].dropna()
+
+def _extract_close_prices(historical_data) -> np.ndarray:
+    """
+    Normalizes historical data into an array of closing prices.
+
+    The calculation functions below accept a `PriceSeries` (as returned by
+    `get_historical_data_for_period`), a date-indexed pd.Series (as returned by
+    `get_series_from_matrix`) or a list of `{'date', 'close_price'}` dictionaries.
+
+    Args:
+        historical_data (PriceSeries, pd.Series or list): Chronologically sorted price data.
+
+    Returns:
+        np.ndarray: The closing prices as float64, oldest first.
+    """
+    if isinstance(historical_data, PriceSeries):
+        return historical_data.closes
+    if isinstance(historical_data, pd.Series):
+        return historical_data.dropna().to_numpy(dtype=np.float64)
+    return np.array([p['close_price'] for p in historical_data], dtype=np.float64)
 
 # --- Calculation Functions ---
 
-def calculate_historical_return(historical_data: list) -> float:
+def calculate_historical_return(historical_data) -> float:
     """
     Calculates the total percentage return over a given historical data period.
 
     Args:
-        historical_data (list): A list of dictionaries sorted chronologically.
+        historical_data (PriceSeries, pd.Series or list): Price data sorted chronologically.
 
     Returns:
         float: The total return as a percentage (e.g., 18.21 for 18.21%).
     """
-    if len(historical_data) < 2:
-        return 0.0
-    start_price = float(historical_data[0]['close_price'])
-    end_price = float(historical_data[-1]['close_price'])
-    if start_price == 0:
-        return 0.0
-    return round(((end_price - start_price) / start_price) * 100, 2)
+    stats = _compute_single_symbol_statistics(historical_data)
+    return round(float(stats['total_return'][0]), 2)
 
-def calculate_ytd_return(live_price: float, historical_data: list) -> float:
+def calculate_ytd_return(live_price: float, historical_data) -> float:
     """
     Calculates the Year-to-Date (YTD) return.
 
@@ -132,20 +589,15 @@ def calculate_ytd_return(live_price: float, historical_data: list) -> float:
 
     Args:
         live_price (float): The current price of the security.
-        historical_data (list): Data from the start of the year to the present.
+        historical_data (PriceSeries, pd.Series or list): Data from the start of the year to the present.
 
     Returns:
         float: The YTD return as a percentage.
     """
-    if not historical_data or live_price is None:
-        return 0.0
-    start_price = float(historical_data[0]['close_price'])
-    if start_price == 0:
-        return 0.0
-    ytd_return = ((live_price - start_price) / start_price) * 100
-    return round(ytd_return, 2)
+    prices = _extract_close_prices(historical_data)
+    return compute_ytd_returns(prices, ['symbol'], {'symbol': live_price})[0]
 
-def calculate_volatility(historical_data: list) -> float:
+def calculate_volatility(historical_data) -> float:
     """
     Calculates the annualized volatility of a security.
 
@@ -156,20 +608,15 @@ def calculate_volatility(historical_data: list) -> float:
     number of trading days in a year).
 
     Args:
-        historical_data (list): A list of dictionaries with 'close_price'.
+        historical_data (PriceSeries, pd.Series or list): Price data sorted chronologically.
 
     Returns:
         float: The annualized volatility as a percentage (e.g., 15.88).
     """
-    if len(historical_data) < 2:
-        return 0.0
-    prices = pd.Series([float(p['close_price']) for p in historical_data])
-    daily_returns = prices.pct_change().dropna()
-    # Annualize the daily standard deviation by multiplying by sqrt(252).
-    volatility = daily_returns.std() * np.sqrt(252) 
-    return round(volatility * 100, 2)
+    stats = _compute_single_symbol_statistics(historical_data)
+    return round(float(stats['volatility'][0]), 2)
 
-def calculate_sharpe_ratio(historical_data: list, risk_free_rate: float = 0.04) -> float:
+def calculate_sharpe_ratio(historical_data, risk_free_rate: float = 0.04) -> float:
     """
     Calculates the Sharpe Ratio, a measure of risk-adjusted return.
 
@@ -179,7 +626,7 @@ def calculate_sharpe_ratio(historical_data: list, risk_free_rate: float = 0.04)
     return minus the risk-free rate) divided by the portfolio's volatility.
 
     Args:
-        historical_data (list): A list of dictionaries with 'close_price'.
+        historical_data (PriceSeries, pd.Series or list): Price data sorted chronologically.
         risk_free_rate (float, optional): The annualized risk-free rate,
                                            representing the return on a "zero-risk"
                                            investment (e.g., a U.S. Treasury bill).
@@ -188,16 +635,15 @@ def calculate_sharpe_ratio(historical_data: list, risk_free_rate: float = 0.04)
     Returns:
         float: The annualized Sharpe Ratio (e.g., 1.25).
     """
-    if len(historical_data) < 2:
-        return 0.0
-    prices = pd.Series([float(p['close_price']) for p in historical_data])
-    daily_returns = prices.pct_change().dropna()
-    if daily_returns.std() == 0:
-        return 0.0
-    
-    # Calculate the average daily return in excess of the daily risk-free rate.
-    excess_returns = daily_returns - (risk_free_rate / 252)
-    
-    # Annualize the result by multiplying the daily Sharpe ratio by sqrt(252).
-    sharpe_ratio = (excess_returns.mean() / excess_returns.std()) * np.sqrt(252)
-    return round(sharpe_ratio, 2)
\ No newline at end of file
+    stats = _compute_single_symbol_statistics(historical_data, risk_free_rate)
+    return round(float(stats['sharpe_ratio'][0]), 2)
+
+def _compute_single_symbol_statistics(historical_data, risk_free_rate: float = 0.04) -> dict:
+    """
+    Runs the vectorized metrics engine on a single symbol's history.
+
+    The per-symbol calculation functions above are thin wrappers around this,
+    so they always agree with the universe-wide `compute_universe_metrics`.
+    """
+    prices = _extract_close_prices(historical_data)
+    return compute_return_statistics(prices, risk_free_rate)
@@ -0,0 +1,257 @@
+# backend/services/metrics_cache.py
+
+"""
+Background-Refreshed, In-Memory Cache of the Universe Metrics.
+
+`generate_recommendation` needs the metrics of every ETF on every call. Even
+with the published snapshot (see `metrics_snapshot.py`), fetching them on the
+request path means checking the data version against the database and, when
+the snapshot is stale, computing every ETF's metrics before any portfolio
+logic runs.
+
+This module keeps the latest metrics snapshot in process memory and serves it
+with stale-while-revalidate semantics:
+
+- A request always receives the cached snapshot immediately. Only the very
+  first request of a process, before anything was loaded, waits for a load.
+- When the cached snapshot is older than `METRICS_CACHE_MAX_AGE_SECONDS`, the
+  request that notices it starts a revalidation on a background thread and
+  still returns the cached snapshot.
+- A refresher thread (`start_metrics_refresher`) revalidates on a fixed
+  schedule, so after a scrape the new metrics are usually in memory before
+  any request asks for them.
+
+Revalidation compares the cached snapshot's data version with the database's.
+The metrics are only reloaded when it changed, and a failed reload keeps the
+previous snapshot in service.
+"""
+
+import os
+import threading
+import time
+
+from .market_service import get_data_version
+from .metrics_snapshot import get_metrics_snapshot, is_snapshot_fresh
+
+# How long a cached snapshot is served before a request triggers a background
+# revalidation.
+METRICS_CACHE_MAX_AGE_SECONDS = float(os.getenv("METRICS_CACHE_MAX_AGE_SECONDS", 60))
+
+# How often the refresher thread revalidates the cache.
+METRICS_REFRESH_INTERVAL_SECONDS = float(os.getenv("METRICS_REFRESH_INTERVAL_SECONDS", 60))
+
+
+class UniverseMetricsCache:
+    """
+    A single metrics snapshot, shared by every request handled by this process.
+
+    At most one load or revalidation runs at a time. Requests never wait for a
+    revalidation, only for the initial load.
+    """
+
+    def __init__(self, loader, max_age_seconds: float):
+        """
+        Args:
+            loader (callable): Returns a fresh snapshot (see `get_metrics_snapshot`).
+            max_age_seconds (float): How long a snapshot is served before it is revalidated.
+        """
+        self.loader = loader
+        self.max_age_seconds = max_age_seconds
+        self._snapshot = None
+        # Monotonic timestamp of the last load or successful revalidation.
+        self._validated_at = None
+        # Held while a load or revalidation is running.
+        self._refresh_lock = threading.Lock()
+        self._refresher = None
+        self._stop = threading.Event()
+        # Called with every newly loaded snapshot (see `on_refresh`).
+        self._listeners = []
+
+        # Counters exposed through `stats()` for monitoring.
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.revalidations = 0
+        self.errors = 0
+        self.last_error = None
+
+    def get(self) -> dict:
+        """
+        Returns the cached snapshot, loading it first if there is none yet.
+
+        Returns:
+            dict: The metrics snapshot (see `compute_metrics_snapshot`).
+
+        Raises:
+            Exception: Whatever the loader raised, if nothing is cached yet.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            self.misses += 1
+            with self._refresh_lock:
+                # Another thread may have completed the load while this one waited.
+                if self._snapshot is None:
+                    self._load()
+            return self._snapshot
+
+        if time.monotonic() - self._validated_at > self.max_age_seconds:
+            self.stale_hits += 1
+            self.refresh_in_background()
+        else:
+            self.hits += 1
+        return snapshot
+
+    def refresh_in_background(self) -> bool:
+        """
+        Starts a revalidation on a new thread, unless one is already running.
+
+        Returns:
+            bool: True if a revalidation was started.
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+        thread = threading.Thread(target=self._revalidate_and_release, name="metrics-cache-revalidate", daemon=True)
+        thread.start()
+        return True
+
+    def on_refresh(self, callback):
+        """
+        Registers a function to call with every newly loaded snapshot.
+
+        Listeners run on the thread that loaded the snapshot, before any
+        request is served from it, so they can prepare data derived from the
+        metrics (e.g., the ETF ranking index). A failing listener is logged
+        and does not affect the cache or the other listeners.
+
+        Args:
+            callback (callable): Called with the new snapshot.
+        """
+        self._listeners.append(callback)
+
+    def revalidate(self) -> bool:
+        """
+        Reloads the snapshot if the data it was computed from has changed.
+
+        Blocks while another load or revalidation is running.
+
+        Returns:
+            bool: True if a new snapshot was loaded.
+        """
+        with self._refresh_lock:
+            return self._revalidate()
+
+    def start(self, interval_seconds: float = METRICS_REFRESH_INTERVAL_SECONDS):
+        """
+        Starts the refresher thread, which loads the snapshot right away and
+        then revalidates it every `interval_seconds`. Calling this again while
+        the thread is running has no effect.
+
+        Args:
+            interval_seconds (float, optional): The time between two revalidations.
+        """
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        self._stop.clear()
+        self._refresher = threading.Thread(
+            target=self._run_refresher, args=(interval_seconds,), name="metrics-cache-refresher", daemon=True
+        )
+        self._refresher.start()
+
+    def stop(self):
+        """Stops the refresher thread after its current revalidation."""
+        self._stop.set()
+
+    def stats(self) -> dict:
+        """
+        Returns the cache's counters and the state of its snapshot.
+
+        Returns:
+            dict: The counters, plus the cached snapshot's 'version', its
+                  'age_seconds' since the last (re)validation, and whether the
+                  refresher thread is running.
+        """
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.get("version") if snapshot else None,
+            "age_seconds": round(time.monotonic() - self._validated_at, 1) if self._validated_at else None,
+            "refresher_running": self._refresher is not None and self._refresher.is_alive(),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "loads": self.loads,
+            "revalidations": self.revalidations,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+    def _load(self):
+        """Replaces the cached snapshot with a freshly loaded one. The caller holds the refresh lock."""
+        snapshot = self.loader()
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                print(f"A metrics cache listener failed on snapshot {snapshot.get('version')} ({e}).")
+        self._snapshot = snapshot
+        self._validated_at = time.monotonic()
+        self.loads += 1
+
+    def _revalidate(self) -> bool:
+        """Checks the data version and reloads if needed. The caller holds the refresh lock."""
+        self.revalidations += 1
+        try:
+            snapshot = self._snapshot
+            if snapshot is not None and is_snapshot_fresh(snapshot, get_data_version()):
+                self._validated_at = time.monotonic()
+                return False
+            self._load()
+            print(f"Metrics cache loaded snapshot {self._snapshot.get('version')} ({self._snapshot.get('source')}).")
+            return True
+        except Exception as e:
+            # Keep serving the previous snapshot, and only retry after another
+            # full max-age interval rather than on every request.
+            self.errors += 1
+            self.last_error = str(e)
+            if self._snapshot is not None:
+                self._validated_at = time.monotonic()
+            print(f"Could not refresh the metrics cache ({e}). Serving the cached metrics.")
+            return False
+
+    def _revalidate_and_release(self):
+        """Runs a revalidation started by `refresh_in_background`."""
+        try:
+            self._revalidate()
+        finally:
+            self._refresh_lock.release()
+
+    def _run_refresher(self, interval_seconds: float):
+        """The refresher thread's loop."""
+        while True:
+            self.revalidate()
+            if self._stop.wait(interval_seconds):
+                return
+
+
+# A single cache instance is shared by every request handled by this process.
+metrics_cache = UniverseMetricsCache(get_metrics_snapshot, METRICS_CACHE_MAX_AGE_SECONDS)
+
+
+def get_universe_metrics() -> dict:
+    """
+    Returns the metrics snapshot of every ETF from the in-memory cache.
+
+    Returns:
+        dict: The metrics snapshot (see `compute_metrics_snapshot`).
+    """
+    return metrics_cache.get()
+
+
+def start_metrics_refresher(interval_seconds: float = METRICS_REFRESH_INTERVAL_SECONDS):
+    """
+    Starts this process's background metrics refresher (see `UniverseMetricsCache.start`).
+
+    Args:
+        interval_seconds (float, optional): The time between two revalidations.
+    """
+    metrics_cache.start(interval_seconds)
@@ -0,0 +1,199 @@
+# backend/services/metrics_engine.py
+
+"""
+Vectorized Performance Metrics Engine.
+
+This module computes the core performance and risk metrics used throughout
+Finora (total return, YTD return, annualized volatility and Sharpe ratio) for
+an entire universe of ETFs at once.
+
+Rather than building a pandas Series and recomputing daily returns separately
+for every symbol and every metric, the engine takes a whole date x symbol price
+matrix and derives all of the metrics in a single NumPy pass. Daily returns are
+computed once and shared by the volatility and Sharpe calculations.
+
+Histories do not need to line up: a symbol that was listed later, or that has
+no data on some dates, simply has NaN in those cells. Each symbol's daily
+return is measured against its own previous available close, exactly as if its
+history had been processed on its own.
+
+The per-symbol functions in `market_service` are thin wrappers around this
+engine, so both paths always produce identical results.
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# The approximate number of trading days in a year, used to annualize metrics.
+TRADING_DAYS_PER_YEAR = 252
+
+
+def compute_return_statistics(prices: np.ndarray, risk_free_rate: float = 0.04,
+                              periods_per_year: int = TRADING_DAYS_PER_YEAR) -> dict:
+    """
+    Computes the raw (unrounded) return statistics of every column of a price matrix.
+
+    Args:
+        prices (np.ndarray): A (dates x symbols) float array of closing prices,
+                             oldest first, with NaN where a symbol has no data.
+        risk_free_rate (float, optional): The annualized risk-free rate used for
+                                          the Sharpe ratio. Defaults to 0.04 (4%).
+        periods_per_year (int, optional): The number of prices per year, used to
+                                          annualize. Defaults to 252 (daily closes);
+                                          use 52 or 12 for weekly or monthly closes.
+
+    Returns:
+        dict: NumPy arrays with one entry per column:
+              - 'count': The number of available prices.
+              - 'total_return': Percentage change from the first to the last price.
+              - 'volatility': Annualized volatility, as a percentage.
+              - 'sharpe_ratio': Annualized Sharpe ratio.
+              Columns with fewer than two prices have a return, volatility and
+              Sharpe ratio of 0.0.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    if prices.ndim == 1:
+        prices = prices[:, np.newaxis]
+    n_dates, n_symbols = prices.shape
+    if n_dates == 0:
+        zeros = np.zeros(n_symbols)
+        return {"count": np.zeros(n_symbols, dtype=int), "total_return": zeros, "volatility": zeros, "sharpe_ratio": zeros}
+    columns = np.arange(n_symbols)
+
+    valid = ~np.isnan(prices)
+    count = valid.sum(axis=0)
+    has_history = count >= 2
+
+    # Locate each column's first and last available price.
+    first = np.argmax(valid, axis=0)
+    last = n_dates - 1 - np.argmax(valid[::-1], axis=0)
+    start_price = prices[first, columns]
+    end_price = prices[last, columns]
+
+    # For every cell, find the row of the previous available price in the same
+    # column. This is what makes ragged and gappy histories work.
+    rows = np.arange(n_dates)[:, np.newaxis]
+    last_seen = np.maximum.accumulate(np.where(valid, rows, -1), axis=0)
+    previous_row = np.vstack([np.full((1, n_symbols), -1), last_seen[:-1]])
+    has_return = valid & (previous_row >= 0)
+    previous_price = np.take_along_axis(prices, np.maximum(previous_row, 0), axis=0)
+
+    with warnings.catch_warnings(), np.errstate(divide="ignore", invalid="ignore"):
+        warnings.simplefilter("ignore", RuntimeWarning)
+
+        total_return = np.where(
+            has_history & (start_price != 0),
+            ((end_price - start_price) / start_price) * 100,
+            0.0,
+        )
+
+        # Daily percentage changes; cells without a return are NaN.
+        daily_returns = np.where(has_return, prices / previous_price - 1, np.nan)
+        return_std = _nanstd(daily_returns)
+        volatility = np.where(has_history, return_std * np.sqrt(periods_per_year) * 100, 0.0)
+
+        # The Sharpe ratio uses the average periodic return in excess of the
+        # periodic risk-free rate, annualized by multiplying by sqrt(periods per year).
+        excess_returns = daily_returns - (risk_free_rate / periods_per_year)
+        sharpe = (np.nanmean(excess_returns, axis=0) / _nanstd(excess_returns)) * np.sqrt(periods_per_year)
+        sharpe_ratio = np.where(has_history & (return_std != 0), sharpe, 0.0)
+
+    return {
+        "count": count,
+        "total_return": total_return,
+        "volatility": volatility,
+        "sharpe_ratio": sharpe_ratio,
+    }
+
+
+def compute_universe_metrics(price_matrix: pd.DataFrame, live_prices: dict = None,
+                             ytd_start=None, risk_free_rate: float = 0.04,
+                             periods_per_year: int = TRADING_DAYS_PER_YEAR) -> dict:
+    """
+    Computes rounded display metrics for every symbol in a price matrix.
+
+    Args:
+        price_matrix (pd.DataFrame): A date x symbol matrix of closing prices,
+                                     as returned by `get_historical_prices_matrix`.
+        live_prices (dict, optional): Latest price per symbol, used for the YTD return.
+        ytd_start (optional): The first date of the YTD window (e.g., January 1st).
+                              If omitted, no YTD return is computed.
+        risk_free_rate (float, optional): The annualized risk-free rate. Defaults to 0.04.
+        periods_per_year (int, optional): The number of rows per year of the matrix
+                                          (see `compute_return_statistics`).
+
+    Returns:
+        dict: A dictionary mapping each symbol to its metrics:
+              'total_return' (the return over the whole matrix window),
+              'volatility', 'sharpe_ratio' and, if `ytd_start` is given,
+              'ytd_return'. All values are rounded to two decimals.
+    """
+    symbols = list(price_matrix.columns)
+    stats = compute_return_statistics(price_matrix.to_numpy(dtype=np.float64), risk_free_rate, periods_per_year)
+
+    ytd_returns = None
+    if ytd_start is not None:
+        ytd_prices = price_matrix[price_matrix.index >= pd.Timestamp(ytd_start)]
+        ytd_returns = compute_ytd_returns(ytd_prices.to_numpy(dtype=np.float64), symbols, live_prices or {})
+
+    metrics = {}
+    for i, symbol in enumerate(symbols):
+        metrics[symbol] = {
+            "total_return": round(float(stats["total_return"][i]), 2),
+            "volatility": round(float(stats["volatility"][i]), 2),
+            "sharpe_ratio": round(float(stats["sharpe_ratio"][i]), 2),
+        }
+        if ytd_returns is not None:
+            metrics[symbol]["ytd_return"] = ytd_returns[i]
+    return metrics
+
+
+def compute_ytd_returns(ytd_prices: np.ndarray, symbols: list, live_prices: dict) -> list:
+    """
+    Computes the YTD return of every column against a live price.
+
+    Args:
+        ytd_prices (np.ndarray): A (dates x symbols) price array covering the
+                                 year to date, with NaN where data is missing.
+        symbols (list): The symbol of each column.
+        live_prices (dict): The current price of each symbol.
+
+    Returns:
+        list: The rounded YTD return percentage for each column. It is 0.0 for
+              symbols without YTD data, without a live price, or with a zero
+              starting price.
+    """
+    ytd_prices = np.asarray(ytd_prices, dtype=np.float64).reshape(-1, len(symbols))
+    if ytd_prices.shape[0] == 0:
+        return [0.0] * len(symbols)
+    valid = ~np.isnan(ytd_prices)
+    has_data = valid.any(axis=0)
+    first = np.argmax(valid, axis=0)
+
+    returns = []
+    for i, symbol in enumerate(symbols):
+        live_price = live_prices.get(symbol)
+        if not has_data[i] or live_price is None:
+            returns.append(0.0)
+            continue
+        start_price = float(ytd_prices[first[i], i])
+        if start_price == 0:
+            returns.append(0.0)
+            continue
+        returns.append(round(((live_price - start_price) / start_price) * 100, 2))
+    return returns
+
+
+def _nanstd(values: np.ndarray) -> np.ndarray:
+    """
+    The column-wise sample standard deviation (ddof=1), ignoring NaN.
+
+    This matches `pd.Series.std()`: it is NaN for columns with fewer than two
+    values instead of raising a warning-laden division by zero.
+    """
+    n = (~np.isnan(values)).sum(axis=0)
+    mean = np.nansum(values, axis=0) / n
+    squared = np.nansum((values - mean) ** 2, axis=0)
+    return np.sqrt(np.where(n > 1, squared / np.maximum(n - 1, 1), np.nan))
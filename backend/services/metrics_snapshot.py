@@ -0,0 +1,212 @@
+# backend/services/metrics_snapshot.py
+
+"""
+Precomputed, Versioned Snapshot of Every ETF's Market Metrics.
+
+The 1-year return, YTD return, volatility and Sharpe ratio of each ETF only
+change when new prices are scraped, yet both `/api/etfs/market-data` and
+`generate_recommendation` need them on every request. After each scrape, the
+scraper therefore computes all of these metrics once (`publish_metrics_snapshot`)
+and persists them as a small JSON file.
+
+Each snapshot records the data version it was computed from: the latest cached
+price date, the data revision (the price store version published with the
+same scrape) and a hash of the ETF metadata. `get_metrics_snapshot` serves the
+persisted snapshot while that version still matches the database, and only
+falls back to computing the metrics live when the snapshot is missing or stale.
+"""
+
+import json
+import math
+import os
+from datetime import datetime
+
+from .market_service import (
+    compute_metadata_hash,
+    get_data_version,
+    get_etf_metadata_from_db,
+    get_historical_prices_matrix,
+    get_latest_cached_date,
+    get_latest_prices_from_db,
+)
+from .metrics_engine import compute_universe_metrics
+from .price_store import DEFAULT_PRICE_STORE_DIR, read_current_version
+
+# Default location of the snapshot file, inside the backend's data folder.
+DEFAULT_METRICS_SNAPSHOT_PATH = os.getenv(
+    "FINORA_METRICS_SNAPSHOT_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "metrics_snapshot.json"),
+)
+
+# Incremented whenever the structure of the snapshot file changes, so that a
+# newer server never misreads a snapshot written by an older scraper.
+SNAPSHOT_SCHEMA_VERSION = 2
+
+# The numeric fields of each ETF entry. A metric can be NaN (e.g., the
+# volatility of an ETF with only two prices), which JSON cannot represent: it
+# is written as null, like the API responses do, and read back as NaN.
+NUMERIC_ETF_FIELDS = ("price", "ytd_return", "expense_ratio", "one_year_return", "volatility", "sharpe_ratio")
+
+# The most recently loaded snapshot file, memoized by its modification time.
+_loaded_snapshot = None
+_loaded_snapshot_mtime = None
+
+
+def compute_metrics_snapshot() -> dict:
+    """
+    Computes the metrics of every ETF live from the price data.
+
+    Returns:
+        dict: A snapshot with the following keys:
+              - 'version': A string identifying the data version.
+              - 'data_as_of': The latest cached price date used.
+              - 'data_revision': The published price store version at the time.
+              - 'metadata_hash': The hash of the ETF metadata used.
+              - 'generated_at': When the snapshot was computed.
+              - 'etfs': One entry per ETF (in metadata order) with its 'symbol',
+                'name', 'expense_ratio', 'price', 'ytd_return',
+                'one_year_return', 'volatility' and 'sharpe_ratio'.
+    """
+    data_as_of = get_latest_cached_date()
+    data_revision = read_current_version(DEFAULT_PRICE_STORE_DIR)
+    etf_metadata = get_etf_metadata_from_db()
+    symbols = [etf['symbol'] for etf in etf_metadata]
+
+    latest_prices = get_latest_prices_from_db(symbols)
+    price_matrix = get_historical_prices_matrix(symbols, 365)
+    start_of_year = datetime(datetime.now().year, 1, 1)
+    all_metrics = compute_universe_metrics(price_matrix, latest_prices, ytd_start=start_of_year)
+
+    etfs = []
+    for etf in etf_metadata:
+        symbol = etf['symbol']
+        metrics = all_metrics[symbol]
+        etfs.append({
+            'symbol': symbol,
+            'name': etf['name'],
+            'price': latest_prices.get(symbol) or 0.0,
+            'ytd_return': metrics['ytd_return'],
+            'expense_ratio': float(etf['expense_ratio']),
+            'one_year_return': metrics['total_return'],
+            'volatility': metrics['volatility'],
+            'sharpe_ratio': metrics['sharpe_ratio']
+        })
+
+    metadata_hash = compute_metadata_hash(etf_metadata)
+    return {
+        "schema_version": SNAPSHOT_SCHEMA_VERSION,
+        "version": f"{data_as_of}:{data_revision}:{metadata_hash[:16]}",
+        "data_as_of": data_as_of,
+        "data_revision": data_revision,
+        "metadata_hash": metadata_hash,
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "etfs": etfs,
+    }
+
+
+def publish_metrics_snapshot(path: str = DEFAULT_METRICS_SNAPSHOT_PATH) -> dict:
+    """
+    Computes a fresh snapshot and writes it to disk atomically.
+
+    Args:
+        path (str, optional): The snapshot file to write.
+
+    Returns:
+        dict: The snapshot that was written.
+    """
+    snapshot = compute_metrics_snapshot()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    # Write to a temporary file first so readers never see a partial snapshot.
+    temporary_path = f"{path}.tmp-{os.getpid()}"
+    with open(temporary_path, "w") as f:
+        # Strict JSON, so that readers other than Python can parse the file.
+        json.dump(_to_strict_json(snapshot), f, allow_nan=False)
+    os.replace(temporary_path, path)
+    return snapshot
+
+
+def load_metrics_snapshot(path: str = DEFAULT_METRICS_SNAPSHOT_PATH):
+    """
+    Loads the persisted snapshot, re-reading the file only when it has changed.
+
+    Args:
+        path (str, optional): The snapshot file to read.
+
+    Returns:
+        dict or None: The snapshot, or None if it is missing, unreadable, or
+                      was written with a different schema version.
+    """
+    global _loaded_snapshot, _loaded_snapshot_mtime
+    try:
+        mtime = os.path.getmtime(path)
+        if mtime != _loaded_snapshot_mtime:
+            with open(path) as f:
+                snapshot = json.load(f)
+            if snapshot.get("schema_version") != SNAPSHOT_SCHEMA_VERSION:
+                snapshot = None
+            else:
+                for etf in snapshot["etfs"]:
+                    for field in NUMERIC_ETF_FIELDS:
+                        if field in etf and etf[field] is None:
+                            etf[field] = float("nan")
+            _loaded_snapshot, _loaded_snapshot_mtime = snapshot, mtime
+    except (OSError, ValueError):
+        _loaded_snapshot, _loaded_snapshot_mtime = None, None
+    return _loaded_snapshot
+
+
+def _to_strict_json(value):
+    """Returns a copy of a JSON-like value with NaN and infinite floats replaced by None."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _to_strict_json(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_to_strict_json(item) for item in value]
+    return value
+
+
+def is_snapshot_fresh(snapshot: dict, data_version: dict) -> bool:
+    """
+    Checks whether a snapshot was computed from the current data version.
+
+    If the current version is unknown (e.g., the database could not be
+    reached), a persisted snapshot is considered usable.
+
+    Args:
+        snapshot (dict): A snapshot as returned by `load_metrics_snapshot`.
+        data_version (dict): The result of `get_data_version`.
+
+    Returns:
+        bool: True if the snapshot can be served.
+    """
+    if data_version.get("latest_date") is None:
+        return True
+    return (
+        snapshot.get("data_as_of") == data_version["latest_date"]
+        and snapshot.get("data_revision") == data_version.get("data_revision")
+        and snapshot.get("metadata_hash") == data_version["metadata_hash"]
+    )
+
+
+def get_metrics_snapshot(path: str = DEFAULT_METRICS_SNAPSHOT_PATH) -> dict:
+    """
+    Returns up-to-date metrics for every ETF.
+
+    The persisted snapshot is served while it matches the current data version.
+    Otherwise the metrics are computed live.
+
+    Args:
+        path (str, optional): The snapshot file to read.
+
+    Returns:
+        dict: A snapshot (see `compute_metrics_snapshot`), plus a 'source' key
+              set to "snapshot" or "live".
+    """
+    snapshot = load_metrics_snapshot(path)
+    if snapshot is not None and is_snapshot_fresh(snapshot, get_data_version()):
+        return {**snapshot, "source": "snapshot"}
+
+    if snapshot is not None:
+        print(f"Metrics snapshot {snapshot.get('version')} is stale. Computing metrics live.")
+    return {**compute_metrics_snapshot(), "source": "live"}
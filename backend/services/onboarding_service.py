@@ -3,23 +3,13 @@
 """
 Service Layer for User Profile Data Management.
 
-This module acts as the data access layer for the 'profiles' table in the
-Supabase database. It encapsulates all direct database interactions (Create,
-Read, Delete) for user profiles, providing a clean and abstracted interface
-for the API routes.
+This module is the service interface for the 'profiles' table. It exposes the
+Create, Read and Delete operations on user profiles to the API routes, and
+delegates the actual storage to the configured data repository (Supabase or a
+local SQLite file, see `repository.py`).
 """
 
-import os
-from supabase import create_client
-from dotenv import load_dotenv
-
-# Load environment variables from the .env file for Supabase credentials.
-load_dotenv()
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
-# Initialize the Supabase client, which will be used for all DB operations.
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+from .repository import get_repository
 
 
 def create_profile(data: dict) -> int:
@@ -37,14 +27,7 @@ def create_profile(data: dict) -> int:
         Exception: If the database insert operation fails or returns an
                    unexpected response format.
     """
-    result = supabase.table("profiles").insert(data).execute()
-    try:
-        # The Supabase client returns a list containing the inserted record.
-        # We extract the 'id' from the first element of that list.
-        return result.data[0]["id"]
-    except (IndexError, TypeError):
-        # This guards against unexpected API responses where `data` might be empty or malformed.
-        raise Exception(f"Unexpected insert response from Supabase: {result}")
+    return get_repository().create_profile(data)
 
 
 def get_profile(profile_id: int) -> dict:
@@ -58,19 +41,7 @@ def get_profile(profile_id: int) -> dict:
         dict or None: A dictionary representing the user's profile if found,
                       otherwise None.
     """
-    result = (
-        supabase
-        .table("profiles")
-        .select("*")
-        .eq("id", profile_id)
-        # The .single() method is a Supabase helper that expects exactly one row
-        # in the result. It conveniently returns the object directly instead of a list.
-        .single()
-        .execute()
-    )
-    # The result's `data` attribute will be the profile dict if a record was found,
-    # otherwise it will be None.
-    return result.data if getattr(result, "data", None) else None
+    return get_repository().get_profile(profile_id)
 
 
 def delete_profile(profile_id: int) -> bool:
@@ -83,14 +54,4 @@ def delete_profile(profile_id: int) -> bool:
     Returns:
         bool: True if a record was successfully found and deleted, False otherwise.
     """
-    result = (
-        supabase
-        .table("profiles")
-        .delete()
-        .eq("id", profile_id)
-        .execute()
-    )
-    # The Supabase delete operation returns the deleted record(s) in the `data`
-    # attribute. We can cast this to a boolean to check if any records were
-    # actually deleted (i.e., if the list is not empty).
-    return bool(getattr(result, "data", None))
\ No newline at end of file
+    return get_repository().delete_profile(profile_id)
@@ -0,0 +1,117 @@
+# backend/services/price_aggregates.py
+
+"""
+Weekly and Monthly Close Aggregates of the Daily Price History.
+
+Long-horizon consumers, such as the 5-year statistics behind the Monte Carlo
+projection, do not need every daily close: a weekly or monthly series carries
+the same long-run return and volatility information in 5x to 20x fewer rows.
+
+The scraper therefore maintains an aggregate table next to the daily table,
+with one row per symbol, resolution and period:
+
+- 'resolution': "weekly" (weeks ending on Friday) or "monthly".
+- 'date':       The last calendar day of the period (a Friday, or the last
+                day of the month). It identifies the period, so the row of the
+                current, still incomplete period is simply overwritten as new
+                daily closes arrive.
+- 'close_price': The last daily close within the period.
+"""
+
+import numpy as np
+import pandas as pd
+
+# The supported resolutions, and the number of periods per year used to
+# annualize statistics computed at each of them.
+PERIODS_PER_YEAR = {
+    "daily": 252,
+    "weekly": 52,
+    "monthly": 12,
+}
+RESOLUTIONS = tuple(PERIODS_PER_YEAR)
+AGGREGATE_RESOLUTIONS = ("weekly", "monthly")
+
+# The pandas period frequency of each aggregate resolution.
+_PERIOD_FREQUENCIES = {
+    "weekly": "W-FRI",
+    "monthly": "M",
+}
+
+
+def aggregate_series(series: pd.Series, resolution: str) -> pd.Series:
+    """
+    Downsamples one symbol's daily closes to a coarser resolution.
+
+    Args:
+        series (pd.Series): The daily closes, indexed by a sorted DatetimeIndex.
+        resolution (str): One of `AGGREGATE_RESOLUTIONS`.
+
+    Returns:
+        pd.Series: The last close of each period, indexed by the period's end date.
+    """
+    if series.empty:
+        return series
+    periods = series.index.to_period(_PERIOD_FREQUENCIES[resolution])
+    # The input is sorted, so a day is the last of its period when the next
+    # day belongs to another period.
+    is_last = np.append(periods[1:] != periods[:-1], True)
+    return pd.Series(
+        series.to_numpy()[is_last],
+        index=pd.DatetimeIndex(periods[is_last].end_time.normalize(), name="date"),
+    )
+
+
+def compute_aggregate_rows(rows: list, resolutions=AGGREGATE_RESOLUTIONS) -> list:
+    """
+    Computes aggregate rows from daily price rows of any number of symbols.
+
+    Every period covered by `rows` gets one row per resolution. For the result
+    to be exact, `rows` must contain every daily close of each covered period,
+    starting at a period boundary (see `aggregation_start_date`).
+
+    Args:
+        rows (list): Daily price rows with 'symbol', 'date' and 'close_price'.
+        resolutions (tuple, optional): The resolutions to compute.
+
+    Returns:
+        list: Rows with 'symbol', 'resolution', 'date' and 'close_price'.
+    """
+    if not rows:
+        return []
+    frame = pd.DataFrame(rows, columns=["symbol", "date", "close_price"])
+    frame["date"] = pd.to_datetime(frame["date"])
+    frame = frame.sort_values(["symbol", "date"], kind="stable")
+    symbols = frame["symbol"].to_numpy()
+    closes = frame["close_price"].astype(float).round(2).to_numpy()
+
+    records = []
+    for resolution in resolutions:
+        periods = pd.PeriodIndex(frame["date"], freq=_PERIOD_FREQUENCIES[resolution])
+        # The last row of each (symbol, period) is where either changes next.
+        is_last = np.append((periods[1:] != periods[:-1]) | (symbols[1:] != symbols[:-1]), True)
+        period_ends = periods[is_last].end_time.strftime("%Y-%m-%d")
+        records.extend(
+            {"symbol": symbol, "resolution": resolution, "date": date, "close_price": close}
+            for symbol, date, close in zip(symbols[is_last].tolist(), period_ends.tolist(), closes[is_last].tolist())
+        )
+    return records
+
+
+def aggregation_start_date(first_changed_date) -> pd.Timestamp:
+    """
+    Returns the first day of every period affected by a change on a date.
+
+    Recomputing the aggregates from this date onwards (instead of from the
+    changed date itself) guarantees that each affected period is rebuilt from
+    all of its daily closes.
+
+    Args:
+        first_changed_date: The earliest daily date that was added or modified.
+
+    Returns:
+        pd.Timestamp: The start of that date's week or month, whichever is earlier.
+    """
+    day = pd.Timestamp(first_changed_date)
+    return min(
+        pd.Period(day, freq=frequency).start_time for frequency in _PERIOD_FREQUENCIES.values()
+    ).normalize()
@@ -0,0 +1,187 @@
+# backend/services/price_cache.py
+
+"""
+Process-Local Cache for Historical Price Series.
+
+Historical closing prices only change once a day, when the offline scraper
+(`scripts/populate_historical_data.py`) appends the latest trading session.
+Re-downloading the same one- and five-year windows from Supabase on every
+request is therefore wasted work.
+
+This module provides a bounded, thread-safe Least-Recently-Used (LRU) cache
+that holds the *full* price history of each symbol. Any `days` window can then
+be served by slicing the cached series locally. The cache is bounded by the
+number of bytes it holds rather than by the number of entries, because the
+histories of different ETFs can vary greatly in length.
+
+Invalidation is driven by a "watermark": the most recent date present in the
+database. When the watermark moves (i.e., the scraper has written new data),
+every cached series is discarded. Writes that do not move the latest date,
+such as a backfilled gap, are signalled by a new data revision instead, on
+which the caller calls `clear`.
+"""
+
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+class PriceHistoryCache:
+    """
+    A byte-bounded LRU cache mapping ETF symbols to their full price history.
+
+    Each entry is a date-indexed pd.Series of closing prices. Callers do not
+    cache symbols without any data: invalidation follows the database's latest
+    date, which does not move when rows are added for a single new symbol.
+    """
+
+    def __init__(self, max_bytes: int):
+        """
+        Args:
+            max_bytes (int): The maximum total size of all cached series, in bytes.
+                             The least recently used entries are evicted first.
+        """
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+
+        # The latest date present in the database when the cache was last validated.
+        self.watermark = None
+        # Monotonic timestamp of the last watermark check (see `should_check`).
+        self.last_checked = None
+
+        # Counters exposed through `stats()` for monitoring.
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, symbol: str):
+        """
+        Returns the cached history for a symbol, marking it as recently used.
+
+        Args:
+            symbol (str): The ETF symbol to look up.
+
+        Returns:
+            pd.Series or None: The cached series, or None on a cache miss.
+        """
+        with self._lock:
+            series = self._entries.get(symbol)
+            if series is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(symbol)
+            self.hits += 1
+            return series
+
+    def put(self, symbol: str, series: pd.Series):
+        """
+        Stores a symbol's full history, evicting old entries if necessary.
+
+        A series larger than the whole cache is not stored at all.
+
+        Args:
+            symbol (str): The ETF symbol.
+            series (pd.Series): The symbol's date-indexed closing prices.
+        """
+        size = int(series.memory_usage(index=True, deep=True))
+        with self._lock:
+            if symbol in self._entries:
+                self._remove(symbol)
+            if size > self.max_bytes:
+                return
+            # Evict the least recently used entries until the new one fits.
+            while self._entries and self._current_bytes + size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+            self._entries[symbol] = series
+            self._sizes[symbol] = size
+            self._current_bytes += size
+
+    def validate(self, latest_date):
+        """
+        Discards every entry if the database watermark has moved.
+
+        Args:
+            latest_date: The most recent date currently present in the database.
+
+        Returns:
+            bool: True if the cache was invalidated, False otherwise.
+        """
+        with self._lock:
+            if latest_date == self.watermark:
+                return False
+            self.watermark = latest_date
+            return self._clear()
+
+    def clear(self):
+        """
+        Discards every entry, keeping the watermark.
+
+        Returns:
+            bool: True if any entries were discarded.
+        """
+        with self._lock:
+            return self._clear()
+
+    def should_check(self, now: float, interval_seconds: float) -> bool:
+        """
+        Decides whether the watermark is due to be re-checked.
+
+        The check itself is cheap (a single-row query), but throttling it keeps
+        bursts of requests from each paying for an extra round-trip.
+
+        Args:
+            now (float): The current `time.monotonic()` value.
+            interval_seconds (float): The minimum time between two checks.
+
+        Returns:
+            bool: True if a check should be made now.
+        """
+        with self._lock:
+            if self.last_checked is not None and now - self.last_checked < interval_seconds:
+                return False
+            self.last_checked = now
+            return True
+
+    def stats(self) -> dict:
+        """
+        Returns a snapshot of the cache's counters and current size.
+
+        Returns:
+            dict: Hit/miss/eviction/invalidation counters, the number of cached
+                  symbols, the bytes in use, and the current watermark.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "bytes": self._current_bytes,
+                "max_bytes": self.max_bytes,
+                "watermark": str(self.watermark) if self.watermark is not None else None,
+            }
+
+    def _clear(self) -> bool:
+        """Discards every entry and counts the invalidation. The caller must hold the lock."""
+        had_entries = bool(self._entries)
+        self._entries.clear()
+        self._sizes.clear()
+        self._current_bytes = 0
+        if had_entries:
+            self.invalidations += 1
+        return had_entries
+
+    def _remove(self, symbol: str):
+        """Removes an entry and releases its bytes. The caller must hold the lock."""
+        self._entries.pop(symbol, None)
+        self._current_bytes -= self._sizes.pop(symbol, 0)
@@ -0,0 +1,152 @@
+# backend/services/price_series.py
+
+"""
+Array-Backed Price History of a Single Symbol.
+
+Price histories used to travel between the services as lists of
+`{'date': 'YYYY-MM-DD', 'close_price': ...}` dictionaries: one dict and one date
+string allocated per trading day, which every consumer then parsed back with a
+`float(p['close_price'])` comprehension.
+
+A `PriceSeries` instead holds two parallel NumPy arrays, `datetime64` dates and
+float64 closes. It is cheap to create from the cached pandas histories (no
+per-row work), can be sliced by date range in O(log n) with `searchsorted`
+(the result shares memory with the original), and computes its daily returns
+in one vectorized step.
+
+The list-of-dicts form is still what API clients expect. It is only produced
+when the series is serialized (`to_json`), and memoized from then on, so a
+series that is only used for calculations never builds it.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class PriceSeries:
+    """The closing prices of one symbol, in ascending date order."""
+
+    __slots__ = ("dates", "closes", "_json")
+
+    def __init__(self, dates, closes):
+        """
+        Args:
+            dates: The trading dates, sorted in ascending order. NumPy
+                   `datetime64` arrays are used as is; anything else is
+                   converted to `datetime64[D]`.
+            closes: The closing price for each date.
+        """
+        dates = np.asarray(dates)
+        if dates.dtype.kind != "M":
+            dates = dates.astype("datetime64[D]")
+        self.dates = dates
+        self.closes = np.asarray(closes, dtype=np.float64)
+        self._json = None
+
+    @classmethod
+    def from_series(cls, series: pd.Series) -> "PriceSeries":
+        """
+        Wraps a date-indexed pd.Series of closes, such as a cached history.
+
+        The series' arrays are reused without copying when possible.
+
+        Args:
+            series (pd.Series): The price history.
+
+        Returns:
+            PriceSeries: The new series.
+        """
+        return cls(series.index.values, series.to_numpy(dtype=np.float64))
+
+    @classmethod
+    def from_records(cls, records: list) -> "PriceSeries":
+        """
+        Builds a series from a list of `{'date', 'close_price'}` dictionaries.
+
+        Args:
+            records (list): The price rows, sorted by date.
+
+        Returns:
+            PriceSeries: The new series.
+        """
+        return cls(
+            np.array([row['date'] for row in records], dtype="datetime64[D]"),
+            np.array([row['close_price'] for row in records], dtype=np.float64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.closes)
+
+    def __repr__(self) -> str:
+        if not len(self):
+            return "PriceSeries([])"
+        first, last = np.datetime_as_string(self.dates[[0, -1]], unit="D")
+        return f"PriceSeries({len(self)} prices, {first} to {last})"
+
+    def slice(self, start_date=None, end_date=None) -> "PriceSeries":
+        """
+        Returns the prices within an inclusive date range in O(log n).
+
+        Args:
+            start_date (optional): The first date to include. Defaults to the
+                                   start of the series.
+            end_date (optional): The last date to include. Defaults to the end
+                                 of the series.
+
+        Returns:
+            PriceSeries: A view of the selected range (no prices are copied).
+        """
+        first = 0 if start_date is None else int(np.searchsorted(self.dates, self._to_date(start_date), side="left"))
+        last = len(self) if end_date is None else int(np.searchsorted(self.dates, self._to_date(end_date), side="right"))
+        return PriceSeries(self.dates[first:last], self.closes[first:last])
+
+    def take(self, positions) -> "PriceSeries":
+        """
+        Returns the prices at the given positions (e.g., after downsampling).
+
+        Args:
+            positions: Sorted integer positions into the series.
+
+        Returns:
+            PriceSeries: The selected prices.
+        """
+        return PriceSeries(self.dates[positions], self.closes[positions])
+
+    def returns(self) -> np.ndarray:
+        """
+        Computes the daily returns of the series.
+
+        Returns:
+            np.ndarray: `close_i / close_(i-1) - 1` for every price after the
+                        first (one element shorter than the series).
+        """
+        if len(self) < 2:
+            return np.empty(0)
+        return self.closes[1:] / self.closes[:-1] - 1
+
+    def date_strings(self) -> list:
+        """Returns the dates as 'YYYY-MM-DD' strings."""
+        return np.datetime_as_string(self.dates, unit="D").tolist()
+
+    def to_pandas(self) -> pd.Series:
+        """Returns the series as a date-indexed pd.Series."""
+        return pd.Series(self.closes, index=pd.DatetimeIndex(self.dates, name="date"))
+
+    def to_json(self) -> list:
+        """
+        Returns the JSON form of the series, built on first use.
+
+        Returns:
+            list: `{'date': 'YYYY-MM-DD', 'close_price': float}` dictionaries,
+                  the shape API clients have always received.
+        """
+        if self._json is None:
+            self._json = [
+                {'date': date, 'close_price': price}
+                for date, price in zip(self.date_strings(), self.closes.tolist())
+            ]
+        return self._json
+
+    def _to_date(self, value):
+        """Converts a date-like value to the unit of `self.dates` for searching."""
+        return np.datetime64(pd.Timestamp(value)).astype(self.dates.dtype)
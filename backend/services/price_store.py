@@ -0,0 +1,216 @@
+# backend/services/price_store.py
+
+"""
+Memory-Mapped Columnar Snapshot of the Historical Price Table.
+
+The production server runs several gunicorn worker processes, and any price
+data loaded into Python objects is duplicated in every one of them. This module
+defines a compact on-disk snapshot of `etf_historical_data` that all workers
+can share instead:
+
+- `dates.npy`:   the `datetime64[ns]` date of every stored price.
+- `closes.npy`:  the matching closing prices.
+- `meta.json`:   the symbol order, the offsets of each symbol's run of rows,
+                 the latest date and the creation time of the snapshot.
+
+Both arrays hold the symbols' histories back to back, each one sorted by
+date and without gaps, so a symbol's history is the contiguous range
+`offsets[i]:offsets[i + 1]` of both files. `get_series` wraps that range as
+a pd.Series without copying it.
+
+The arrays are opened with `np.load(..., mmap_mode='r')`, i.e. as `np.memmap`
+views. The operating system then serves every worker from the same page-cache
+pages: opening the store is near-instant and costs no extra memory per process.
+
+Snapshots are written by the scraper into a new versioned subdirectory, and a
+small `CURRENT` pointer file is atomically replaced to publish them. Readers
+therefore never observe a half-written snapshot.
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+# Default location of the snapshot directory, inside the backend's data folder.
+DEFAULT_PRICE_STORE_DIR = os.getenv(
+    "FINORA_PRICE_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "price_store"),
+)
+
+# The layout version written to `meta.json`. Snapshots in any other layout
+# are refused, and readers fall back to the database until the next publish.
+STORE_FORMAT = 2
+
+# The format of snapshot version names: the local time of the publish, which
+# also makes the names sort chronologically.
+VERSION_FORMAT = "%Y%m%dT%H%M%S%f"
+
+# The number of published snapshots kept on disk. Older ones are deleted, but
+# a worker that still has one mapped keeps reading it safely until it re-opens.
+SNAPSHOTS_TO_KEEP = 2
+
+
+class PriceStore:
+    """A read-only, memory-mapped view of one published price snapshot."""
+
+    __slots__ = ("path", "version", "dates", "closes", "symbols", "symbol_index", "offsets", "latest_date")
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): The directory of a single snapshot version.
+
+        Raises:
+            ValueError: If the snapshot was written in another layout.
+        """
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta.get("format") != STORE_FORMAT:
+            raise ValueError(f"Price store snapshot {os.path.basename(path)} has an unsupported layout.")
+        self.path = path
+        self.version = os.path.basename(path)
+        self.dates = np.load(os.path.join(path, "dates.npy"), mmap_mode="r")
+        self.closes = np.load(os.path.join(path, "closes.npy"), mmap_mode="r")
+        self.symbols = meta["symbols"]
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.offsets = meta["offsets"]
+        self.latest_date = meta["latest_date"]
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.symbol_index
+
+    def get_series(self, symbol: str) -> pd.Series:
+        """
+        Returns one symbol's full history as a date-indexed pd.Series.
+
+        The values and the index are read-only views of the mapped files, so
+        no price data is copied into the process.
+
+        Args:
+            symbol (str): The ETF symbol, which must be present in the store.
+
+        Returns:
+            pd.Series: The symbol's closing prices in ascending date order.
+        """
+        i = self.symbol_index[symbol]
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return pd.Series(
+            self.closes[start:end],
+            index=pd.DatetimeIndex(self.dates[start:end], name="date", copy=False),
+            copy=False,
+        )
+
+
+def open_price_store(directory: str = DEFAULT_PRICE_STORE_DIR):
+    """
+    Opens the currently published snapshot in a store directory.
+
+    Args:
+        directory (str, optional): The store directory. Defaults to
+                                   `DEFAULT_PRICE_STORE_DIR`.
+
+    Returns:
+        PriceStore or None: The mapped snapshot, or None if none is published.
+    """
+    version = read_current_version(directory)
+    if version is None:
+        return None
+    return PriceStore(os.path.join(directory, version))
+
+
+def read_current_version(directory: str = DEFAULT_PRICE_STORE_DIR):
+    """
+    Reads the name of the currently published snapshot version.
+
+    Args:
+        directory (str, optional): The store directory.
+
+    Returns:
+        str or None: The version name, or None if nothing has been published.
+    """
+    try:
+        with open(os.path.join(directory, "CURRENT")) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def version_published_at(version: str) -> datetime:
+    """
+    Returns when a snapshot version was published.
+
+    Args:
+        version (str): A version name written by `write_price_store`.
+
+    Returns:
+        datetime: The publish time, as an aware UTC datetime.
+
+    Raises:
+        ValueError: If the name is not in `VERSION_FORMAT`.
+    """
+    return datetime.strptime(version, VERSION_FORMAT).astimezone(timezone.utc)
+
+
+def write_price_store(rows: list, directory: str = DEFAULT_PRICE_STORE_DIR, dtype=np.float64) -> str:
+    """
+    Builds a columnar snapshot from price rows and publishes it atomically.
+
+    Args:
+        rows (list): Price row dictionaries with 'symbol', 'date' and 'close_price'.
+        directory (str, optional): The store directory.
+        dtype (optional): The float type of the closes. float64 keeps prices
+                          exact; float32 halves the file size.
+
+    Returns:
+        str: The version name of the published snapshot.
+    """
+    frame = pd.DataFrame(rows, columns=["symbol", "date", "close_price"])
+    frame["date"] = pd.to_datetime(frame["date"]).astype("datetime64[ns]")
+    frame["close_price"] = frame["close_price"].astype(float)
+    # One contiguous, date-sorted run of rows per symbol.
+    frame = frame.dropna(subset=["close_price"]).drop_duplicates(["symbol", "date"], keep="last")
+    frame = frame.sort_values(["symbol", "date"], kind="stable")
+    counts = frame.groupby("symbol", sort=True).size()
+    offsets = [0] + np.cumsum(counts.to_numpy()).tolist()
+
+    version = datetime.now().strftime(VERSION_FORMAT)
+    os.makedirs(directory, exist_ok=True)
+    staging = os.path.join(directory, f".staging-{version}")
+    os.makedirs(staging)
+
+    np.save(os.path.join(staging, "dates.npy"), frame["date"].to_numpy(dtype="datetime64[ns]"))
+    np.save(os.path.join(staging, "closes.npy"), np.ascontiguousarray(frame["close_price"].to_numpy(dtype=dtype)))
+    latest_date = frame["date"].max().strftime("%Y-%m-%d") if len(frame) else None
+    with open(os.path.join(staging, "meta.json"), "w") as f:
+        json.dump({
+            "format": STORE_FORMAT,
+            "symbols": list(counts.index),
+            "offsets": offsets,
+            "latest_date": latest_date,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "rows": len(frame),
+        }, f)
+
+    # Publish: move the finished snapshot into place, then atomically swap the pointer.
+    os.rename(staging, os.path.join(directory, version))
+    pointer = os.path.join(directory, f".CURRENT-{version}")
+    with open(pointer, "w") as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(directory, "CURRENT"))
+
+    _remove_old_snapshots(directory)
+    return version
+
+
+def _remove_old_snapshots(directory: str):
+    """Deletes published snapshots beyond the `SNAPSHOTS_TO_KEEP` most recent."""
+    versions = sorted(
+        name for name in os.listdir(directory)
+        if not name.startswith(".") and name != "CURRENT" and os.path.isdir(os.path.join(directory, name))
+    )
+    for version in versions[:-SNAPSHOTS_TO_KEEP]:
+        shutil.rmtree(os.path.join(directory, version), ignore_errors=True)
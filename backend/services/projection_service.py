@@ -11,9 +11,12 @@ probabilistic forecast of investment returns, rather than a single deterministic
 """
 
 import numpy as np
-from .market_service import get_historical_data_for_period, calculate_volatility, calculate_historical_return
+from .data_loader import PriceDataLoader
+from .metrics_engine import compute_universe_metrics
+from .price_aggregates import PERIODS_PER_YEAR
 
-def run_monte_carlo_simulation(portfolio: list, initial_investment: float, years: int = 20, simulations: int = 500):
+def run_monte_carlo_simulation(portfolio: list, initial_investment: float, years: int = 20, simulations: int = 500,
+                               loader: PriceDataLoader = None):
     """
     Runs a Monte Carlo simulation to project the growth of a given portfolio.
 
@@ -38,6 +41,8 @@ def run_monte_carlo_simulation(portfolio: list, initial_investment: float, years
         initial_investment (float): The starting value of the investment.
         years (int, optional): The total number of years to simulate. Defaults to 20.
         simulations (int, optional): The number of simulation runs. Defaults to 500.
+        loader (PriceDataLoader, optional): The request's price loader. Histories
+                                            it already holds are not fetched again.
 
     Returns:
         list: A list of dictionaries, each representing a projection for a specific year.
@@ -56,20 +61,26 @@ def run_monte_carlo_simulation(portfolio: list, initial_investment: float, years
     # This creates a single statistical profile for the user's diversified portfolio.
     portfolio_return = 0
     portfolio_volatility = 0
+
+    # We use 5 years of historical data to establish a stable, long-term
+    # average for return and volatility, making the simulation less sensitive
+    # to short-term market anomalies. All constituents are fetched together.
+    # Weekly closes carry the same long-run return and volatility as daily ones
+    # in a fifth of the rows, so that is the resolution used here.
+    loader = loader or PriceDataLoader()
+    price_matrix = loader.get_matrix([etf['symbol'] for etf in portfolio], 365 * 5, resolution="weekly")
+    # Compute the 5-year metrics of every constituent in a single vectorized pass.
+    constituent_metrics = compute_universe_metrics(price_matrix, periods_per_year=PERIODS_PER_YEAR["weekly"])
     
     for etf in portfolio:
         symbol = etf['symbol']
         allocation = etf['allocation'] / 100.0
-        
-        # We use 5 years of historical data to establish a stable, long-term
-        # average for return and volatility, making the simulation less sensitive
-        # to short-term market anomalies.
-        historical_data = get_historical_data_for_period(symbol, 365 * 5)
+        metrics = constituent_metrics[symbol]
         
         # Calculate annualized return and volatility for each individual ETF.
         # The historical return is divided by 5 to get the average annual return.
-        annual_return = calculate_historical_return(historical_data) / 5
-        volatility = calculate_volatility(historical_data)
+        annual_return = metrics['total_return'] / 5
+        volatility = metrics['volatility']
         
         # Add the ETF's contribution to the portfolio's overall metrics, weighted by its allocation.
         portfolio_return += allocation * (annual_return / 100)
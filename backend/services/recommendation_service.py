@@ -13,21 +13,27 @@ multi-step process:
     asset allocation model by blending predefined conservative and aggressive portfolios.
 3.  **Data-Driven Security Selection**: For each asset class in the custom model,
     it selects the "best" ETF from a predefined universe based on a weighted
-    analysis of its Sharpe ratio, volatility, and expense ratio.
+    analysis of its Sharpe ratio, volatility, and expense ratio. The candidates
+    are ranked once per metrics snapshot (see `etf_ranking.py`).
 4.  **Portfolio Assembly**: It combines the selected ETFs and allocations into a
     final, actionable investment plan.
+
+Steps 2 and 3 depend only on the risk score, the risk tolerance and the current
+metrics, so their result is memoized as a portfolio template per metrics
+version, and every template is rebuilt as soon as new metrics are loaded.
 """
 
+import threading
+
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from .market_service import (
-    get_etf_metadata_from_db, 
-    get_historical_data_for_period, 
-    calculate_volatility, 
-    calculate_sharpe_ratio,
-    calculate_historical_return
+from .chart_encoding import encode_chart_series
+from .data_loader import PriceDataLoader
+from .etf_ranking import (
+    DEFAULT_RISK_TOLERANCE, MAX_ALTERNATIVES, RISK_TOLERANCE_WEIGHTS, EtfRankingIndex, get_ranking_index
 )
+from .metrics_cache import get_universe_metrics, metrics_cache
 
 # A mapping of broad investment categories to a universe of corresponding ETF symbols.
 ETF_CATEGORIES = {
@@ -41,128 +47,321 @@ ETF_CATEGORIES = {
     "Alternatives": ["GLD", "VNQ", "IBIT", "IAU", "FBTC"],
 }
 
+# The starting risk score of each self-reported risk tolerance. Any other
+# answer starts from 5.
+BASE_RISK_SCORES = {"conservative": 3.0, "moderate": 6.0, "aggressive": 9.0}
+
+# The two allocation models that `_generate_dynamic_allocation` blends, and the
+# fixed order of their categories.
+SAFEST_PORTFOLIO = {"Bonds": 0.70, "US Large Cap": 0.20, "International Developed": 0.10}
+RISKIEST_PORTFOLIO = {"US Large Cap": 0.50, "International Developed": 0.25, "International Emerging": 0.15, "Technology": 0.10}
+ALLOCATION_CATEGORIES = list(dict.fromkeys([*SAFEST_PORTFOLIO, *RISKIEST_PORTFOLIO]))
+
+# Every score `_calculate_nuanced_risk_score` can produce: half steps from 1 to 10.
+RISK_SCORES = [1.0 + step / 2 for step in range(19)]
+
+# The number of metrics versions whose portfolio templates are kept. A batch
+# pinned to the previous ranking index keeps hitting its own templates while
+# requests already use the new ones, instead of both rebuilding in turn.
+TEMPLATE_VERSIONS_TO_KEEP = 2
+
+# The memoized portfolio templates, keyed by (metrics version, risk score, risk
+# tolerance), and the ranking index sequence number of each version they were
+# built from. See `_get_portfolio_template`.
+_templates = {}
+_template_versions = {}
+_templates_lock = threading.Lock()
+_template_hits = 0
+_template_misses = 0
+
 
 def _fetch_and_calculate_all_etf_metrics():
     """
-    Pre-computes key financial metrics for every ETF in the database.
+    Gathers key financial metrics for every ETF in the database.
 
     This is a data-intensive helper function that gathers all necessary performance
-    and risk data upfront. This prevents redundant calculations and database
-    calls later in the process.
+    and risk data upfront. The metrics come from the in-memory metrics cache,
+    which a background thread keeps in step with the published snapshot, so no
+    database query or metric calculation runs on the request path.
 
     Returns:
         dict: A dictionary where keys are ETF symbols and values are their calculated metrics.
     """
-    etf_metadata = get_etf_metadata_from_db()
-    all_metrics = {}
-
-    for etf in etf_metadata:
-        symbol = etf['symbol']
-        historical_data_1yr = get_historical_data_for_period(symbol, 365)
-        
-        # Gathers key metrics used for the selection process.
-        all_metrics[symbol] = {
-            "name": etf['name'],
-            "expense_ratio": float(etf['expense_ratio']),
-            "volatility": calculate_volatility(historical_data_1yr),
-            "sharpe_ratio": calculate_sharpe_ratio(historical_data_1yr),
-            "one_year_return": calculate_historical_return(historical_data_1yr)
-        }
-    return all_metrics
+    return _get_ranking_index().metrics
+
+def _get_ranking_index() -> EtfRankingIndex:
+    """
+    Returns the ETF ranking index of the cached metrics snapshot.
 
-def _find_best_etf_for_category(category: str, all_metrics: dict, risk_tolerance: str) -> dict:
+    The index is normally rebuilt by the metrics cache as soon as it loads a
+    new snapshot (see `_prewarm_portfolio_templates`), so this is a version
+    check and a lookup.
+
+    Returns:
+        EtfRankingIndex: The per-category rankings of the current metrics.
     """
-    Selects the best ETF for a given asset category based on a weighted score.
+    return get_ranking_index(get_universe_metrics(), ETF_CATEGORIES)
 
-    The scoring formula adjusts its weights based on the user's risk tolerance.
-    For example, a "conservative" user's score will more heavily favor a high
-    Sharpe ratio and low volatility.
+def _get_portfolio_template(risk_score: float, risk_tolerance: str, ranking_index: EtfRankingIndex) -> dict:
+    """
+    Returns the memoized portfolio template of a risk score and tolerance.
+
+    Everything in a recommendation except its dollar amounts and charts is
+    determined by the risk score, the risk tolerance weighting and the current
+    metrics, and `_calculate_nuanced_risk_score` only produces half-step scores.
+    The few possible portfolios are therefore assembled once per metrics
+    version and shared by every request. The templates of the
+    `TEMPLATE_VERSIONS_TO_KEEP` most recent versions are kept: a newer version
+    evicts the oldest one, while a version older than every kept one (e.g., of
+    a long batch still pinned to it) is served without being cached, so that
+    it never evicts the current templates.
 
     Args:
-        category (str): The asset category (e.g., "US Large Cap").
-        all_metrics (dict): The dictionary of pre-computed metrics for all ETFs.
+        risk_score (float): The nuanced risk score from 1-10.
         risk_tolerance (str): The user's self-reported risk tolerance.
+        ranking_index (EtfRankingIndex): The rankings of the current metrics.
 
     Returns:
-        dict or None: The data for the highest-scoring ETF in the category, or None if none are found.
-    """
-    symbols_in_category = ETF_CATEGORIES.get(category, [])
-    candidate_etfs = {s: m for s, m in all_metrics.items() if s in symbols_in_category}
-    if not candidate_etfs: return None
-
-    # Define the weights for the scoring formula based on risk tolerance.
-    # Note: Volatility and expense are negative because lower is better.
-    if risk_tolerance == "conservative": weights = {"sharpe": 0.6, "volatility": -0.3, "expense": -0.1}
-    elif risk_tolerance == "aggressive": weights = {"sharpe": 0.8, "volatility": -0.1, "expense": -0.1}
-    else: weights = {"sharpe": 0.7, "volatility": -0.2, "expense": -0.1} # Moderate
-    
-    best_etf, max_score = None, -float('inf')
-    for symbol, metrics in candidate_etfs.items():
-        # The weighted score combines risk-adjusted return (Sharpe), risk (volatility), and cost (expense).
-        score = (metrics['sharpe_ratio'] * weights['sharpe'] + metrics['volatility'] * weights['volatility'] + metrics['expense_ratio'] * weights['expense'])
-        if score > max_score:
-            max_score, best_etf = score, {"symbol": symbol, **metrics}
-    return best_etf
-
-def generate_recommendation(profile: dict) -> dict:
+        dict: The template's 'expected_annual_return' and its 'holdings', each
+              with the selected ETF, its category, allocation 'percentage' and
+              up to `MAX_ALTERNATIVES` runners-up. Templates are shared and must
+              not be modified.
     """
-    The main orchestrator function to generate a personalized recommendation.
+    global _templates
+    global _template_hits, _template_misses
+    # Every unrecognized tolerance selects ETFs with the same weights.
+    if risk_tolerance not in RISK_TOLERANCE_WEIGHTS:
+        risk_tolerance = DEFAULT_RISK_TOLERANCE
+    version = ranking_index.version
+    key = (version, risk_score, risk_tolerance)
+    with _templates_lock:
+        if version not in _template_versions:
+            if (len(_template_versions) >= TEMPLATE_VERSIONS_TO_KEEP
+                    and ranking_index.sequence < min(_template_versions.values())):
+                _template_misses += 1
+                return _build_portfolio_template(risk_score, risk_tolerance, ranking_index)
+            # A newer metrics version evicts the templates of the oldest one kept.
+            _template_versions[version] = ranking_index.sequence
+            if len(_template_versions) > TEMPLATE_VERSIONS_TO_KEEP:
+                evicted = min(_template_versions, key=_template_versions.get)
+                del _template_versions[evicted]
+                _templates = {cached: template for cached, template in _templates.items() if cached[0] != evicted}
+        template = _templates.get(key)
+        if template is None:
+            _template_misses += 1
+            template = _build_portfolio_template(risk_score, risk_tolerance, ranking_index)
+            _templates[key] = template
+        else:
+            _template_hits += 1
+    return template
 
-    This function executes the full recommendation pipeline: calculating a risk score,
-    generating a dynamic asset allocation, selecting the best ETF for each allocation,
-    and assembling the final portfolio object.
+def _build_portfolio_template(risk_score: float, risk_tolerance: str, ranking_index: EtfRankingIndex) -> dict:
+    """
+    Assembles the allocation and ETF selection of a risk score and tolerance.
 
     Args:
-        profile (dict): The user's financial profile from the onboarding process.
+        risk_score (float): The nuanced risk score from 1-10.
+        risk_tolerance (str): A key of `RISK_TOLERANCE_WEIGHTS`.
+        ranking_index (EtfRankingIndex): The rankings of the current metrics.
 
     Returns:
-        dict: A comprehensive dictionary containing the full recommendation details.
+        dict: See `_get_portfolio_template`.
     """
-    # 1. Analyze the user's profile to get a holistic risk score.
-    risk_score = _calculate_nuanced_risk_score(profile)
-    # 2. Generate a custom asset allocation based on the risk score.
+    # 1. Generate a custom asset allocation based on the risk score.
     dynamic_allocation_model = _generate_dynamic_allocation(risk_score)
-    # 3. Fetch and calculate metrics for all available ETFs.
-    all_etf_metrics = _fetch_and_calculate_all_etf_metrics()
-    
-    # 4. Build the final portfolio by selecting the best ETF for each asset class.
-    recommended_portfolio = []
-    investment_amount = profile.get("investment_amount", 0)
-    risk_tolerance = profile.get("risk_tolerance")
 
+    # 2. Select the best ETF for each asset class. The ranking index holds each
+    # category's candidates sorted by score.
+    holdings = []
     for category, percentage in dynamic_allocation_model.items():
-        best_etf = _find_best_etf_for_category(category, all_etf_metrics, risk_tolerance)
-        if best_etf:
-            # Also fetch the 1-year historical data for the selected ETF to be used
-            # for charting in the frontend.
-            chart_data = get_historical_data_for_period(best_etf['symbol'], 365)
-
-            recommended_portfolio.append({
+        ranking = ranking_index.top(category, risk_tolerance, MAX_ALTERNATIVES + 1)
+        if ranking:
+            best_etf = ranking[0]
+            holdings.append({
                 "symbol": best_etf['symbol'],
                 "name": best_etf['name'],
                 "category": category,
                 "allocation": round(percentage * 100),
-                "investment_amount": round(investment_amount * percentage, 2),
-                "historical_data": chart_data
+                "percentage": percentage,
+                "alternatives": [
+                    {"symbol": etf['symbol'], "name": etf['name'], "score": round(etf['score'], 4)}
+                    for etf in ranking[1:]
+                ],
             })
-            
-    # 5. Calculate the weighted average expected return of the final portfolio.
+
+    # 3. Calculate the weighted average expected return of the portfolio.
     portfolio_expected_return = 0.0
-    for etf in recommended_portfolio:
-        symbol = etf['symbol']
-        allocation_pct = etf['allocation'] / 100.0
+    for holding in holdings:
+        allocation_pct = holding['allocation'] / 100.0
         # Uses the 1-year historical return as a proxy for expected future return.
-        etf_return = all_etf_metrics.get(symbol, {}).get('one_year_return', 0.0)
+        etf_return = ranking_index.metrics.get(holding['symbol'], {}).get('one_year_return', 0.0)
         portfolio_expected_return += allocation_pct * etf_return
 
-    # 6. Return the complete, structured recommendation object.
+    return {"expected_annual_return": round(portfolio_expected_return, 2), "holdings": holdings}
+
+def _prewarm_portfolio_templates(snapshot: dict):
+    """
+    Builds the ranking index and every portfolio template of a new snapshot.
+
+    Registered with the metrics cache, so it runs on the refresh thread before
+    any request is served from the new metrics.
+
+    Args:
+        snapshot (dict): The metrics snapshot that was just loaded.
+    """
+    ranking_index = get_ranking_index(snapshot, ETF_CATEGORIES)
+    for risk_score in RISK_SCORES:
+        for risk_tolerance in RISK_TOLERANCE_WEIGHTS:
+            _get_portfolio_template(risk_score, risk_tolerance, ranking_index)
+
+metrics_cache.on_refresh(_prewarm_portfolio_templates)
+
+def get_template_cache_stats() -> dict:
+    """
+    Returns the state of the process-local portfolio template cache.
+
+    Returns:
+        dict: The metrics 'versions' the templates were built from (oldest
+              first), the number of cached 'templates', and the 'hits' and
+              'misses' counters.
+    """
+    return {
+        "versions": sorted(_template_versions, key=_template_versions.get),
+        "templates": len(_templates),
+        "hits": _template_hits,
+        "misses": _template_misses,
+    }
+
+def generate_recommendation(profile: dict, chart_options: dict = None, loader: PriceDataLoader = None,
+                            alternatives: int = 0) -> dict:
+    """
+    The main orchestrator function to generate a personalized recommendation.
+
+    This function executes the full recommendation pipeline: calculating a risk score,
+    generating a dynamic asset allocation, selecting the best ETF for each allocation,
+    and assembling the final portfolio object. The allocation and selection come
+    from a memoized template (see `_get_portfolio_template`); only the dollar
+    amounts and the charts are computed per request.
+
+    Args:
+        profile (dict): The user's financial profile from the onboarding process.
+        chart_options (dict, optional): How to encode each ETF's chart data (see
+                                        `encode_chart_series`). Defaults to the
+                                        full list of `{"date", "close_price"}` records.
+        loader (PriceDataLoader, optional): The request's price loader, shared
+                                            with the projection so each history
+                                            is fetched once per request.
+        alternatives (int, optional): How many runner-up ETFs to list with each
+                                      selection, best first. Defaults to none.
+
+    Returns:
+        dict: A comprehensive dictionary containing the full recommendation details.
+    """
+    # 1. Analyze the user's profile to get a holistic risk score.
+    risk_score = _calculate_nuanced_risk_score(profile)
+    risk_tolerance = profile.get("risk_tolerance")
+    # 2. Look up the allocation and ETF selection for that score and tolerance.
+    template = _get_portfolio_template(risk_score, risk_tolerance, _get_ranking_index())
+
+    # 3. Scale the template to the user's investment and attach the charts.
+    recommended_portfolio = []
+    investment_amount = profile.get("investment_amount", 0)
+    loader = loader or PriceDataLoader()
+    # The histories of every selected ETF are fetched together on the first read.
+    loader.prime([holding['symbol'] for holding in template['holdings']])
+
+    for holding in template['holdings']:
+        # Also fetch the 1-year historical data for the selected ETF to be used
+        # for charting in the frontend.
+        chart_data = encode_chart_series(
+            loader.get_series(holding['symbol'], 365), **(chart_options or {})
+        )
+
+        entry = {
+            "symbol": holding['symbol'],
+            "name": holding['name'],
+            "category": holding['category'],
+            "allocation": holding['allocation'],
+            "investment_amount": round(investment_amount * holding['percentage'], 2),
+            "historical_data": chart_data
+        }
+        if alternatives:
+            entry["alternatives"] = holding['alternatives'][:alternatives]
+        recommended_portfolio.append(entry)
+
+    # 4. Return the complete, structured recommendation object.
     return {
         "nuanced_risk_score": round(risk_score, 2),
         "risk_tolerance_original": risk_tolerance,
-        "expected_annual_return": round(portfolio_expected_return, 2),
+        "expected_annual_return": template['expected_annual_return'],
         "recommended_portfolio": recommended_portfolio
     }
 
+def generate_batch_recommendations(profiles: list, alternatives: int = 0, ranking_index: EtfRankingIndex = None) -> list:
+    """
+    Generates the recommendations of many profiles at once, without charts.
+
+    The risk scores and allocation blends of the whole batch are computed as
+    NumPy arrays, every profile is matched against the same metrics snapshot,
+    and the ETF selection of each distinct (risk score, tolerance) pair comes
+    from its portfolio template. Each result equals the one `generate_recommendation`
+    returns for the profile, minus the `historical_data` charts.
+
+    Args:
+        profiles (list): The users' financial profiles (snake_case keys).
+        alternatives (int, optional): How many runner-up ETFs to list with each
+                                      selection, best first. Defaults to none.
+        ranking_index (EtfRankingIndex, optional): The rankings to select from,
+                                                   so that several batches can
+                                                   share one snapshot. Defaults
+                                                   to the current metrics.
+
+    Returns:
+        list: One recommendation dictionary per profile, in the same order.
+    """
+    if not profiles:
+        return []
+    ranking_index = ranking_index or _get_ranking_index()
+
+    # 1. Score every profile and blend every allocation in a few array operations.
+    risk_scores = _calculate_nuanced_risk_scores(profiles)
+    allocations = _generate_dynamic_allocations(risk_scores)
+    investment_amounts = np.array([profile.get("investment_amount", 0) for profile in profiles], dtype=np.float64)
+    dollar_amounts = investment_amounts[:, None] * allocations
+    columns = {category: column for column, category in enumerate(ALLOCATION_CATEGORIES)}
+
+    # 2. Assemble each recommendation from its template. A batch only has a
+    # few distinct keys, so each template is looked up once.
+    templates = {}
+    recommendations = []
+    for row, (profile, risk_score) in enumerate(zip(profiles, risk_scores.tolist())):
+        risk_tolerance = profile.get("risk_tolerance")
+        key = (risk_score, risk_tolerance)
+        template = templates.get(key)
+        if template is None:
+            template = templates[key] = _get_portfolio_template(risk_score, risk_tolerance, ranking_index)
+
+        recommended_portfolio = []
+        for holding in template['holdings']:
+            entry = {
+                "symbol": holding['symbol'],
+                "name": holding['name'],
+                "category": holding['category'],
+                "allocation": holding['allocation'],
+                "investment_amount": round(float(dollar_amounts[row, columns[holding['category']]]), 2),
+            }
+            if alternatives:
+                entry["alternatives"] = holding['alternatives'][:alternatives]
+            recommended_portfolio.append(entry)
+
+        recommendations.append({
+            "nuanced_risk_score": round(risk_score, 2),
+            "risk_tolerance_original": risk_tolerance,
+            "expected_annual_return": template['expected_annual_return'],
+            "recommended_portfolio": recommended_portfolio
+        })
+    return recommendations
+
 def _calculate_nuanced_risk_score(profile: dict) -> float:
     """
     Calculates a holistic risk score for a user on a scale of 1-10.
@@ -178,30 +377,48 @@ def _calculate_nuanced_risk_score(profile: dict) -> float:
     Returns:
         float: A nuanced risk score between 1.0 (most conservative) and 10.0 (most aggressive).
     """
-    base_score = {"conservative": 3.0, "moderate": 6.0, "aggressive": 9.0}.get(profile.get("risk_tolerance"), 5.0)
-    adjustment = 0.0
-    
+    return float(_calculate_nuanced_risk_scores([profile])[0])
+
+def _calculate_nuanced_risk_scores(profiles: list) -> np.ndarray:
+    """
+    Calculates the risk scores of many profiles at once (see `_calculate_nuanced_risk_score`).
+
+    Each rule is applied to a whole column of profile values, so scoring a
+    large batch costs a handful of array operations.
+
+    Args:
+        profiles (list): The users' financial profiles.
+
+    Returns:
+        np.ndarray: One risk score between 1.0 and 10.0 per profile.
+    """
+    tolerances = [profile.get("risk_tolerance") for profile in profiles]
+    base_score = np.array([BASE_RISK_SCORES.get(tolerance, 5.0) for tolerance in tolerances], dtype=np.float64)
+    adjustment = np.zeros(len(profiles))
+
     # Adjust score based on age and time horizon (risk capacity).
-    age = profile.get("age", 40)
-    if age < 30: adjustment += 1.0 # Younger investors have more time to recover from downturns.
-    elif age > 50: adjustment -= 1.0 # Older investors should generally take less risk.
-    
-    time_horizon = profile.get("time_horizon", "medium")
-    if time_horizon == "long": adjustment += 1.0 # A longer timeline allows for more risk.
-    elif time_horizon == "short": adjustment -= 1.0 # A shorter timeline requires more caution.
-    
+    age = np.array([profile.get("age", 40) for profile in profiles], dtype=np.float64)
+    adjustment += np.where(age < 30, 1.0, 0.0) # Younger investors have more time to recover from downturns.
+    adjustment -= np.where(age > 50, 1.0, 0.0) # Older investors should generally take less risk.
+
+    time_horizon = np.array([profile.get("time_horizon", "medium") for profile in profiles], dtype=object)
+    adjustment += np.where(time_horizon == "long", 1.0, 0.0) # A longer timeline allows for more risk.
+    adjustment -= np.where(time_horizon == "short", 1.0, 0.0) # A shorter timeline requires more caution.
+
     # Adjust score based on financial situation and experience.
-    investment_amount = profile.get("investment_amount", 0)
-    income = profile.get("income", 0)
-    if income > 0 and (investment_amount / income) > 0.20: adjustment -= 1.0 # Investing a large portion of income suggests less capacity for loss.
-    
-    experience = profile.get("experience", "intermediate")
-    if experience == "advanced": adjustment += 0.5 # More experienced investors may be comfortable with more risk.
-    elif experience == "beginner": adjustment -= 0.5 # Beginners should be introduced to risk more gradually.
-    
+    investment_amount = np.array([profile.get("investment_amount", 0) for profile in profiles], dtype=np.float64)
+    income = np.array([profile.get("income", 0) for profile in profiles], dtype=np.float64)
+    # Investing a large portion of income suggests less capacity for loss.
+    income_share = np.divide(investment_amount, income, out=np.zeros(len(profiles)), where=income > 0)
+    adjustment -= np.where(income_share > 0.20, 1.0, 0.0)
+
+    experience = np.array([profile.get("experience", "intermediate") for profile in profiles], dtype=object)
+    adjustment += np.where(experience == "advanced", 0.5, 0.0) # More experienced investors may be comfortable with more risk.
+    adjustment -= np.where(experience == "beginner", 0.5, 0.0) # Beginners should be introduced to risk more gradually.
+
     final_score = base_score + adjustment
     # Clamp the final score to be within the 1-10 range.
-    return max(1.0, min(10.0, final_score))
+    return np.clip(final_score, 1.0, 10.0)
 
 def _generate_dynamic_allocation(risk_score: float) -> dict:
     """
@@ -217,23 +434,30 @@ def _generate_dynamic_allocation(risk_score: float) -> dict:
     Returns:
         dict: A dictionary representing the custom asset allocation model (e.g., {"Bonds": 0.5, ...}).
     """
-    safest_portfolio = {"Bonds": 0.70, "US Large Cap": 0.20, "International Developed": 0.10}
-    riskiest_portfolio = {"US Large Cap": 0.50, "International Developed": 0.25, "International Emerging": 0.15, "Technology": 0.10}
-    
-    # Convert the 1-10 risk score to a 0.0-1.0 percentage.
-    risk_percent = (risk_score - 1) / 9.0
-    
-    final_allocation = {}
-    all_categories = set(safest_portfolio.keys()) | set(riskiest_portfolio.keys())
-    
+    weights = _generate_dynamic_allocations(np.array([risk_score], dtype=np.float64))[0]
+    return {category: float(pct) for category, pct in zip(ALLOCATION_CATEGORIES, weights) if pct > 0}
+
+def _generate_dynamic_allocations(risk_scores: np.ndarray) -> np.ndarray:
+    """
+    Blends the allocation models of many risk scores at once (see `_generate_dynamic_allocation`).
+
+    Args:
+        risk_scores (np.ndarray): The users' risk scores from 1-10.
+
+    Returns:
+        np.ndarray: A (profile x category) matrix of allocation weights, with
+                    columns in `ALLOCATION_CATEGORIES` order. Each row sums to
+                    1, and categories without a positive weight are 0.
+    """
+    safest_portfolio = np.array([SAFEST_PORTFOLIO.get(category, 0) for category in ALLOCATION_CATEGORIES])
+    riskiest_portfolio = np.array([RISKIEST_PORTFOLIO.get(category, 0) for category in ALLOCATION_CATEGORIES])
+
+    # Convert the 1-10 risk scores to 0.0-1.0 percentages.
+    risk_percent = (np.asarray(risk_scores, dtype=np.float64)[:, None] - 1) / 9.0
+
     # Linearly interpolate the percentage for each asset class.
-    for category in all_categories:
-        safe_pct = safest_portfolio.get(category, 0)
-        risky_pct = riskiest_portfolio.get(category, 0)
-        final_pct = safe_pct + (risky_pct - safe_pct) * risk_percent
-        if final_pct > 0:
-            final_allocation[category] = final_pct
-            
+    final_allocation = safest_portfolio + (riskiest_portfolio - safest_portfolio) * risk_percent
+    final_allocation = np.where(final_allocation > 0, final_allocation, 0.0)
+
     # Normalize the final allocation to ensure it sums to 100%.
-    total_pct = sum(final_allocation.values())
-    return {category: pct / total_pct for category, pct in final_allocation.items()}
\ No newline at end of file
+    return final_allocation / final_allocation.sum(axis=1, keepdims=True)
@@ -0,0 +1,670 @@
+# backend/services/repository.py
+
+"""
+Data Access Layer for ETF Metadata, Price History and User Profiles.
+
+Every other part of the backend (services and admin scripts) reads and writes
+persistent data exclusively through the `MarketDataRepository` interface
+defined here. This keeps database-specific query code in one place and makes
+the storage backend pluggable:
+
+- `SupabaseRepository`: The production backend, talking to Supabase's
+  PostgREST API over HTTP.
+- `SQLiteRepository`: A local, embedded backend stored in a single file. It
+  serves reads from local disk at a fraction of the latency of a network round
+  trip, and allows the whole backend (and its benchmarks) to run offline.
+
+The active backend is chosen with the `FINORA_DATA_BACKEND` environment variable
+("supabase" by default, or "sqlite") and obtained via `get_repository()`.
+"""
+
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Maximum number of symbols placed in a single `in_()` filter. This keeps the
+# generated PostgREST URL comfortably below common proxy length limits.
+SYMBOL_CHUNK_SIZE = 50
+
+# How far back the chunked latest-price fallback looks for a symbol's latest
+# close. A couple of weeks comfortably covers weekends and market holidays.
+LATEST_PRICE_LOOKBACK_DAYS = 14
+
+# Number of rows requested per page when paging through historical prices.
+# This matches the default `max-rows` setting of Supabase's PostgREST API.
+HISTORY_PAGE_SIZE = 1000
+
+# The database function used by `SupabaseRepository.get_latest_prices` to fetch
+# the latest close for many symbols in one round-trip. Run this once in the
+# Supabase SQL editor; until it exists, the repository falls back to chunked
+# `in_()` queries.
+LATEST_PRICES_RPC_SQL = """
+create or replace function get_latest_prices(symbols text[])
+returns table (symbol text, date date, close_price numeric)
+language sql stable as $$
+    select distinct on (h.symbol) h.symbol, h.date, h.close_price
+    from etf_historical_data h
+    where h.symbol = any(symbols)
+    order by h.symbol, h.date desc
+$$;
+"""
+
+# The table of weekly and monthly close aggregates maintained by the scraper
+# (see `services/price_aggregates.py`). Run this once in the Supabase SQL editor.
+PRICE_AGGREGATES_TABLE_SQL = """
+create table if not exists etf_price_aggregates (
+    symbol text not null,
+    resolution text not null,
+    date date not null,
+    close_price numeric not null,
+    primary key (symbol, resolution, date)
+);
+"""
+
+# Default location of the local SQLite database file.
+DEFAULT_SQLITE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "finora.sqlite3")
+
+
+class MarketDataRepository(ABC):
+    """
+    The interface every storage backend must implement.
+
+    Dates are always exchanged as 'YYYY-MM-DD' strings and price rows as
+    dictionaries with 'symbol', 'date' and 'close_price' keys, matching the
+    shape of the Supabase tables.
+    """
+
+    # --- ETF Metadata ---
+
+    @abstractmethod
+    def get_etf_metadata(self) -> list:
+        """Returns every ETF as a dict with 'symbol', 'name' and 'expense_ratio'."""
+
+    @abstractmethod
+    def add_etf(self, symbol: str, name: str, expense_ratio: float) -> bool:
+        """Inserts a new ETF. Returns True if a record was created."""
+
+    @abstractmethod
+    def update_etf(self, symbol: str, fields: dict) -> bool:
+        """Updates the given fields of an ETF. Returns True if a record matched."""
+
+    @abstractmethod
+    def delete_etf(self, symbol: str) -> bool:
+        """Deletes an ETF's metadata. Returns True if a record was deleted."""
+
+    @abstractmethod
+    def upsert_etfs(self, records: list):
+        """Inserts ETFs in bulk, replacing the name and expense ratio of symbols that already exist."""
+
+    # --- Price History ---
+
+    @abstractmethod
+    def get_latest_prices(self, symbols: list) -> list:
+        """Returns the most recent price row for each symbol that has data."""
+
+    @abstractmethod
+    def get_price_rows(self, symbols: list, start_date: str = None) -> list:
+        """Returns price rows for the symbols, on or after `start_date` if given, sorted by date."""
+
+    @abstractmethod
+    def get_latest_date(self, symbol: str = None):
+        """Returns the most recent date stored for a symbol (or for any symbol), or None."""
+
+    @abstractmethod
+    def get_earliest_date(self, symbol: str):
+        """Returns the oldest date stored for a symbol, or None."""
+
+    @abstractmethod
+    def get_latest_dates(self, symbols: list) -> dict:
+        """Returns the most recent stored date of each symbol that has data, in one grouped query."""
+
+    @abstractmethod
+    def upsert_prices(self, records: list):
+        """Inserts price rows, replacing existing rows with the same (symbol, date)."""
+
+    @abstractmethod
+    def delete_price_range(self, symbol: str, start_date: str, end_date: str) -> int:
+        """Deletes a symbol's price rows between two dates (inclusive). Returns the number of rows deleted."""
+
+    @abstractmethod
+    def delete_price_history(self, symbol: str):
+        """Deletes every price row (and aggregate row) for a symbol."""
+
+    @abstractmethod
+    def get_aggregate_rows(self, symbols: list, resolution: str, start_date: str = None) -> list:
+        """Returns the 'weekly' or 'monthly' aggregate rows of the symbols, on or after `start_date` if given, sorted by date."""
+
+    @abstractmethod
+    def upsert_aggregates(self, records: list):
+        """Inserts aggregate rows, replacing existing rows with the same (symbol, resolution, date)."""
+
+    # --- User Profiles ---
+
+    @abstractmethod
+    def create_profile(self, data: dict) -> int:
+        """Inserts a profile and returns its new ID."""
+
+    @abstractmethod
+    def get_profile(self, profile_id: int):
+        """Returns a profile as a dict, or None if it does not exist."""
+
+    @abstractmethod
+    def delete_profile(self, profile_id: int) -> bool:
+        """Deletes a profile. Returns True if a record was deleted."""
+
+
+class SupabaseRepository(MarketDataRepository):
+    """A repository backed by the Supabase (PostgREST) API."""
+
+    def __init__(self, url: str = None, key: str = None):
+        """
+        Args:
+            url (str, optional): The Supabase project URL. Defaults to $SUPABASE_URL.
+            key (str, optional): The Supabase API key. Defaults to $SUPABASE_KEY.
+
+        Raises:
+            ValueError: If the credentials are missing.
+        """
+        # Imported lazily so the local backend works without the supabase package.
+        from supabase import create_client
+
+        url = url or os.getenv("SUPABASE_URL")
+        key = key or os.getenv("SUPABASE_KEY")
+        if not all([url, key]):
+            raise ValueError("Supabase credentials must be set in .env file")
+        self.client = create_client(url, key)
+
+    # --- ETF Metadata ---
+
+    def get_etf_metadata(self) -> list:
+        response = self.client.table('etfs').select('symbol, name, expense_ratio').execute()
+        return response.data if response.data else []
+
+    def add_etf(self, symbol: str, name: str, expense_ratio: float) -> bool:
+        response = self.client.table('etfs').insert({
+            'symbol': symbol,
+            'name': name,
+            'expense_ratio': expense_ratio
+        }).execute()
+        return bool(response.data)
+
+    def update_etf(self, symbol: str, fields: dict) -> bool:
+        response = self.client.table('etfs').update(fields).eq('symbol', symbol).execute()
+        return bool(response.data)
+
+    def delete_etf(self, symbol: str) -> bool:
+        # The response data contains the deleted record, or is empty if none matched.
+        response = self.client.table('etfs').delete().eq('symbol', symbol).execute()
+        return bool(response.data)
+
+    def upsert_etfs(self, records: list):
+        if records:
+            self.client.table('etfs').upsert(records).execute()
+
+    # --- Price History ---
+
+    def get_latest_prices(self, symbols: list) -> list:
+        """
+        Resolves the latest close for the whole list in a single round-trip by
+        calling the `get_latest_prices` database function (see
+        `LATEST_PRICES_RPC_SQL`). If that function has not been deployed, it
+        falls back to `_get_latest_prices_chunked`.
+        """
+        if not symbols:
+            return []
+        try:
+            response = self.client.rpc('get_latest_prices', {'symbols': list(symbols)}).execute()
+            return response.data or []
+        except Exception as e:
+            print(f"Bulk latest-price RPC unavailable ({e}). Falling back to chunked queries.")
+            return self._get_latest_prices_chunked(symbols)
+
+    def _get_latest_prices_chunked(self, symbols: list) -> list:
+        """
+        Fallback for `get_latest_prices` that uses `in_()` filters.
+
+        Symbols are split into chunks so the query URL stays well within PostgREST
+        limits. Each chunk fetches only the last `LATEST_PRICE_LOOKBACK_DAYS` of rows
+        (newest first) and keeps the first row seen per symbol. Any symbol without a
+        row in that window (e.g., a delisted ETF) is looked up individually.
+        """
+        cutoff = (datetime.now().date() - timedelta(days=LATEST_PRICE_LOOKBACK_DAYS)).strftime('%Y-%m-%d')
+        latest_rows = {}
+
+        for i in range(0, len(symbols), SYMBOL_CHUNK_SIZE):
+            chunk = symbols[i:i + SYMBOL_CHUNK_SIZE]
+            response = self.client.table('etf_historical_data') \
+                .select('symbol, date, close_price') \
+                .in_('symbol', chunk) \
+                .gte('date', cutoff) \
+                .order('date', desc=True) \
+                .execute()
+            # Rows arrive newest first, so the first row per symbol is its latest close.
+            for row in response.data or []:
+                latest_rows.setdefault(row['symbol'], row)
+
+        # Symbols that have not traded within the lookback window are rare, so a
+        # targeted per-symbol query is acceptable for them.
+        for symbol in symbols:
+            if symbol in latest_rows:
+                continue
+            response = self.client.table('etf_historical_data') \
+                .select('symbol, date, close_price') \
+                .eq('symbol', symbol) \
+                .order('date', desc=True) \
+                .limit(1) \
+                .execute()
+            if response.data:
+                latest_rows[symbol] = response.data[0]
+
+        return list(latest_rows.values())
+
+    def get_price_rows(self, symbols: list, start_date: str = None) -> list:
+        """
+        The rows for up to `SYMBOL_CHUNK_SIZE` symbols are fetched together using
+        an `in_()` filter and paged through in blocks of `HISTORY_PAGE_SIZE`, so
+        the number of round-trips depends on the volume of data, not on the
+        number of symbols.
+        """
+        return self._get_paged_rows('etf_historical_data', symbols, start_date)
+
+    def _get_paged_rows(self, table: str, symbols: list, start_date: str = None, filters: dict = None) -> list:
+        """Pages through the (symbol, date, close_price) rows of a price table, see `get_price_rows`."""
+        rows = []
+        for i in range(0, len(symbols), SYMBOL_CHUNK_SIZE):
+            chunk = symbols[i:i + SYMBOL_CHUNK_SIZE]
+            offset = 0
+            while True:
+                query = self.client.table(table) \
+                    .select('symbol, date, close_price') \
+                    .in_('symbol', chunk)
+                for column, value in (filters or {}).items():
+                    query = query.eq(column, value)
+                if start_date:
+                    query = query.gte('date', start_date)
+                # Ordering by (date, symbol) gives every row a stable position,
+                # which is required for range-based paging to be consistent.
+                response = query \
+                    .order('date', desc=False) \
+                    .order('symbol', desc=False) \
+                    .range(offset, offset + HISTORY_PAGE_SIZE - 1) \
+                    .execute()
+                page = response.data or []
+                rows.extend(page)
+                if len(page) < HISTORY_PAGE_SIZE:
+                    break
+                offset += HISTORY_PAGE_SIZE
+        return rows
+
+    def get_latest_date(self, symbol: str = None):
+        query = self.client.table('etf_historical_data').select('date')
+        if symbol:
+            query = query.eq('symbol', symbol)
+        response = query.order('date', desc=True).limit(1).execute()
+        return response.data[0]['date'] if response.data else None
+
+    def get_earliest_date(self, symbol: str):
+        response = self.client.table('etf_historical_data') \
+            .select('date') \
+            .eq('symbol', symbol) \
+            .order('date', desc=False) \
+            .limit(1) \
+            .execute()
+        return response.data[0]['date'] if response.data else None
+
+    def get_latest_dates(self, symbols: list) -> dict:
+        """
+        The latest-price lookup already resolves the newest row of every symbol
+        in a single round-trip, so its dates are reused here.
+        """
+        return {row['symbol']: row['date'] for row in self.get_latest_prices(symbols)}
+
+    def upsert_prices(self, records: list):
+        if records:
+            self.client.table('etf_historical_data').upsert(records).execute()
+
+    def delete_price_range(self, symbol: str, start_date: str, end_date: str) -> int:
+        # The response data contains the deleted records.
+        response = self.client.table('etf_historical_data') \
+            .delete() \
+            .eq('symbol', symbol) \
+            .gte('date', start_date) \
+            .lte('date', end_date) \
+            .execute()
+        return len(response.data or [])
+
+    def delete_price_history(self, symbol: str):
+        self.client.table('etf_historical_data').delete().eq('symbol', symbol).execute()
+        self.client.table('etf_price_aggregates').delete().eq('symbol', symbol).execute()
+
+    def get_aggregate_rows(self, symbols: list, resolution: str, start_date: str = None) -> list:
+        return self._get_paged_rows('etf_price_aggregates', symbols, start_date, {'resolution': resolution})
+
+    def upsert_aggregates(self, records: list):
+        if records:
+            self.client.table('etf_price_aggregates').upsert(records).execute()
+
+    # --- User Profiles ---
+
+    def create_profile(self, data: dict) -> int:
+        result = self.client.table("profiles").insert(data).execute()
+        try:
+            # The Supabase client returns a list containing the inserted record.
+            # We extract the 'id' from the first element of that list.
+            return result.data[0]["id"]
+        except (IndexError, TypeError):
+            # This guards against unexpected API responses where `data` might be empty or malformed.
+            raise Exception(f"Unexpected insert response from Supabase: {result}")
+
+    def get_profile(self, profile_id: int):
+        result = (
+            self.client
+            .table("profiles")
+            .select("*")
+            .eq("id", profile_id)
+            # The .single() method is a Supabase helper that expects exactly one row
+            # in the result. It conveniently returns the object directly instead of a list.
+            .single()
+            .execute()
+        )
+        return result.data if getattr(result, "data", None) else None
+
+    def delete_profile(self, profile_id: int) -> bool:
+        result = (
+            self.client
+            .table("profiles")
+            .delete()
+            .eq("id", profile_id)
+            .execute()
+        )
+        # The delete operation returns the deleted record(s), so an empty list
+        # means that no profile matched the ID.
+        return bool(getattr(result, "data", None))
+
+
+class SQLiteRepository(MarketDataRepository):
+    """
+    A repository stored in a local SQLite database file.
+
+    The price table's primary key is (symbol, date), which doubles as the index
+    used by every per-symbol range query (and likewise (symbol, resolution, date)
+    for the aggregate table). A secondary index on `date` serves the
+    "latest date overall" watermark query. The database runs in WAL mode so that
+    several worker processes can read while the scraper writes.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS etfs (
+        symbol TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        expense_ratio REAL
+    );
+    CREATE TABLE IF NOT EXISTS etf_historical_data (
+        symbol TEXT NOT NULL,
+        date TEXT NOT NULL,
+        close_price REAL NOT NULL,
+        PRIMARY KEY (symbol, date)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_etf_historical_data_date ON etf_historical_data (date);
+    CREATE TABLE IF NOT EXISTS etf_price_aggregates (
+        symbol TEXT NOT NULL,
+        resolution TEXT NOT NULL,
+        date TEXT NOT NULL,
+        close_price REAL NOT NULL,
+        PRIMARY KEY (symbol, resolution, date)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS profiles (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        age INTEGER,
+        income_range TEXT,
+        investment_amount REAL,
+        time_horizon TEXT,
+        risk_tolerance TEXT,
+        investment_goals TEXT,
+        experience TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    """
+
+    def __init__(self, path: str = None):
+        """
+        Args:
+            path (str, optional): The database file. Defaults to $FINORA_SQLITE_PATH,
+                                  or `data/finora.sqlite3` inside the backend folder.
+        """
+        self.path = path or os.getenv("FINORA_SQLITE_PATH", DEFAULT_SQLITE_PATH)
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # SQLite connections cannot be shared between threads, so each thread
+        # (e.g., each request handler thread) lazily opens its own.
+        self._local = threading.local()
+        self._connect().executescript(self.SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Returns this thread's connection, opening it on first use."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.row_factory = sqlite3.Row
+            if self.path != ":memory:":
+                connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def _query(self, sql: str, params=()) -> list:
+        """Runs a read query and returns the rows as plain dictionaries."""
+        return [dict(row) for row in self._connect().execute(sql, params).fetchall()]
+
+    def _write(self, sql: str, params=()) -> int:
+        """Runs a single write statement in its own transaction and returns the affected row count."""
+        connection = self._connect()
+        with connection:
+            return connection.execute(sql, params).rowcount
+
+    # --- ETF Metadata ---
+
+    def get_etf_metadata(self) -> list:
+        return self._query("SELECT symbol, name, expense_ratio FROM etfs")
+
+    def add_etf(self, symbol: str, name: str, expense_ratio: float) -> bool:
+        return self._write(
+            "INSERT INTO etfs (symbol, name, expense_ratio) VALUES (?, ?, ?)",
+            (symbol, name, expense_ratio),
+        ) > 0
+
+    def update_etf(self, symbol: str, fields: dict) -> bool:
+        allowed = [column for column in ("name", "expense_ratio") if column in fields]
+        if not allowed:
+            return False
+        assignments = ", ".join(f"{column} = ?" for column in allowed)
+        params = [fields[column] for column in allowed] + [symbol]
+        return self._write(f"UPDATE etfs SET {assignments} WHERE symbol = ?", params) > 0
+
+    def delete_etf(self, symbol: str) -> bool:
+        return self._write("DELETE FROM etfs WHERE symbol = ?", (symbol,)) > 0
+
+    def upsert_etfs(self, records: list):
+        if not records:
+            return
+        connection = self._connect()
+        with connection:
+            connection.executemany(
+                "INSERT INTO etfs (symbol, name, expense_ratio) VALUES (?, ?, ?) "
+                "ON CONFLICT (symbol) DO UPDATE SET name = excluded.name, expense_ratio = excluded.expense_ratio",
+                [(r["symbol"], r["name"], r["expense_ratio"]) for r in records],
+            )
+
+    # --- Price History ---
+
+    def get_latest_prices(self, symbols: list) -> list:
+        if not symbols:
+            return []
+        placeholders = ", ".join("?" for _ in symbols)
+        # SQLite returns the bare columns from the row holding MAX(date) in each group.
+        return self._query(
+            f"SELECT symbol, MAX(date) AS date, close_price FROM etf_historical_data "
+            f"WHERE symbol IN ({placeholders}) GROUP BY symbol",
+            list(symbols),
+        )
+
+    def get_price_rows(self, symbols: list, start_date: str = None) -> list:
+        if not symbols:
+            return []
+        placeholders = ", ".join("?" for _ in symbols)
+        sql = f"SELECT symbol, date, close_price FROM etf_historical_data WHERE symbol IN ({placeholders})"
+        params = list(symbols)
+        if start_date:
+            sql += " AND date >= ?"
+            params.append(start_date)
+        return self._query(sql + " ORDER BY date, symbol", params)
+
+    def get_latest_date(self, symbol: str = None):
+        if symbol:
+            rows = self._query("SELECT MAX(date) AS date FROM etf_historical_data WHERE symbol = ?", (symbol,))
+        else:
+            rows = self._query("SELECT MAX(date) AS date FROM etf_historical_data")
+        return rows[0]["date"] if rows else None
+
+    def get_earliest_date(self, symbol: str):
+        rows = self._query("SELECT MIN(date) AS date FROM etf_historical_data WHERE symbol = ?", (symbol,))
+        return rows[0]["date"] if rows else None
+
+    def get_latest_dates(self, symbols: list) -> dict:
+        if not symbols:
+            return {}
+        placeholders = ", ".join("?" for _ in symbols)
+        rows = self._query(
+            f"SELECT symbol, MAX(date) AS date FROM etf_historical_data "
+            f"WHERE symbol IN ({placeholders}) GROUP BY symbol",
+            list(symbols),
+        )
+        return {row["symbol"]: row["date"] for row in rows}
+
+    def upsert_prices(self, records: list):
+        if not records:
+            return
+        connection = self._connect()
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO etf_historical_data (symbol, date, close_price) VALUES (?, ?, ?)",
+                [(r["symbol"], r["date"], r["close_price"]) for r in records],
+            )
+
+    def delete_price_range(self, symbol: str, start_date: str, end_date: str) -> int:
+        return self._write(
+            "DELETE FROM etf_historical_data WHERE symbol = ? AND date >= ? AND date <= ?",
+            (symbol, start_date, end_date),
+        )
+
+    def delete_price_history(self, symbol: str):
+        connection = self._connect()
+        with connection:
+            connection.execute("DELETE FROM etf_historical_data WHERE symbol = ?", (symbol,))
+            connection.execute("DELETE FROM etf_price_aggregates WHERE symbol = ?", (symbol,))
+
+    def get_aggregate_rows(self, symbols: list, resolution: str, start_date: str = None) -> list:
+        if not symbols:
+            return []
+        placeholders = ", ".join("?" for _ in symbols)
+        sql = (
+            f"SELECT symbol, date, close_price FROM etf_price_aggregates "
+            f"WHERE resolution = ? AND symbol IN ({placeholders})"
+        )
+        params = [resolution] + list(symbols)
+        if start_date:
+            sql += " AND date >= ?"
+            params.append(start_date)
+        return self._query(sql + " ORDER BY date, symbol", params)
+
+    def upsert_aggregates(self, records: list):
+        if not records:
+            return
+        connection = self._connect()
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO etf_price_aggregates (symbol, resolution, date, close_price) VALUES (?, ?, ?, ?)",
+                [(r["symbol"], r["resolution"], r["date"], r["close_price"]) for r in records],
+            )
+
+    # --- User Profiles ---
+
+    def create_profile(self, data: dict) -> int:
+        columns = list(data.keys())
+        placeholders = ", ".join("?" for _ in columns)
+        connection = self._connect()
+        with connection:
+            cursor = connection.execute(
+                f"INSERT INTO profiles ({', '.join(columns)}) VALUES ({placeholders})",
+                [data[column] for column in columns],
+            )
+        return cursor.lastrowid
+
+    def get_profile(self, profile_id: int):
+        rows = self._query("SELECT * FROM profiles WHERE id = ?", (profile_id,))
+        return rows[0] if rows else None
+
+    def delete_profile(self, profile_id: int) -> bool:
+        return self._write("DELETE FROM profiles WHERE id = ?", (profile_id,)) > 0
+
+
+# The repository instance shared by the whole process, created on first use.
+_repository = None
+_repository_lock = threading.Lock()
+
+
+def create_repository(backend: str = None) -> MarketDataRepository:
+    """
+    Creates a new repository for the requested storage backend.
+
+    Args:
+        backend (str, optional): "supabase" or "sqlite". Defaults to the
+                                 $FINORA_DATA_BACKEND environment variable,
+                                 or "supabase" if it is not set.
+
+    Returns:
+        MarketDataRepository: The new repository.
+
+    Raises:
+        ValueError: If the backend name is not recognized.
+    """
+    backend = (backend or os.getenv("FINORA_DATA_BACKEND", "supabase")).lower()
+    if backend == "supabase":
+        return SupabaseRepository()
+    if backend == "sqlite":
+        return SQLiteRepository()
+    raise ValueError(f"Unknown data backend '{backend}'. Expected 'supabase' or 'sqlite'.")
+
+
+def get_repository() -> MarketDataRepository:
+    """
+    Returns the process-wide repository, creating it on first use.
+
+    Returns:
+        MarketDataRepository: The configured repository.
+    """
+    global _repository
+    if _repository is None:
+        with _repository_lock:
+            if _repository is None:
+                _repository = create_repository()
+    return _repository
+
+
+def set_repository(repository: MarketDataRepository):
+    """
+    Replaces the process-wide repository (e.g., to point a script at a
+    different backend than the one configured in the environment).
+
+    Args:
+        repository (MarketDataRepository): The repository to use from now on.
+    """
+    global _repository
+    with _repository_lock:
+        _repository = repository
@@ -0,0 +1,211 @@
+# backend/services/return_index.py
+
+"""
+Prefix-Sum Index of Daily Returns for Constant-Time Window Statistics.
+
+Charts and as-of queries need metrics over many different windows of the same
+price history (1 year, YTD, 5 years, or any custom date range). Recomputing the
+daily returns of each window from scratch costs O(n) per query.
+
+A `ReturnIndex` instead stores, next to each symbol's closing prices, the
+running (prefix) sums of its daily returns and of its squared daily returns.
+The sum and sum of squares of the returns in any window are then just the
+difference of two prefix sums, which gives the mean, variance, volatility,
+Sharpe ratio and total return of any `[start, end]` range in O(1) once the
+window's endpoints are located (a binary search over the dates, O(log n)).
+
+Appending a new daily close only extends each prefix sum by one element, so
+the index is kept up to date incrementally in amortized O(1) per new close
+(see `extend_from_series`).
+"""
+
+import numpy as np
+import pandas as pd
+
+from .metrics_engine import TRADING_DAYS_PER_YEAR
+
+
+class ReturnIndex:
+    """
+    A growable, prefix-summed view of one symbol's price history.
+
+    Position 0 of both prefix sums is 0.0, and position i holds the sum over
+    the daily returns r_1..r_i, where r_i = close_i / close_(i-1) - 1.
+    """
+
+    __slots__ = ("_dates", "_closes", "_return_sums", "_squared_sums", "_size")
+
+    def __init__(self, dates, closes):
+        """
+        Args:
+            dates: The trading dates, sorted in ascending order (any type
+                   convertible to `datetime64[D]`).
+            closes: The closing price for each date.
+        """
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        closes = np.asarray(closes, dtype=np.float64)
+        self._size = len(closes)
+
+        returns = np.zeros(self._size)
+        if self._size > 1:
+            returns[1:] = closes[1:] / closes[:-1] - 1
+
+        # Arrays are over-allocated so that `append` rarely needs to copy.
+        capacity = max(self._size * 2, 16)
+        self._dates = np.empty(capacity, dtype="datetime64[D]")
+        self._closes = np.empty(capacity)
+        self._return_sums = np.empty(capacity)
+        self._squared_sums = np.empty(capacity)
+        self._dates[:self._size] = dates
+        self._closes[:self._size] = closes
+        self._return_sums[:self._size] = np.cumsum(returns)
+        self._squared_sums[:self._size] = np.cumsum(returns ** 2)
+
+    @classmethod
+    def from_series(cls, series: pd.Series) -> "ReturnIndex":
+        """
+        Builds an index from a date-indexed pd.Series of closing prices.
+
+        Args:
+            series (pd.Series): The price history, as held by the price cache.
+
+        Returns:
+            ReturnIndex: The new index.
+        """
+        return cls(series.index.values.astype("datetime64[D]"), series.to_numpy(dtype=np.float64))
+
+    def extend_from_series(self, series: pd.Series) -> bool:
+        """
+        Appends the closes of a newer copy of the history that follow `last_date`.
+
+        Only the new rows are processed, so bringing the index up to date after
+        a scrape costs O(k log n) for k new closes instead of a full rebuild.
+        The series must still start with the indexed history: the same number
+        of closes up to `last_date`, with the same first and last close.
+
+        Args:
+            series (pd.Series): The symbol's current date-indexed closes.
+
+        Returns:
+            bool: True if the index now covers the series, False if the series
+                  does not continue it (e.g., rows were backfilled or prices
+                  adjusted), in which case the index must be rebuilt.
+        """
+        if self._size == 0:
+            return False
+        known = int(series.index.searchsorted(pd.Timestamp(self.last_date), side="right"))
+        if (
+            known != self._size
+            or float(series.iloc[0]) != self._closes[0]
+            or float(series.iloc[known - 1]) != self._closes[known - 1]
+        ):
+            return False
+        new_rows = series.iloc[known:]
+        for date, close in zip(new_rows.index.values.astype("datetime64[D]"), new_rows.to_numpy(dtype=np.float64)):
+            self.append(date, close)
+        return True
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def last_date(self):
+        """The most recent date in the index, or None if it is empty."""
+        return self._dates[self._size - 1] if self._size else None
+
+    def append(self, date, close: float):
+        """
+        Adds the next daily close to the end of the index in amortized O(1).
+
+        Args:
+            date: The trading date, which must be later than `last_date`.
+            close (float): The closing price on that date.
+
+        Raises:
+            ValueError: If the date is not after the last date in the index.
+        """
+        date = np.datetime64(date, "D")
+        if self._size and date <= self._dates[self._size - 1]:
+            raise ValueError(f"Cannot append {date}: the index already ends on {self.last_date}.")
+        if self._size == len(self._closes):
+            self._grow()
+
+        i = self._size
+        if i == 0:
+            daily_return, previous_sum, previous_squares = 0.0, 0.0, 0.0
+        else:
+            daily_return = close / self._closes[i - 1] - 1
+            previous_sum, previous_squares = self._return_sums[i - 1], self._squared_sums[i - 1]
+        self._dates[i] = date
+        self._closes[i] = close
+        self._return_sums[i] = previous_sum + daily_return
+        self._squared_sums[i] = previous_squares + daily_return ** 2
+        self._size += 1
+
+    def window_statistics(self, start_date=None, end_date=None, risk_free_rate: float = 0.04) -> dict:
+        """
+        Computes return statistics over an inclusive date range in O(1).
+
+        The window uses the first close on or after `start_date` and the last
+        close on or before `end_date`, matching a query over that date range.
+
+        Args:
+            start_date (optional): The first date of the window. Defaults to the
+                                   start of the history.
+            end_date (optional): The last date of the window. Defaults to the
+                                 end of the history.
+            risk_free_rate (float, optional): The annualized risk-free rate.
+                                              Defaults to 0.04 (4%).
+
+        Returns:
+            dict: 'start_date' and 'end_date' actually used, 'count' (the number of
+                  prices), 'mean' and 'variance' of the daily returns, and the
+                  annualized 'volatility' (%), 'sharpe_ratio' and 'total_return' (%)
+                  rounded to two decimals. Windows with fewer than two prices
+                  report zero for every statistic.
+        """
+        dates = self._dates[:self._size]
+        first = 0 if start_date is None else int(np.searchsorted(dates, np.datetime64(start_date, "D"), side="left"))
+        last = self._size - 1 if end_date is None else int(np.searchsorted(dates, np.datetime64(end_date, "D"), side="right")) - 1
+        count = max(last - first + 1, 0)
+
+        result = {
+            "start_date": str(dates[first]) if count else None,
+            "end_date": str(dates[last]) if count else None,
+            "count": count,
+            "mean": 0.0,
+            "variance": 0.0,
+            "volatility": 0.0,
+            "sharpe_ratio": 0.0,
+            "total_return": 0.0,
+        }
+        if count < 2:
+            return result
+
+        # The window's returns are r_(first+1) .. r_last.
+        n = last - first
+        total = self._return_sums[last] - self._return_sums[first]
+        squares = self._squared_sums[last] - self._squared_sums[first]
+        mean = total / n
+        variance = max((squares - total * total / n) / (n - 1), 0.0) if n > 1 else 0.0
+        std = np.sqrt(variance)
+
+        start_price, end_price = self._closes[first], self._closes[last]
+        result["mean"] = float(mean)
+        result["variance"] = float(variance)
+        result["volatility"] = round(float(std * np.sqrt(TRADING_DAYS_PER_YEAR) * 100), 2)
+        if std > 0:
+            sharpe = (mean - risk_free_rate / TRADING_DAYS_PER_YEAR) / std * np.sqrt(TRADING_DAYS_PER_YEAR)
+            result["sharpe_ratio"] = round(float(sharpe), 2)
+        if start_price != 0:
+            result["total_return"] = round(float((end_price - start_price) / start_price * 100), 2)
+        return result
+
+    def _grow(self):
+        """Doubles the capacity of every backing array."""
+        capacity = max(len(self._closes) * 2, 16)
+        for name in ("_dates", "_closes", "_return_sums", "_squared_sums"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
@@ -0,0 +1,35 @@
+# backend/tests/conftest.py
+
+"""Shared pytest setup: makes the backend packages importable from the tests."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from services import market_service, repository
+from services.price_cache import PriceHistoryCache
+from services.repository import SQLiteRepository
+
+
+@pytest.fixture
+def sqlite_market(tmp_path, monkeypatch):
+    """
+    Points the market service at an empty SQLite database and a fresh price
+    cache, with no published price store and no throttling of freshness checks.
+
+    Returns:
+        SQLiteRepository: The repository, for seeding rows.
+    """
+    sqlite_repository = SQLiteRepository(str(tmp_path / "finora.sqlite3"))
+    monkeypatch.setattr(repository, "_repository", sqlite_repository)
+    monkeypatch.setattr(market_service, "price_cache", PriceHistoryCache(market_service.PRICE_CACHE_MAX_BYTES))
+    monkeypatch.setattr(market_service, "_price_store", None)
+    monkeypatch.setattr(market_service, "_data_revision", None)
+    monkeypatch.setattr(market_service, "_metadata_seen_at", None)
+    monkeypatch.setattr(market_service, "_return_indexes", {})
+    monkeypatch.setattr(market_service, "DEFAULT_PRICE_STORE_DIR", str(tmp_path / "price_store"))
+    monkeypatch.setattr(market_service, "PRICE_CACHE_CHECK_INTERVAL_SECONDS", 0)
+    return sqlite_repository
@@ -0,0 +1,42 @@
+# backend/tests/test_etf_ranking.py
+
+"""Tests for the per-category ETF ranking index."""
+
+import math
+
+from services.etf_ranking import RISK_TOLERANCE_WEIGHTS, EtfRankingIndex
+
+CATEGORIES = {"US Large Cap": ["A", "B", "C"]}
+
+
+def _etf(symbol: str, sharpe_ratio: float, volatility: float) -> dict:
+    return {"symbol": symbol, "name": f"{symbol} ETF", "price": 100.0, "ytd_return": 1.0, "expense_ratio": 0.05,
+            "one_year_return": 5.0, "volatility": volatility, "sharpe_ratio": sharpe_ratio}
+
+
+def _scan(etfs: list, weights: dict):
+    """The linear scan the index replaces: the first ETF with the highest score."""
+    best_symbol, max_score = None, -float('inf')
+    for etf in etfs:
+        score = etf['sharpe_ratio'] * weights['sharpe'] + etf['volatility'] * weights['volatility'] + etf['expense_ratio'] * weights['expense']
+        if score > max_score:
+            max_score, best_symbol = score, etf['symbol']
+    return best_symbol
+
+
+def test_etfs_with_nan_metrics_are_not_ranked():
+    # With only two closes, an ETF has neither a volatility nor a Sharpe ratio.
+    etfs = [_etf("A", math.nan, math.nan), _etf("B", 0.5, 20.0), _etf("C", 1.5, 10.0)]
+    index = EtfRankingIndex(etfs, CATEGORIES, "v1")
+
+    for tolerance, weights in RISK_TOLERANCE_WEIGHTS.items():
+        assert index.best("US Large Cap", tolerance)["symbol"] == _scan(etfs, weights) == "C"
+        assert [etf["symbol"] for etf in index.ranked("US Large Cap", tolerance)] == ["C", "B"]
+
+
+def test_a_category_without_any_finite_score_has_no_best_etf():
+    etfs = [_etf("A", math.nan, math.nan)]
+    index = EtfRankingIndex(etfs, CATEGORIES, "v1")
+
+    assert index.best("US Large Cap", "moderate") is None
+    assert _scan(etfs, RISK_TOLERANCE_WEIGHTS["moderate"]) is None
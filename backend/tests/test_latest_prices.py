@@ -0,0 +1,171 @@
+# backend/tests/test_latest_prices.py
+
+"""
+Tests for `get_latest_prices_from_db` against an in-memory Supabase stand-in.
+
+The stand-in implements just enough of the PostgREST query builder for the
+repository's latest-price queries, and records every round-trip, so both the
+bulk RPC path and the chunked `in_()` fallback can be exercised without a
+database.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from services import repository
+from services.market_service import get_latest_prices_from_db
+from services.repository import SYMBOL_CHUNK_SIZE, SupabaseRepository
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeRpcCall:
+    def __init__(self, data):
+        self.data = data
+
+    def execute(self):
+        return FakeResponse(self.data)
+
+
+class FakeQuery:
+    """A PostgREST-like query over a list of row dicts."""
+
+    def __init__(self, client, rows):
+        self.client = client
+        self.rows = rows
+        self.filters = []
+        self.ordering = None
+        self.row_limit = None
+
+    def select(self, columns):
+        self.columns = [column.strip() for column in columns.split(",")]
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row[column] == value)
+        return self
+
+    def in_(self, column, values):
+        self.client.in_sizes.append(len(values))
+        values = set(values)
+        self.filters.append(lambda row: row[column] in values)
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(lambda row: row[column] >= value)
+        return self
+
+    def order(self, column, desc=False):
+        self.ordering = (column, desc)
+        return self
+
+    def limit(self, count):
+        self.row_limit = count
+        return self
+
+    def execute(self):
+        self.client.queries += 1
+        rows = [row for row in self.rows if all(check(row) for check in self.filters)]
+        if self.ordering:
+            column, desc = self.ordering
+            rows.sort(key=lambda row: row[column], reverse=desc)
+        if self.row_limit is not None:
+            rows = rows[:self.row_limit]
+        return FakeResponse([{column: row[column] for column in self.columns} for row in rows])
+
+
+class FakeSupabaseClient:
+    """Serves `etf_historical_data` rows, with or without the `get_latest_prices` RPC."""
+
+    def __init__(self, rows, has_rpc):
+        self.rows = rows
+        self.has_rpc = has_rpc
+        self.queries = 0
+        self.rpc_calls = 0
+        self.in_sizes = []
+
+    def table(self, name):
+        assert name == "etf_historical_data"
+        return FakeQuery(self, self.rows)
+
+    def rpc(self, name, params):
+        assert name == "get_latest_prices"
+        self.rpc_calls += 1
+        if not self.has_rpc:
+            raise Exception("Could not find the function public.get_latest_prices")
+        latest = {}
+        for row in self.rows:
+            if row["symbol"] in params["symbols"] and row["date"] > latest.get(row["symbol"], {}).get("date", ""):
+                latest[row["symbol"]] = row
+        return FakeRpcCall(list(latest.values()))
+
+
+def _day(days_ago: int) -> str:
+    return (datetime.now().date() - timedelta(days=days_ago)).strftime("%Y-%m-%d")
+
+
+def _make_rows(symbols: list) -> list:
+    """Three closes per symbol, the newest one equal to 100 + the symbol's position."""
+    rows = []
+    for position, symbol in enumerate(symbols):
+        for days_ago, offset in ((3, -2.0), (2, -1.0), (1, 0.0)):
+            rows.append({"symbol": symbol, "date": _day(days_ago), "close_price": 100.0 + position + offset})
+    return rows
+
+
+@pytest.fixture
+def use_client(monkeypatch):
+    """Points the process-wide repository at a Supabase repository using a fake client."""
+    def install(client):
+        supabase_repository = SupabaseRepository.__new__(SupabaseRepository)
+        supabase_repository.client = client
+        monkeypatch.setattr(repository, "_repository", supabase_repository)
+        return client
+    return install
+
+
+def test_rpc_path_resolves_every_symbol_in_one_round_trip(use_client):
+    symbols = ["VOO", "QQQ", "BND"]
+    client = use_client(FakeSupabaseClient(_make_rows(symbols), has_rpc=True))
+
+    prices = get_latest_prices_from_db(symbols)
+
+    assert prices == {"VOO": 100.0, "QQQ": 101.0, "BND": 102.0}
+    assert client.rpc_calls == 1
+    assert client.queries == 0
+
+
+def test_fallback_uses_chunked_in_queries(use_client):
+    symbols = [f"ETF{i}" for i in range(SYMBOL_CHUNK_SIZE * 2 + 5)]
+    client = use_client(FakeSupabaseClient(_make_rows(symbols), has_rpc=False))
+
+    prices = get_latest_prices_from_db(symbols)
+
+    assert prices == {symbol: 100.0 + position for position, symbol in enumerate(symbols)}
+    assert all(isinstance(price, float) for price in prices.values())
+    # One `in_()` query per chunk, each within the chunk size, and no per-symbol lookups.
+    assert client.in_sizes == [SYMBOL_CHUNK_SIZE, SYMBOL_CHUNK_SIZE, 5]
+    assert client.queries == 3
+
+
+def test_fallback_looks_up_symbols_outside_the_lookback_window(use_client):
+    rows = _make_rows(["VOO"]) + [{"symbol": "OLD", "date": "2001-01-02", "close_price": 12.5}]
+    client = use_client(FakeSupabaseClient(rows, has_rpc=False))
+
+    prices = get_latest_prices_from_db(["VOO", "OLD", "NONE"])
+
+    # Symbols without any row are left out, as before.
+    assert prices == {"VOO": 100.0, "OLD": 12.5}
+    # One chunked query, then one targeted query for each symbol it missed.
+    assert client.queries == 3
+
+
+def test_empty_symbol_list_issues_no_query(use_client):
+    client = use_client(FakeSupabaseClient([], has_rpc=True))
+
+    assert get_latest_prices_from_db([]) == {}
+    assert client.rpc_calls == 0 and client.queries == 0
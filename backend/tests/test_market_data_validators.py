@@ -0,0 +1,62 @@
+# backend/tests/test_market_data_validators.py
+
+"""Tests for the HTTP cache validators of the market data endpoint."""
+
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from flask import Flask
+
+from routes import etfs
+from services import market_service
+from services.price_store import write_price_store
+
+ROWS = [{"symbol": "VOO", "date": "2024-06-27", "close_price": 500.0},
+        {"symbol": "VOO", "date": "2024-06-28", "close_price": 501.0}]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    versions = []
+    monkeypatch.setattr(etfs, "get_data_version", lambda: versions[-1])
+    monkeypatch.setattr(etfs, "get_metrics_snapshot", lambda: {"version": "v", "etfs": [{"symbol": "VOO"}]})
+    app = Flask(__name__)
+    app.register_blueprint(etfs.etfs_bp)
+    return app.test_client(), versions
+
+
+def test_if_modified_since_is_not_answered_with_a_stale_304_after_a_backfill(client):
+    test_client, versions = client
+    versions.append({"latest_date": "2024-06-28", "metadata_hash": "abc", "data_revision": "r1",
+                     "modified_at": datetime(2024, 6, 28, 22, 0, 0, 500000, tzinfo=timezone.utc)})
+    first = test_client.get("/api/etfs/market-data")
+    assert first.headers["Last-Modified"] == "Fri, 28 Jun 2024 22:00:01 GMT"
+    assert test_client.get("/api/etfs/market-data", headers={
+        "If-Modified-Since": first.headers["Last-Modified"]}).status_code == 304
+
+    # The gap audit republishes the same day: the latest date does not move.
+    versions.append({**versions[-1], "data_revision": "r2",
+                     "modified_at": datetime(2024, 6, 29, 9, 30, tzinfo=timezone.utc)})
+    response = test_client.get("/api/etfs/market-data", headers={"If-Modified-Since": first.headers["Last-Modified"]})
+
+    assert response.status_code == 200
+    assert response.headers["Last-Modified"] == "Sat, 29 Jun 2024 09:30:00 GMT"
+
+
+def test_modified_at_follows_the_revision_and_the_metadata(sqlite_market):
+    sqlite_market.add_etf("VOO", "Vanguard S&P 500 ETF", 0.03)
+    sqlite_market.upsert_prices(ROWS)
+    before_publish = datetime.now(timezone.utc) - timedelta(seconds=1)
+    write_price_store(ROWS, market_service.DEFAULT_PRICE_STORE_DIR)
+
+    version = market_service.get_data_version()
+    assert version["modified_at"] >= before_publish
+
+    # A metadata edit does not publish anything, but still moves 'modified_at'.
+    time.sleep(0.01)
+    sqlite_market.update_etf("VOO", {"expense_ratio": 0.04})
+    edited = market_service.get_data_version()
+
+    assert edited["metadata_hash"] != version["metadata_hash"]
+    assert edited["modified_at"] > version["modified_at"]
@@ -0,0 +1,58 @@
+# backend/tests/test_market_query.py
+
+"""Tests for the presorted market data index."""
+
+import math
+
+from services.market_query import MarketDataIndex
+
+
+ROWS = [
+    {"symbol": "VOO", "name": "Vanguard S&P 500", "sharpe_ratio": 1.6, "expense_ratio": 0.03},
+    {"symbol": "QQQ", "name": "Invesco QQQ", "sharpe_ratio": 1.9, "expense_ratio": 0.2},
+    {"symbol": "NEW", "name": "New Fund", "sharpe_ratio": float("nan"), "expense_ratio": 0.5},
+    {"symbol": "BND", "name": "Vanguard Total Bond", "sharpe_ratio": 0.1, "expense_ratio": 0.03},
+    {"symbol": "GLD", "name": "SPDR Gold", "sharpe_ratio": None, "expense_ratio": 0.4},
+]
+
+
+def _symbols(rows):
+    return [row["symbol"] for row in rows]
+
+
+def _all_pages(index, **query):
+    symbols, cursor = [], None
+    while True:
+        page, cursor = index.query(cursor=cursor, **query)
+        symbols += _symbols(page)
+        if cursor is None:
+            return symbols
+
+
+def test_sort_orders_keep_rows_without_a_value_last():
+    index = MarketDataIndex(ROWS, "v1")
+
+    assert _symbols(index.query(sort="sharpe_ratio")[0]) == ["BND", "VOO", "QQQ", "NEW", "GLD"]
+    assert _symbols(index.query(sort="sharpe_ratio", order="desc")[0]) == ["QQQ", "VOO", "BND", "NEW", "GLD"]
+
+
+def test_pages_cover_every_row_once_in_both_orders():
+    index = MarketDataIndex(ROWS, "v1")
+
+    for order in ("asc", "desc"):
+        expected = _symbols(index.query(sort="sharpe_ratio", order=order)[0])
+        for limit in (1, 2, 3):
+            assert _all_pages(index, sort="sharpe_ratio", order=order, limit=limit) == expected
+
+
+def test_top_n_with_filters_and_fields():
+    index = MarketDataIndex(ROWS, "v1")
+
+    page, cursor = index.query(sort="sharpe_ratio", order="desc", limit=1, fields=["symbol", "sharpe_ratio"],
+                               filters=[("expense_ratio", "<=", 0.1)])
+
+    assert page == [{"symbol": "VOO", "sharpe_ratio": 1.6}]
+    rest, cursor = index.query(sort="sharpe_ratio", order="desc", limit=5, cursor=cursor,
+                               filters=[("expense_ratio", "<=", 0.1)])
+    assert _symbols(rest) == ["BND"] and cursor is None
+    assert not any(isinstance(row.get("sharpe_ratio"), float) and math.isnan(row["sharpe_ratio"]) for row in page)
@@ -0,0 +1,49 @@
+# backend/tests/test_metrics_snapshot.py
+
+"""Tests for the persisted metrics snapshot file."""
+
+import json
+import math
+
+from services import metrics_snapshot
+
+
+def _snapshot() -> dict:
+    return {
+        "schema_version": metrics_snapshot.SNAPSHOT_SCHEMA_VERSION,
+        "version": "2024-06-28:20240628T220000000000:abc",
+        "data_as_of": "2024-06-28",
+        "data_revision": "20240628T220000000000",
+        "metadata_hash": "abc",
+        "generated_at": "2024-06-28T22:00:00",
+        "etfs": [
+            {"symbol": "VOO", "name": "VOO ETF", "price": 500.0, "ytd_return": 14.2, "expense_ratio": 0.03,
+             "one_year_return": 24.1, "volatility": 12.5, "sharpe_ratio": 1.6},
+            # Two prices: a single daily return, so no volatility or Sharpe ratio.
+            {"symbol": "NEW", "name": "NEW ETF", "price": 20.0, "ytd_return": 0.0, "expense_ratio": 0.1,
+             "one_year_return": 5.0, "volatility": float("nan"), "sharpe_ratio": float("nan")},
+        ],
+    }
+
+
+def _reject_constant(name):
+    raise ValueError(f"Non-standard JSON constant {name}")
+
+
+def test_published_file_is_strict_json_and_reads_back_as_nan(tmp_path, monkeypatch):
+    path = str(tmp_path / "metrics_snapshot.json")
+    monkeypatch.setattr(metrics_snapshot, "compute_metrics_snapshot", _snapshot)
+    monkeypatch.setattr(metrics_snapshot, "_loaded_snapshot_mtime", None)
+
+    published = metrics_snapshot.publish_metrics_snapshot(path)
+
+    with open(path) as f:
+        on_disk = json.loads(f.read(), parse_constant=_reject_constant)
+    assert on_disk["etfs"][1]["volatility"] is None
+    assert on_disk["etfs"][1]["sharpe_ratio"] is None
+    # The returned snapshot is the in-memory one, still holding NaN.
+    assert math.isnan(published["etfs"][1]["volatility"])
+
+    loaded = metrics_snapshot.load_metrics_snapshot(path)
+    assert math.isnan(loaded["etfs"][1]["volatility"]) and math.isnan(loaded["etfs"][1]["sharpe_ratio"])
+    assert loaded["etfs"][0] == _snapshot()["etfs"][0]
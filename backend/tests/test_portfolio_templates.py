@@ -0,0 +1,57 @@
+# backend/tests/test_portfolio_templates.py
+
+"""Tests for the memoized portfolio templates of the recommendation service."""
+
+import pytest
+
+from services import recommendation_service
+from services.etf_ranking import EtfRankingIndex
+
+
+def _ranking_index(version: str) -> EtfRankingIndex:
+    etfs = [
+        {"symbol": symbol, "name": f"{symbol} ETF", "price": 100.0, "ytd_return": 5.0, "expense_ratio": 0.05,
+         "one_year_return": 10.0 + i, "volatility": 10.0, "sharpe_ratio": 1.0}
+        for i, symbol in enumerate(["VOO", "BND", "VEA", "VWO", "QQQ"])
+    ]
+    return EtfRankingIndex(etfs, recommendation_service.ETF_CATEGORIES, version)
+
+
+@pytest.fixture
+def empty_templates(monkeypatch):
+    monkeypatch.setattr(recommendation_service, "_templates", {})
+    monkeypatch.setattr(recommendation_service, "_template_versions", {})
+
+
+def test_a_batch_on_the_previous_version_does_not_evict_the_current_templates(empty_templates):
+    old, new = _ranking_index("v1"), _ranking_index("v2")
+    old_template = recommendation_service._get_portfolio_template(5.0, "moderate", old)
+    new_template = recommendation_service._get_portfolio_template(5.0, "moderate", new)
+
+    # Requests alternate between a batch pinned to v1 and live traffic on v2.
+    for _ in range(3):
+        assert recommendation_service._get_portfolio_template(5.0, "moderate", old) is old_template
+        assert recommendation_service._get_portfolio_template(5.0, "moderate", new) is new_template
+
+
+def test_only_the_most_recent_versions_are_kept(empty_templates):
+    for version in ("v1", "v2", "v3"):
+        recommendation_service._get_portfolio_template(5.0, "moderate", _ranking_index(version))
+
+    assert recommendation_service.get_template_cache_stats()["versions"] == ["v2", "v3"]
+    assert {key[0] for key in recommendation_service._templates} == {"v2", "v3"}
+
+
+def test_a_version_older_than_every_kept_one_does_not_evict_the_current_templates(empty_templates):
+    oldest, previous, current = _ranking_index("v1"), _ranking_index("v2"), _ranking_index("v3")
+    for index in (oldest, previous, current):
+        recommendation_service._get_portfolio_template(5.0, "moderate", index)
+    current_template = recommendation_service._get_portfolio_template(5.0, "moderate", current)
+
+    # A long batch is still pinned to the oldest version.
+    for _ in range(3):
+        stale = recommendation_service._get_portfolio_template(5.0, "moderate", oldest)
+        assert stale["holdings"]
+
+    assert recommendation_service.get_template_cache_stats()["versions"] == ["v2", "v3"]
+    assert recommendation_service._get_portfolio_template(5.0, "moderate", current) is current_template
@@ -0,0 +1,64 @@
+# backend/tests/test_price_cache.py
+
+"""Tests for the invalidation of the process-local price history cache."""
+
+from datetime import datetime, timedelta
+
+from services import market_service, metrics_snapshot
+from services.price_store import write_price_store
+
+
+def _rows(symbol: str, days: int, last_days_ago: int = 1) -> list:
+    today = datetime.now().date()
+    return [
+        {"symbol": symbol, "date": (today - timedelta(days=days_ago)).strftime("%Y-%m-%d"), "close_price": 100.0 + days_ago}
+        for days_ago in range(last_days_ago + days - 1, last_days_ago - 1, -1)
+    ]
+
+
+def test_symbol_read_before_its_backfill_is_not_served_empty(sqlite_market):
+    sqlite_market.upsert_prices(_rows("VOO", 30))
+
+    # A newly added ETF is read before its history is backfilled.
+    assert market_service.get_historical_data_for_period("NEW", 365).closes.size == 0
+    assert market_service.get_historical_prices_matrix(["NEW"], 365, resolution="weekly")["NEW"].isna().all()
+
+    # The backfill does not move the latest date of the table.
+    sqlite_market.upsert_prices(_rows("NEW", 20))
+
+    assert market_service.get_historical_data_for_period("NEW", 365).closes.size == 20
+    assert market_service.get_historical_prices_matrix(["NEW"], 365, resolution="weekly")["NEW"].notna().any()
+    assert market_service.get_window_statistics("NEW")["count"] == 20
+
+
+def test_histories_are_cached_until_the_latest_date_moves(sqlite_market):
+    sqlite_market.upsert_prices(_rows("VOO", 30, last_days_ago=2))
+    first = market_service.get_price_histories(["VOO"])["VOO"]
+
+    assert market_service.get_price_histories(["VOO"])["VOO"] is first
+
+    sqlite_market.upsert_prices(_rows("VOO", 1, last_days_ago=1))
+    assert len(market_service.get_price_histories(["VOO"])["VOO"]) == 31
+
+
+def test_a_backfilled_gap_moves_the_data_version_and_clears_the_cache(sqlite_market):
+    rows = _rows("VOO", 30)
+    gap = rows.pop(10)
+    sqlite_market.upsert_prices(rows)
+    assert len(market_service.get_price_histories(["VOO"])["VOO"]) == 29
+    version = market_service.get_data_version()
+    snapshot = {"data_as_of": version["latest_date"], "data_revision": version["data_revision"],
+                "metadata_hash": version["metadata_hash"]}
+    assert metrics_snapshot.is_snapshot_fresh(snapshot, version)
+
+    # The gap audit writes the missing row, which does not move the latest
+    # date, and then publishes a new price store (here without VOO, so the
+    # history has to come from the cache or the database).
+    sqlite_market.upsert_prices([gap])
+    write_price_store(_rows("OTHER", 5), market_service.DEFAULT_PRICE_STORE_DIR)
+
+    new_version = market_service.get_data_version()
+    assert new_version["latest_date"] == version["latest_date"]
+    assert new_version["data_revision"] != version["data_revision"]
+    assert not metrics_snapshot.is_snapshot_fresh(snapshot, new_version)
+    assert len(market_service.get_price_histories(["VOO"])["VOO"]) == 30
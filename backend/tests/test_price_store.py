@@ -0,0 +1,63 @@
+# backend/tests/test_price_store.py
+
+"""Tests for the memory-mapped price store."""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.price_store import PriceStore, open_price_store, write_price_store
+
+
+ROWS = [
+    {"symbol": "VOO", "date": "2024-01-02", "close_price": 430.0},
+    {"symbol": "VOO", "date": "2024-01-03", "close_price": 431.5},
+    {"symbol": "VOO", "date": "2024-01-05", "close_price": 433.0},
+    # Listed later, and without a row for every date of the others.
+    {"symbol": "NEW", "date": "2024-01-04", "close_price": 20.0},
+    {"symbol": "NEW", "date": "2024-01-05", "close_price": 21.0},
+    {"symbol": "BND", "date": "2024-01-02", "close_price": 72.1},
+    {"symbol": "BND", "date": "2024-01-04", "close_price": 72.3},
+]
+
+
+def test_series_match_the_rows(tmp_path):
+    write_price_store(ROWS, str(tmp_path))
+    store = open_price_store(str(tmp_path))
+
+    assert store.latest_date == "2024-01-05"
+    for symbol in ("VOO", "NEW", "BND"):
+        expected = [row for row in ROWS if row["symbol"] == symbol]
+        series = store.get_series(symbol)
+        assert list(series.index.strftime("%Y-%m-%d")) == [row["date"] for row in expected]
+        assert series.tolist() == [row["close_price"] for row in expected]
+        assert series.index.name == "date"
+    assert "SPY" not in store
+
+
+def test_series_are_views_of_the_mapped_files(tmp_path):
+    write_price_store(ROWS, str(tmp_path))
+    store = open_price_store(str(tmp_path))
+
+    series = store.get_series("VOO")
+
+    assert np.shares_memory(series.to_numpy(), store.closes)
+    assert np.shares_memory(series.index.asi8, store.dates)
+    # The views are usable like any other series.
+    assert series[series.index >= pd.Timestamp("2024-01-03")].tolist() == [431.5, 433.0]
+
+
+def test_snapshots_in_another_layout_are_refused(tmp_path):
+    version = write_price_store(ROWS, str(tmp_path))
+    meta_path = os.path.join(str(tmp_path), version, "meta.json")
+    with open(meta_path) as f:
+        meta = json.load(f)
+    del meta["format"]
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+
+    with pytest.raises(ValueError):
+        PriceStore(os.path.join(str(tmp_path), version))
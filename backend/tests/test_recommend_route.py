@@ -0,0 +1,38 @@
+# backend/tests/test_recommend_route.py
+
+"""Tests for the profile validation of the single recommendation route."""
+
+import pytest
+from flask import Flask
+
+from routes import recommend
+
+PROFILE = {"age": 30, "income": 75000, "investmentAmount": 10000, "timeHorizon": "long",
+           "riskTolerance": "moderate", "experience": "intermediate"}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("An invalid profile must not reach the services.")
+
+    monkeypatch.setattr(recommend, "generate_recommendation", fail)
+    app = Flask(__name__)
+    app.register_blueprint(recommend.recommend_bp)
+    return app.test_client()
+
+
+def test_a_profile_missing_a_key_is_rejected(client):
+    profile = {key: value for key, value in PROFILE.items() if key != "income"}
+
+    response = client.post("/api/recommend", json=profile)
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Profile is missing required keys."}
+
+
+def test_a_value_of_the_wrong_type_is_a_client_error(client):
+    response = client.post("/api/recommend", json={**PROFILE, "age": "thirty"})
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Profile has a value of the wrong type."}
@@ -0,0 +1,60 @@
+# backend/tests/test_return_index.py
+
+"""Tests for the prefix-sum return index and its incremental updates."""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services import market_service
+from services.return_index import ReturnIndex
+
+
+def _history(closes, start="2024-01-01") -> pd.Series:
+    return pd.Series(closes, index=pd.DatetimeIndex(pd.bdate_range(start, periods=len(closes)), name="date"), dtype=float)
+
+
+def test_extending_matches_a_rebuild():
+    closes = 100 * np.cumprod(1 + np.random.default_rng(0).normal(0.0005, 0.01, 300))
+    full = _history(closes)
+    index = ReturnIndex.from_series(full.iloc[:250])
+
+    assert index.extend_from_series(full)
+
+    rebuilt = ReturnIndex.from_series(full)
+    assert len(index) == len(rebuilt) == 300
+    for start, end in ((None, None), ("2024-06-03", None), ("2024-03-01", "2024-09-30")):
+        extended_stats = index.window_statistics(start, end)
+        rebuilt_stats = rebuilt.window_statistics(start, end)
+        assert extended_stats.keys() == rebuilt_stats.keys()
+        for key, value in rebuilt_stats.items():
+            assert extended_stats[key] == pytest.approx(value, rel=1e-9, abs=1e-12)
+
+
+def test_a_history_that_does_not_continue_the_index_is_refused():
+    full = _history([100.0, 101.0, 102.0, 103.0, 104.0])
+    index = ReturnIndex.from_series(full.iloc[:3])
+
+    # An interior row was backfilled.
+    assert not index.extend_from_series(full.drop(full.index[1]))
+    # The closes were adjusted.
+    assert not index.extend_from_series(full * 0.5)
+    assert len(index) == 3
+
+
+def test_window_statistics_extend_the_cached_index_on_new_data(sqlite_market):
+    today = datetime.now().date()
+    rows = [
+        {"symbol": "VOO", "date": (today - timedelta(days=days_ago)).strftime("%Y-%m-%d"), "close_price": 400.0 + (days_ago % 7)}
+        for days_ago in range(60, 1, -1)
+    ]
+    sqlite_market.upsert_prices(rows)
+    index = market_service.get_return_index("VOO")
+    assert market_service.get_window_statistics("VOO")["count"] == 59
+
+    sqlite_market.upsert_prices([{"symbol": "VOO", "date": (today - timedelta(days=1)).strftime("%Y-%m-%d"), "close_price": 410.0}])
+
+    assert market_service.get_return_index("VOO") is index
+    assert market_service.get_window_statistics("VOO")["count"] == 60
@@ -0,0 +1,178 @@
+# backend/tests/test_yahoo_downloader.py
+
+"""Tests for the scraper's Yahoo Finance downloader, with `yf.Ticker` replaced by a fake."""
+
+import os
+import sys
+import threading
+from datetime import date
+
+import pandas as pd
+import pytest
+from yfinance.exceptions import YFPricesMissingError, YFTzMissingError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+import populate_historical_data as scraper
+
+
+class FakeTicker:
+    """Serves fixed closes, and waits at a barrier so that concurrent calls can be observed."""
+
+    barrier = None
+    closes = {}
+    errors = {}
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    def history(self, start, end, auto_adjust, **kwargs):
+        if FakeTicker.barrier is not None:
+            FakeTicker.barrier.wait(timeout=5)
+        if self.symbol in FakeTicker.errors:
+            raise FakeTicker.errors[self.symbol]
+        values = FakeTicker.closes.get(self.symbol, {})
+        index = pd.DatetimeIndex(list(values), tz="America/New_York")
+        return pd.DataFrame({"Close": list(values.values())}, index=index)
+
+
+@pytest.fixture
+def fake_ticker(monkeypatch):
+    monkeypatch.setattr(scraper.yf, "Ticker", FakeTicker)
+    FakeTicker.barrier = None
+    FakeTicker.errors = {}
+    FakeTicker.closes = {
+        "SPY": {"2024-01-02": 470.0, "2024-01-03": 468.0},
+        "QQQ": {"2024-01-03": 400.0},
+    }
+    return FakeTicker
+
+
+def test_closes_are_combined_into_a_date_by_symbol_frame(fake_ticker):
+    closes = scraper.YahooDownloader()(["SPY", "QQQ", "GONE"], date(2024, 1, 1), date(2024, 1, 4))
+
+    assert list(closes.columns) == ["SPY", "QQQ"]
+    assert closes.index.tz is None
+    assert list(closes.index) == [pd.Timestamp("2024-01-02"), pd.Timestamp("2024-01-03")]
+    assert closes.loc["2024-01-03", "QQQ"] == 400.0
+    assert pd.isna(closes.loc["2024-01-02", "QQQ"])
+
+
+def test_workers_download_at_the_same_time(fake_ticker):
+    # Both workers must be inside a download at once to pass the barrier; a
+    # shared lock around the downloads would make the barrier time out.
+    fake_ticker.barrier = threading.Barrier(2)
+    results = {}
+
+    def work(symbol):
+        results[symbol] = scraper.YahooDownloader()([symbol], date(2024, 1, 1), date(2024, 1, 4))
+
+    threads = [threading.Thread(target=work, args=(symbol,)) for symbol in ("SPY", "QQQ")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not fake_ticker.barrier.broken
+    assert list(results["SPY"]["SPY"]) == [470.0, 468.0]
+    assert list(results["QQQ"]["QQQ"]) == [400.0]
+
+
+def test_tickers_without_prices_are_left_out(fake_ticker):
+    # A delisted symbol has no time zone on Yahoo Finance.
+    fake_ticker.errors = {"GONE": YFPricesMissingError("GONE", ""), "DELISTED": YFTzMissingError("DELISTED")}
+
+    closes = scraper.YahooDownloader()(["SPY", "GONE", "DELISTED"], date(2024, 1, 1), date(2024, 1, 4))
+
+    assert list(closes.columns) == ["SPY"]
+
+
+def test_failed_tickers_raise_a_retryable_error(fake_ticker):
+    fake_ticker.errors = {"QQQ": ConnectionError("connection reset")}
+
+    with pytest.raises(scraper.DownloadError) as raised:
+        scraper.YahooDownloader()(["SPY", "QQQ"], date(2024, 1, 1), date(2024, 1, 4))
+
+    assert list(raised.value.errors) == ["QQQ"]
+    assert list(raised.value.closes.columns) == ["SPY"]
+    assert not isinstance(raised.value, scraper.PERMANENT_ERRORS)
+
+
+def test_json_decode_errors_are_retried(monkeypatch):
+    monkeypatch.setattr(scraper, "RETRY_BASE_DELAY_SECONDS", 0)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise ValueError("Expecting value: line 1 column 1 (char 0)")
+        return "ok"
+
+    assert scraper.call_with_retries(flaky, 3, "Download", []) == ("ok", 2)
+
+
+class FakeRepository:
+    def __init__(self):
+        self.rows = []
+
+    def upsert_prices(self, rows):
+        self.rows.extend(rows)
+
+
+def test_a_failed_download_is_retried_instead_of_journaled_as_no_data(fake_ticker, monkeypatch, tmp_path):
+    monkeypatch.setattr(scraper, "RETRY_BASE_DELAY_SECONDS", 0)
+    fake_ticker.errors = {"SPY": ConnectionError("connection reset")}
+    downloader = scraper.YahooDownloader()
+
+    def recovering_downloader(symbols, start_date, end_date):
+        try:
+            return downloader(symbols, start_date, end_date)
+        finally:
+            fake_ticker.errors = {}
+
+    repository = FakeRepository()
+    journal = scraper.RunJournal(str(tmp_path / "journal.json"), date(2024, 1, 4))
+    scraper.scrape_group(repository, recovering_downloader, ["SPY"], date(2024, 1, 1), date(2024, 1, 4),
+                         scraper.HostRateLimiter(0), scraper.PhaseTimer(), 100, journal, max_attempts=2)
+
+    assert journal.state["symbols"]["SPY"]["status"] == "done"
+    assert len(repository.rows) == 2
+
+
+def test_one_failing_ticker_does_not_fail_its_group(fake_ticker, monkeypatch, tmp_path):
+    monkeypatch.setattr(scraper, "RETRY_BASE_DELAY_SECONDS", 0)
+    fake_ticker.errors = {"QQQ": ConnectionError("connection reset"), "DELISTED": YFTzMissingError("DELISTED")}
+    downloader = scraper.YahooDownloader()
+    requested = []
+
+    def recording_downloader(symbols, start_date, end_date):
+        requested.append(list(symbols))
+        return downloader(symbols, start_date, end_date)
+
+    repository = FakeRepository()
+    journal = scraper.RunJournal(str(tmp_path / "journal.json"), date(2024, 1, 4))
+    scraper.scrape_group(repository, recording_downloader, ["SPY", "QQQ", "DELISTED"], date(2024, 1, 1),
+                         date(2024, 1, 4), scraper.HostRateLimiter(0), scraper.PhaseTimer(), 100, journal,
+                         max_attempts=3)
+
+    # Only the failing ticker is requested again, and the others keep their outcome.
+    assert requested == [["SPY", "QQQ", "DELISTED"], ["QQQ"], ["QQQ"]]
+    statuses = {symbol: entry["status"] for symbol, entry in journal.state["symbols"].items()}
+    assert statuses == {"SPY": "done", "QQQ": "failed", "DELISTED": "no_data"}
+    assert {row["symbol"] for row in repository.rows} == {"SPY"}
+
+
+class RecordingLimiter:
+    def __init__(self):
+        self.waits = []
+
+    def wait(self, host):
+        self.waits.append(host)
+
+
+def test_every_ticker_request_waits_for_the_rate_limiter(fake_ticker):
+    limiter = RecordingLimiter()
+
+    scraper.YahooDownloader(limiter)(["SPY", "QQQ", "IWM"], date(2024, 1, 1), date(2024, 1, 4))
+
+    assert limiter.waits == [scraper.YAHOO_HOST] * 3